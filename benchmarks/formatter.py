@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Measures node content rendering with the compiled and cached ContentFormatter,
+compared to parsing the template on every call, as done before compiling templates.
+
+    python benchmarks/formatter.py
+"""
+from __future__ import print_function, unicode_literals
+
+import os
+import sys
+import timeit
+from string import Formatter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cio.utils.formatters import ContentFormatter  # noqa
+
+NUMBER = 20000
+
+TEMPLATES = [
+    ('no fields', 'Welcome to our site, please sign in to continue.', {}),
+    ('few fields', 'Hello {firstname} {lastname}, you have {count} new messages.',
+     dict(firstname='Jonas', lastname='Lundberg', count=3)),
+    ('formatted fields', 'Total {amount:.2f} {currency!s:>5} {missing}', dict(amount=9.5, currency='SEK')),
+    ('long text', ' '.join(['Lorem ipsum {word} dolor sit amet.'] * 20), dict(word='ipsum')),
+]
+
+
+def bench(name, func):
+    seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+    print('%-40s %8.2f us/call' % (name, seconds / NUMBER * 1e6))
+    return seconds
+
+
+def main():
+    formatter = ContentFormatter()
+    uncached = ContentFormatter(cache_size=0)
+
+    for name, template, context in TEMPLATES:
+        parsed = bench('%s: parse per call' % name, lambda: Formatter.vformat(uncached, template, (), context))
+        compiled = bench('%s: compiled' % name, lambda: formatter.format(template, **context))
+        print('%-40s %8.1f%%' % ('%s: saved' % name, (1 - compiled / parsed) * 100))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Measures memory held by buffered gets, before and after flushing them, using tracemalloc.
+
+    python benchmarks/memory.py [--compact]
+"""
+from __future__ import print_function, unicode_literals
+
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cio.conf import settings  # noqa
+settings.configure(
+    ENVIRONMENT={'default': {'i18n': 'sv-se', 'l10n': 'local', 'g11n': 'global'}},
+    NODE_COMPACT='--compact' in sys.argv,
+)
+
+import cio  # noqa
+from cio.pipeline import pipeline  # noqa
+
+NUMBER = 100000
+DISTINCT = 1000
+
+
+def measure(name, func):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    print('%-40s %8.1f MiB %8.0f bytes/node' % (name, size / 1024.0 / 1024, size / float(NUMBER)))
+    return result
+
+
+def main():
+    for i in range(DISTINCT):
+        cio.set('i18n://sv-se@page/%d.txt' % i, u'Content %d' % i)
+
+    nodes = measure('%d buffered gets' % NUMBER, lambda: [cio.get('page/%d' % (i % DISTINCT)) for i in range(NUMBER)])
+    measure('%d flushed gets' % NUMBER, lambda: [node.content for node in nodes])
+    del nodes
+    pipeline.clear()
+
+
+if __name__ == '__main__':
+    main()
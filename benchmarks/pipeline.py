@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+Measures per call dispatch overhead of the compiled pipeline,
+compared to walking every pipe handler pair for each call.
+
+    python benchmarks/pipeline.py
+"""
+from __future__ import print_function, unicode_literals
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cio.conf import settings  # noqa
+settings.configure(ENVIRONMENT={'default': {'i18n': 'sv-se', 'l10n': 'local', 'g11n': 'global'}})
+
+import cio  # noqa
+from cio.node import Node  # noqa
+from cio.pipeline import pipeline  # noqa
+from cio.pipeline.chain import compile_chain  # noqa
+from cio.pipeline.handler import PIPELINE_CALLS  # noqa
+
+NUMBER = 20000
+
+
+def walk(handlers, request):
+    """
+    Dispatch by walking all handler pairs, as done before compiling pipelines
+    """
+    response_chain = []
+    for request_handler, response_handler in handlers:
+        pipe_response = request_handler(request) if request_handler else None
+        response_chain.append((response_handler, pipe_response))
+        if not request:
+            break
+
+    response = request
+    for response_handler, pipe_response in reversed(response_chain):
+        if response and response_handler:
+            response = response_handler(response)
+        if pipe_response:
+            response.update(pipe_response)
+
+    return response
+
+
+def bench(name, func):
+    seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+    print('%-40s %8.2f us/call' % (name, seconds / NUMBER * 1e6))
+    return seconds
+
+
+def request_handler(request):
+    pass
+
+
+def response_handler(response):
+    return response
+
+
+def main():
+    pipes = dict((pipe_class, pipe_class()) for pipe_class in pipeline.pipes)
+    node = Node('i18n://sv-se@page/title.txt', u'Title')
+
+    for method in PIPELINE_CALLS:
+        # Stand in no-op handlers for the ones implemented by each pipe, only measuring dispatch
+        handlers = []
+        for pipe_class in pipeline.method_pipes[method]:
+            pipe = pipes[pipe_class]
+            handlers.append((
+                request_handler if hasattr(pipe, '%s_request' % method) else None,
+                response_handler if hasattr(pipe, '%s_response' % method) else None,
+            ))
+
+        chain = compile_chain(handlers)
+        walked = bench('%s: walk all pipes' % method, lambda: walk(handlers, {node.uri: node}))
+        compiled = bench('%s: compiled chain' % method, lambda: chain({node.uri: node}))
+        print('%-40s %8.1f%%' % ('%s: saved' % method, (1 - compiled / walked) * 100))
+
+    # End to end get of a cached node
+    cio.set('i18n://sv-se@page/title.txt', u'Title')
+    bench('get: cached node end to end', lambda: cio.get('page/title', lazy=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+Measures uri parsing and cloning.
+
+    python benchmarks/uri.py
+"""
+from __future__ import print_function, unicode_literals
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cio.utils.uri import URI  # noqa
+
+NUMBER = 20000
+
+
+def bench(name, func):
+    seconds = min(timeit.repeat(func, number=NUMBER, repeat=5))
+    print('%-40s %8.2f us/call' % (name, seconds / NUMBER * 1e6))
+    return seconds
+
+
+def main():
+    uri = URI('i18n://sv-se@page/title.txt#1')
+    query_uri = URI('i18n://sv-se@page/title.txt?name=monkey&count=5#1')
+
+    bench('parse: short', lambda: URI('page/title'))
+    bench('parse: absolute', lambda: URI('i18n://sv-se@page/title.txt#1'))
+    bench('parse: with query', lambda: URI('i18n://sv-se@page/title.txt?name=monkey&count=5#1'))
+    bench('parse: bytes', lambda: URI(b'i18n://sv-se@page/title.txt#1'))
+    bench('clone: version', lambda: uri.clone(version='draft'))
+    bench('clone: namespace', lambda: uri.clone(namespace='en-us'))
+    bench('clone: with query', lambda: query_uri.clone(version=None))
+
+
+if __name__ == '__main__':
+    main()
@@ -66,6 +66,9 @@ class lazy_shortcut(object):
 
 env = lazy_shortcut('cio.environment', 'env')
 get = lazy_shortcut('cio.api', 'get')
+get_many = lazy_shortcut('cio.api', 'get_many')
+batch = lazy_shortcut('cio.api', 'batch')
+prefetch = lazy_shortcut('cio.api', 'prefetch')
 set = lazy_shortcut('cio.api', 'set')
 load = lazy_shortcut('cio.api', 'load')
 delete = lazy_shortcut('cio.api', 'delete')
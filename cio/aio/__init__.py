@@ -0,0 +1,13 @@
+# coding=utf-8
+"""
+Asyncio api, requires Python 3.5+.
+
+Coroutine pipe handlers are awaited, while blocking pipes and backends
+are run in a bounded thread pool, sized by settings.ASYNC_MAX_WORKERS.
+Executor threads run within a copy of the calling context, seeing its context local settings and environment.
+Storage backends must be thread safe, i.e. sqlite with check_same_thread disabled.
+"""
+from __future__ import unicode_literals
+
+from .api import aget, aset, adelete, apublish, arevisions, aload, asearch  # noqa
+from .backends import AsyncCacheBackend, AsyncStorageBackend, ExecutorCacheBackend, ExecutorStorageBackend  # noqa
@@ -0,0 +1,72 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+from .backends import storage
+from .executor import executor
+from ..api import _init_get_node, _init_set_node, _init_delete_node, _init_publish_node, _load_uri_chain, _load_node
+from ..backends.exceptions import NodeDoesNotExist
+from ..pipeline import pipeline
+from ..utils.uri import URI
+
+__all__ = ['aget', 'aset', 'adelete', 'apublish', 'arevisions', 'aload', 'asearch']
+
+
+async def aget(uri, default=None):
+    node = _init_get_node(uri, default)
+    await pipeline.asend('get', node)
+    return node
+
+
+async def aset(uri, data, publish=True, **meta):
+    node = _init_set_node(uri, data, **meta)
+
+    # Send node through pipeline
+    await pipeline.asend('set', node)
+
+    # Auto publish
+    if publish:
+        await pipeline.asend('publish', node)
+
+    return node
+
+
+async def adelete(*uris):
+    nodes = (_init_delete_node(uri) for uri in uris)
+
+    # Send nodes through pipeline
+    response = await pipeline.asend('delete', *nodes)
+
+    # Return requested uris for successfully deleted nodes (content set to None)
+    return [node.initial_uri for node in response.values() if node.content is None]
+
+
+async def apublish(uri):
+    node = _init_publish_node(uri)
+    uri = node.uri
+    response = await pipeline.asend('publish', node)
+    return response.get(uri)
+
+
+async def arevisions(uri):
+    return await storage.get_revisions(uri)
+
+
+async def aload(uri):
+    uri = URI(uri)
+    stored_node = None
+
+    # Try to get node from storage in order: given version, draft, published
+    for _uri in _load_uri_chain(uri):
+        try:
+            stored_node = await storage.get(_uri)
+        except NodeDoesNotExist:
+            continue
+        else:
+            break
+
+    # Plugins may render blocking
+    return await executor.run(_load_node, uri, stored_node)
+
+
+async def asearch(uri=None):
+    return await storage.search(uri=uri)
@@ -0,0 +1,146 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+from .executor import executor
+from ..backends import cache as sync_cache, storage as sync_storage
+from ..conf.exceptions import ImproperlyConfigured
+
+
+class AsyncCacheBackend(object):
+    """
+    Async variant of the CacheBackend contract, see cio.backends.base.CacheBackend
+    """
+
+    async def get(self, uri, versioned=False):
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_many(self, uris, versioned=False):
+        raise NotImplementedError  # pragma: no cover
+
+    async def set(self, uri, content, timeout=None, versioned=False):
+        raise NotImplementedError  # pragma: no cover
+
+    async def set_many(self, nodes, timeout=None, versioned=False):
+        raise NotImplementedError  # pragma: no cover
+
+    async def delete(self, uri, versioned=False):
+        raise NotImplementedError  # pragma: no cover
+
+    async def delete_many(self, uris, versioned=False):
+        raise NotImplementedError  # pragma: no cover
+
+    async def clear(self):
+        raise NotImplementedError  # pragma: no cover
+
+
+class AsyncStorageBackend(object):
+    """
+    Async variant of the StorageBackend contract, see cio.backends.base.StorageBackend
+    """
+
+    async def get(self, uri):
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_many(self, uris):
+        raise NotImplementedError  # pragma: no cover
+
+    async def set(self, uri, content, **meta):
+        raise NotImplementedError  # pragma: no cover
+
+    async def delete(self, uri):
+        raise NotImplementedError  # pragma: no cover
+
+    async def delete_many(self, uris):
+        raise NotImplementedError  # pragma: no cover
+
+    async def publish(self, uri, **meta):
+        raise NotImplementedError  # pragma: no cover
+
+    async def get_revisions(self, uri):
+        raise NotImplementedError  # pragma: no cover
+
+    async def search(self, uri):
+        raise NotImplementedError  # pragma: no cover
+
+
+class ExecutorCacheBackend(AsyncCacheBackend):
+    """
+    Runs a blocking cache backend, or manager, in the bounded executor
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def get(self, uri, versioned=False):
+        return await executor.run(self.backend.get, uri, versioned=versioned)
+
+    async def get_many(self, uris, versioned=False):
+        return await executor.run(self.backend.get_many, uris, versioned=versioned)
+
+    async def set(self, uri, content, timeout=None, versioned=False):
+        return await executor.run(self.backend.set, uri, content, timeout=timeout, versioned=versioned)
+
+    async def set_many(self, nodes, timeout=None, versioned=False):
+        return await executor.run(self.backend.set_many, nodes, timeout=timeout, versioned=versioned)
+
+    async def delete(self, uri, versioned=False):
+        return await executor.run(self.backend.delete, uri, versioned=versioned)
+
+    async def delete_many(self, uris, versioned=False):
+        return await executor.run(self.backend.delete_many, uris, versioned=versioned)
+
+    async def clear(self):
+        return await executor.run(self.backend.clear)
+
+
+class ExecutorStorageBackend(AsyncStorageBackend):
+    """
+    Runs a blocking storage backend, or manager, in the bounded executor.
+    The backend must allow use from other threads, i.e. sqlite with check_same_thread disabled.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def check(self):
+        """
+        Raise ImproperlyConfigured if backend can not be used from executor threads
+        """
+        backend = getattr(self.backend, 'backend', self.backend)
+        if not backend.thread_safe:
+            raise ImproperlyConfigured(
+                'Storage backend "%s" is not thread safe, as required by asyncio api; '
+                'i.e. set sqlite OPTIONS check_same_thread to False.' % backend.config.get('BACKEND')
+            )
+
+    async def run(self, func, *args, **kwargs):
+        self.check()
+        return await executor.run(func, *args, **kwargs)
+
+    async def get(self, uri):
+        return await self.run(self.backend.get, uri)
+
+    async def get_many(self, uris):
+        return await self.run(self.backend.get_many, uris)
+
+    async def set(self, uri, content, **meta):
+        return await self.run(self.backend.set, uri, content, **meta)
+
+    async def delete(self, uri):
+        return await self.run(self.backend.delete, uri)
+
+    async def delete_many(self, uris):
+        return await self.run(self.backend.delete_many, uris)
+
+    async def publish(self, uri, **meta):
+        return await self.run(self.backend.publish, uri, **meta)
+
+    async def get_revisions(self, uri):
+        return await self.run(self.backend.get_revisions, uri)
+
+    async def search(self, uri):
+        return await self.run(self.backend.search, uri)
+
+
+cache = ExecutorCacheBackend(sync_cache)
+storage = ExecutorStorageBackend(sync_storage)
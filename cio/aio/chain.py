@@ -0,0 +1,110 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import asyncio
+from functools import wraps
+from .executor import executor
+from ..pipeline.chain import compile_chain
+
+
+def compile_async_chain(handlers):
+    """
+    Compile (request_handler, response_handler) pairs into a single coroutine call chain,
+    like cio.pipeline.chain.compile_chain, awaiting coroutine handlers and
+    running blocking handlers in the executor.
+
+    Consecutive blocking pipes form a segment, running all its request handlers in one executor call
+    and its response handlers in another, or in a single call when no coroutine handlers follow.
+    """
+    chain = _terminal
+    segment = []
+
+    for request_handler, response_handler in reversed(handlers):
+        if not (request_handler or response_handler):
+            continue
+        elif _is_blocking(request_handler) and _is_blocking(response_handler):
+            segment.insert(0, (request_handler, response_handler))
+        else:
+            chain = _segment(segment, chain)
+            segment = []
+            chain = _link(_coroutine(request_handler), _coroutine(response_handler), chain)
+
+    return _segment(segment, chain)
+
+
+def _is_blocking(handler):
+    return handler is None or not asyncio.iscoroutinefunction(handler)
+
+
+def _coroutine(handler):
+    if handler is None or asyncio.iscoroutinefunction(handler):
+        return handler
+
+    @wraps(handler)
+    async def run(nodes):
+        return await executor.run(handler, nodes)
+
+    return run
+
+
+async def _terminal(request):
+    # Turn request to response
+    return request
+
+
+def _link(request_handler, response_handler, next_link):
+    async def link(request):
+        pipe_response = await request_handler(request) if request_handler else None
+        response = await next_link(request) if request else request
+        if response and response_handler:
+            response = await response_handler(response)
+        if pipe_response:
+            response.update(pipe_response)
+        return response
+    return link
+
+
+def _segment(handlers, next_link):
+    if not handlers:
+        return next_link
+
+    if next_link is _terminal:
+        sync_chain = compile_chain(handlers)
+
+        async def link(request):
+            return await executor.run(sync_chain, request)
+        return link
+
+    return _segment_link(handlers, next_link)
+
+
+def _segment_link(handlers, next_link):
+    has_response_handlers = any(response_handler for _, response_handler in handlers)
+
+    async def link(request):
+        pipe_responses = await executor.run(_descend, handlers, request)
+        response = await next_link(request) if request else request
+        if has_response_handlers or any(pipe_responses):
+            response = await executor.run(_ascend, handlers, response, pipe_responses)
+        return response
+    return link
+
+
+def _descend(handlers, request):
+    # Call request handlers of segment until no node requests are left
+    pipe_responses = []
+    for request_handler, _ in handlers:
+        pipe_responses.append(request_handler(request) if request_handler else None)
+        if not request:
+            break
+    return pipe_responses
+
+
+def _ascend(handlers, response, pipe_responses):
+    # Call response handlers of reached pipes in reverse
+    for (_, response_handler), pipe_response in reversed(list(zip(handlers, pipe_responses))):
+        if response and response_handler:
+            response = response_handler(response)
+        if pipe_response:
+            response.update(pipe_response)
+    return response
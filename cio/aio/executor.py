@@ -0,0 +1,52 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from ..conf import settings
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover
+    contextvars = None
+
+
+class Executor(object):
+    """
+    Bounded thread pool running blocking pipes and backends off the event loop,
+    sized by settings.ASYNC_MAX_WORKERS and recreated when settings change.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = Lock()
+        settings.watch(self.shutdown, keys=('ASYNC_MAX_WORKERS',))
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=int(settings.ASYNC_MAX_WORKERS))
+        return self._executor
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Run blocking function in executor, within a copy of current context, i.e. seeing context local settings.
+        """
+        loop = asyncio.get_event_loop()
+        call = partial(func, *args, **kwargs)
+        if contextvars is not None:
+            call = partial(contextvars.copy_context().run, call)
+        return await loop.run_in_executor(self.executor, call)
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+executor = Executor()
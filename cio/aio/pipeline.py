@@ -0,0 +1,51 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+from timeit import default_timer
+from .backends import storage
+from .chain import compile_async_chain
+from ..pipeline.history import TracedRequest
+
+
+async def send(handler, method, *nodes):
+    """
+    Send nodes through given pipeline handler, compiling its async call chains on first use.
+    """
+    # Blocking pipes use storage from executor threads
+    storage.check()
+
+    traced = handler.history.sample()
+    chain = handler._async_pipeline.get((method, traced))
+    if chain is None:
+        handlers = handler._traced_handlers[method] if traced else handler._handlers[method]
+        chain = handler._async_pipeline[(method, traced)] = compile_async_chain(handlers)
+
+    listeners = handler.tracer.listeners
+
+    if not traced and not listeners:
+        request = dict((node.uri, node) for node in nodes)
+        return await chain(request)
+
+    request = TracedRequest((node.uri, node) for node in nodes) if traced else dict((node.uri, node) for node in nodes)
+
+    if listeners:
+        handler.tracer.send_started(method, request)
+
+    start = default_timer()
+    try:
+        response = await chain(request)
+    except BaseException as e:
+        # Let listeners close their send, i.e. span, of failing or cancelled pipe
+        if listeners:
+            handler.tracer.send_failed(method, request, default_timer() - start, e)
+        raise
+    duration = default_timer() - start
+
+    if listeners:
+        handler.tracer.send_finished(method, response, duration)
+
+    # Log response
+    if traced:
+        handler.history.log(method, response, duration)
+
+    return response
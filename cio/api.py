@@ -10,22 +10,22 @@ from .backends import storage
 from .backends.exceptions import NodeDoesNotExist
 from .utils.uri import URI
 
-__all__ = ['get', 'set', 'delete', 'publish', 'revisions', 'load']
+__all__ = ['get', 'get_many', 'batch', 'prefetch', 'set', 'delete', 'publish', 'revisions', 'load']
 
 
 def get(uri, default=None, lazy=True):
+    # Use node prefetched for current scope, if any
+    if pipeline.prefetcher.active:
+        node = pipeline.prefetcher.get(uri, default)
+        if node is not None:
+            if not lazy:
+                node.flush()
+            return node
 
-    node = Node(uri, default)
-
-    # Set URI namespace to current environment scheme, if not set
-    uri = node.uri
-    if not uri.namespace:
-        namespace = getattr(env, node.uri.scheme)[0]
-        uri = uri.clone(namespace=namespace)
-    node.uri = uri
+    node = _init_get_node(uri, default)
 
     # Send/Buffer node through pipeline
-    if lazy:
+    if lazy or pipeline.batching:
         node = pipeline.buffer('get', node)
     else:
         # TODO: Return node from pipeline
@@ -34,16 +34,42 @@ def get(uri, default=None, lazy=True):
     return node
 
 
-def set(uri, data, publish=True, **meta):
-    node = Node(uri, data, **meta)
+def get_many(uris, default=None):
+    """
+    Get many nodes at once through pipeline, returning requested uri map of nodes.
 
-    # Extend uri with missing extension and version
-    uri = node.uri
-    if not uri.ext:
-        uri = uri.clone(ext=settings.URI_DEFAULT_EXT)
-    if not uri.version:
-        uri = uri.clone(version='draft')
-    node.uri = uri
+    Given default applies to all uris. Uris resolving to the same node, i.e. with and without namespace,
+    are fetched once and map to the same node instance. Use separate gets for different defaults.
+    """
+    nodes = {}
+    distinct_nodes = {}
+
+    for uri in uris:
+        node = _init_get_node(uri, default)
+        nodes[uri] = distinct_nodes.setdefault(node.uri, node)
+
+    # Send distinct nodes through pipeline
+    pipeline.send('get', *distinct_nodes.values())
+
+    return nodes
+
+
+def batch():
+    """
+    Context manager buffering all gets, flushed at once on exit or on first node access.
+    """
+    return pipeline.batch()
+
+
+def prefetch(scope):
+    """
+    Context manager prefetching nodes previously fetched within named scope, i.e. a view.
+    """
+    return pipeline.prefetch(scope)
+
+
+def set(uri, data, publish=True, **meta):
+    node = _init_set_node(uri, data, **meta)
 
     # Send node through pipeline
     pipeline.send('set', node)
@@ -56,15 +82,7 @@ def set(uri, data, publish=True, **meta):
 
 
 def delete(*uris):
-    # Initialize nodes with "empty" content
-    def init_node(uri):
-        node = Node(uri, empty)
-
-        # Default version to draft
-        if not node.uri.version:
-            node.uri = node.uri.clone(version='draft')
-        return node
-    nodes = (init_node(uri) for uri in uris)
+    nodes = (_init_delete_node(uri) for uri in uris)
 
     # Send nodes through pipeline
     response = pipeline.send('delete', *nodes)
@@ -74,12 +92,8 @@ def delete(*uris):
 
 
 def publish(uri):
-    node = Node(uri)
-
-    # Publish draft if no specific version specified
-    if not node.uri.version:
-        uri = node.uri = node.uri.clone(version='draft')
-
+    node = _init_publish_node(uri)
+    uri = node.uri
     response = pipeline.send('publish', node)
     return response.get(uri)
 
@@ -90,30 +104,90 @@ def revisions(uri):
 
 def load(uri):
     uri = URI(uri)
-    node = None
-    data = None
-
-    def uri_chain(uri):
-        uri = uri.clone(query=None)
-        if uri.version:
-            yield uri
-        if uri.version != 'draft':
-            yield uri.clone(version='draft')
-        yield uri.clone(version=None)
+    stored_node = None
 
     # Try to get node from storage in order: given version, draft, published
-    for _uri in uri_chain(uri):
+    for _uri in _load_uri_chain(uri):
         try:
             stored_node = storage.get(_uri)
         except NodeDoesNotExist:
             continue
         else:
-            # Add potential query params for plugin resolve
-            meta = stored_node.get('meta') or {}
-            node = Node(URI(stored_node['uri']).clone(query=uri.query), content=stored_node['content'], **meta)
             break
 
-    if node:
+    return _load_node(uri, stored_node)
+
+
+def search(uri=None):
+    return storage.search(uri=uri)
+
+
+def _init_get_node(uri, default=None):
+    node = Node(uri, default)
+
+    # Set URI namespace to current environment scheme, if not set
+    uri = node.uri
+    if not uri.namespace:
+        namespace = getattr(env, node.uri.scheme)[0]
+        uri = uri.clone(namespace=namespace)
+    node.uri = uri
+
+    return node
+
+
+def _init_set_node(uri, data, **meta):
+    node = Node(uri, data, **meta)
+
+    # Extend uri with missing extension and version
+    uri = node.uri
+    if not uri.ext:
+        uri = uri.clone(ext=settings.snapshot.URI_DEFAULT_EXT)
+    if not uri.version:
+        uri = uri.clone(version='draft')
+    node.uri = uri
+
+    return node
+
+
+def _init_delete_node(uri):
+    # Initialize node with "empty" content
+    node = Node(uri, empty)
+
+    # Default version to draft
+    if not node.uri.version:
+        node.uri = node.uri.clone(version='draft')
+
+    return node
+
+
+def _init_publish_node(uri):
+    node = Node(uri)
+
+    # Publish draft if no specific version specified
+    if not node.uri.version:
+        node.uri = node.uri.clone(version='draft')
+
+    return node
+
+
+def _load_uri_chain(uri):
+    uri = uri.clone(query=None)
+    if uri.version:
+        yield uri
+    if uri.version != 'draft':
+        yield uri.clone(version='draft')
+    yield uri.clone(version=None)
+
+
+def _load_node(uri, stored_node=None):
+    node = None
+    data = None
+
+    if stored_node:
+        # Add potential query params for plugin resolve
+        meta = stored_node.get('meta') or {}
+        node = Node(URI(stored_node['uri']).clone(query=uri.query), content=stored_node['content'], **meta)
+
         # Load node data with related plugin
         plugin = plugins.resolve(node.uri)  # May raise UnknownPlugin and should be handled outside api
         data = plugin.load_node(node)
@@ -125,7 +199,7 @@ def load(uri):
 
         # Set default extension
         if not uri.ext:
-            uri = uri.clone(ext=settings.URI_DEFAULT_EXT)
+            uri = uri.clone(ext=settings.snapshot.URI_DEFAULT_EXT)
 
         # Validate plugin existence
         plugins.resolve(uri)
@@ -138,7 +212,3 @@ def load(uri):
         'content': node.content,
         'meta': node.meta
     }
-
-
-def search(uri=None):
-    return storage.search(uri=uri)
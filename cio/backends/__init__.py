@@ -2,15 +2,27 @@
 from __future__ import unicode_literals
 
 import inspect
+import logging
 import six
+import time
 from .base import BaseBackend, CacheBackend, StorageBackend
-from .exceptions import InvalidBackend
+from .exceptions import InvalidBackend, NodeDoesNotExist
 from ..conf import settings
+from ..utils.bloom import BloomFilter
 from ..utils.imports import import_class
 from ..utils.uri import URI
 
+logger = logging.getLogger(__name__)
+
+# Node meta key of content rendered at publish, internal to the storage and plugin pipes
+RENDERED = 'rendered'
+
 BACKENDS = {
+    'disk': 'disk',
     'locmem': 'locmem',
+    'memcached': 'memcached',
+    'sharded': 'sharded',
+    'shm': 'shm',
     'sqlite': 'sqlite'
 }
 
@@ -61,9 +73,11 @@ class BackendManager(object):
     """
     Manager for backend. Handles arg validation.
     """
+    setting = None
+
     def __init__(self):
         self._backend = None
-        settings.watch(self.setup)
+        settings.watch(self.setup, keys=(self.setting,))
 
     @property
     def backend(self):
@@ -79,11 +93,18 @@ class BackendManager(object):
 
         # Validate backend
         if self._is_valid_backend(backend):
-            self._backend = backend
+            previous, self._backend = self._backend, backend
             self._update_backend_settings(backend.config)
+            if previous is not None:
+                previous.close()
         else:
             raise InvalidBackend('Invalid content-io %s backend "%s"' % (self._scope(), self._conf))
 
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
     def _scope(self):
         return self.__class__.__name__.rstrip('Manager').lower()
 
@@ -123,39 +144,47 @@ class BackendManager(object):
 
 class CacheManager(BackendManager, CacheBackend):
 
+    setting = 'CACHE'
+
     def _get_backend_config(self):
         return settings.CACHE
 
     def _update_backend_settings(self, config):
         settings.CACHE = config
 
-    def get(self, uri):
-        uri = self._clean_get_uri(uri)
-        return self.backend.get(uri)
+    def get(self, uri, versioned=False):
+        uri = self._clean_versioned_uri(uri) if versioned else self._clean_get_uri(uri)
+        return self.backend.get(uri, versioned=versioned)
 
-    def get_many(self, uris):
-        uris = self._clean_get_uris(uris)
-        return self.backend.get_many(uris)
+    def get_many(self, uris, versioned=False):
+        uris = self._clean_versioned_uris(uris) if versioned else self._clean_get_uris(uris)
+        return self.backend.get_many(uris, versioned=versioned)
 
-    def set(self, uri, content):
-        uri = self._clean_set_uri(uri)
-        self.backend.set(uri, content)
+    def set(self, uri, content, timeout=None, versioned=False):
+        uri = self._clean_versioned_uri(uri, 'ext') if versioned else self._clean_set_uri(uri)
+        self.backend.set(uri, content, timeout=timeout, versioned=versioned)
 
-    def set_many(self, nodes):
-        nodes = dict((self._clean_set_uri(uri), content) for uri, content in six.iteritems(nodes))
-        self.backend.set_many(nodes)
+    def set_many(self, nodes, timeout=None, versioned=False):
+        if versioned:
+            nodes = dict((self._clean_versioned_uri(uri, 'ext'), content) for uri, content in six.iteritems(nodes))
+        else:
+            nodes = dict((self._clean_set_uri(uri), content) for uri, content in six.iteritems(nodes))
+        self.backend.set_many(nodes, timeout=timeout, versioned=versioned)
 
-    def delete(self, uri):
-        uri = self._clean_delete_uri(uri)
-        self.backend.delete(uri)
+    def delete(self, uri, versioned=False):
+        uri = self._clean_versioned_uri(uri) if versioned else self._clean_delete_uri(uri)
+        self.backend.delete(uri, versioned=versioned)
 
-    def delete_many(self, uris):
-        uris = self._clean_delete_uris(uris)
-        self.backend.delete_many(uris)
+    def delete_many(self, uris, versioned=False):
+        uris = self._clean_versioned_uris(uris) if versioned else self._clean_delete_uris(uris)
+        self.backend.delete_many(uris, versioned=versioned)
 
     def clear(self):
         self.backend.clear()
 
+    def bump_generation(self, scheme, namespace=None):
+        self.backend.bump_generation(scheme, namespace=namespace)
+
     def _is_valid_backend(self, backend):
         return isinstance(backend, CacheBackend)
 
@@ -168,8 +197,39 @@ class CacheManager(BackendManager, CacheBackend):
     def _clean_delete_uri(self, uri):
         return self._clean_uri(uri, 'namespace', 'path')
 
+    def _clean_versioned_uri(self, uri, *parts):
+        # Versioned keys without version would collide with unversioned ones
+        return self._clean_uri(uri, 'namespace', 'path', 'version', *parts)
+
+    def _clean_versioned_uris(self, uris):
+        return tuple(self._clean_versioned_uri(uri) for uri in uris)
+
 
 class StorageManager(BackendManager, StorageBackend):
+    """
+    Optionally keeps a bloom filter of existing node keys, configured by STORAGE['BLOOM'],
+    to skip lookups of nodes that definitely don't exist:
+
+        'BLOOM': {
+            'CAPACITY': 100000,  # Expected number of node keys
+            'ERROR_RATE': 0.01,  # Wanted false positive rate
+            'REFRESH': 60,  # Rebuild interval in seconds, default None (never)
+        }
+
+    Nodes persisted by other processes are only seen after a rebuild,
+    therefore only enable when all writes go through this process or with a refresh interval.
+
+    Content pre-rendered at publish is stripped from returned node meta,
+    unless fetched with rendered=True, i.e. by the storage pipes.
+    """
+
+    setting = 'STORAGE'
+
+    def __init__(self):
+        self.bloom = None
+        self._bloom_config = None
+        self._bloom_built_at = None
+        super(StorageManager, self).__init__()
 
     def _get_backend_config(self):
         return settings.STORAGE
@@ -177,13 +237,63 @@ class StorageManager(BackendManager, StorageBackend):
     def _update_backend_settings(self, config):
         settings.STORAGE = config
 
-    def get(self, uri):
+    def setup(self):
+        super(StorageManager, self).setup()
+        config = self._backend.config.get('BLOOM')
+        self._bloom_config = {} if config is True else config if isinstance(config, dict) else None
+        self.bloom = None
+
+    def get_bloom(self):
+        """
+        Return bloom filter of existing node keys, (re)built from storage when needed, or None if not enabled.
+        """
+        if self._backend is None:
+            self.setup()
+
+        config = self._bloom_config
+        if config is None:
+            return None
+
+        refresh = config.get('REFRESH')
+        if self.bloom is None or (refresh is not None and time.time() - self._bloom_built_at > refresh):
+            self.build_bloom()
+
+        return self.bloom
+
+    def build_bloom(self):
+        config = self._bloom_config or {}
+        bloom = BloomFilter(capacity=config.get('CAPACITY', 100000), error_rate=config.get('ERROR_RATE', 0.01))
+        bloom.update(self._build_bloom_key(uri) for uri in self.backend.search(URI()))
+        if len(bloom) > bloom.capacity:
+            logger.warn('Storage bloom filter over capacity, %s keys; false positive rate %.3f',
+                        len(bloom), bloom.false_positive_rate)
+        self.bloom = bloom
+        self._bloom_built_at = time.time()
+        return bloom
+
+    def _build_bloom_key(self, uri):
+        return uri.clone(ext=None, version=None, query=None)
+
+    def _filter_existing(self, uris):
+        """
+        Filter out uris of nodes that definitely don't exist in storage
+        """
+        bloom = self.get_bloom()
+        if bloom is None:
+            return uris
+        return tuple(uri for uri in uris if self._build_bloom_key(uri) in bloom)
+
+    def get(self, uri, rendered=False):
         uri = self._clean_get_uri(uri)
-        return self.backend.get(uri)
+        if not self._filter_existing((uri,)):
+            raise NodeDoesNotExist('Node for uri "%s" does not exist' % uri)
+        return self._strip_rendered(self.backend.get(uri), rendered)
 
-    def get_many(self, uris):
-        uris = self._clean_get_uris(uris)
-        return self.backend.get_many(uris)
+    def get_many(self, uris, rendered=False):
+        uris = self._filter_existing(self._clean_get_uris(uris))
+        if not uris:
+            return {}
+        return self._strip_rendered_many(self.backend.get_many(uris), rendered)
 
     def set(self, uri, content, **meta):
         uri = self._clean_set_uri(uri)
@@ -191,7 +301,13 @@ class StorageManager(BackendManager, StorageBackend):
         if content is None:
             raise ValueError('Can not persist content equal to None for URI "%s".' % uri)
 
-        return self.backend.set(uri, content, **meta)
+        node, created = self.backend.set(uri, content, **meta)
+
+        bloom = self.get_bloom()
+        if bloom is not None:
+            bloom.add(self._build_bloom_key(uri))
+
+        return self._strip_rendered(node), created
 
     def delete(self, uri):
         uri = self._clean_delete_uri(uri)
@@ -203,7 +319,28 @@ class StorageManager(BackendManager, StorageBackend):
 
     def publish(self, uri, **meta):
         uri = self._clean_publish_uri(uri)
-        return self.backend.publish(uri, **meta)
+        return self._strip_rendered(self.backend.publish(uri, **meta))
+
+    def get_fallbacks(self, fallback_uris, rendered=False):
+        fallback_uris = dict(
+            (self._clean_get_uri(uri), self._filter_existing(self._clean_get_uris(uris)))
+            for uri, uris in six.iteritems(fallback_uris)
+        )
+        fallback_uris = dict((uri, uris) for uri, uris in six.iteritems(fallback_uris) if uris)
+        if not fallback_uris:
+            return {}
+        return self._strip_rendered_many(self.backend.get_fallbacks(fallback_uris), rendered)
+
+    def _strip_rendered(self, node, rendered=False):
+        if not rendered and node and node.get('meta'):
+            node['meta'].pop(RENDERED, None)
+        return node
+
+    def _strip_rendered_many(self, nodes, rendered=False):
+        if not rendered:
+            for node in six.itervalues(nodes):
+                self._strip_rendered(node)
+        return nodes
 
     def get_revisions(self, uri):
         uri = self._clean_get_uri(uri)
@@ -211,7 +348,7 @@ class StorageManager(BackendManager, StorageBackend):
 
     def search(self, uri=None):
         _uri = URI(uri)
-        if not uri or settings.URI_SCHEME_SEPARATOR not in uri:
+        if not uri or settings.snapshot.URI_SCHEME_SEPARATOR not in uri:
             _uri = _uri.clone(scheme=None)
         return self.backend.search(uri=_uri)
 
@@ -1,44 +1,96 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+import hashlib
 import json
 import logging
 import six
-from hashlib import sha1
+import time
+from functools import partial
 from .exceptions import NodeDoesNotExist
+from .serializers import TupleSerializer
+from ..conf.exceptions import ImproperlyConfigured
+from ..utils.imports import import_class
+from ..utils.lru import LRUCache
 from ..utils.uri import URI
 
 logger = logging.getLogger(__name__)
 
+KEY_HASHES = {
+    'sha1': hashlib.sha1,
+    'md5': hashlib.md5,
+}
+
+if hasattr(hashlib, 'blake2b'):
+    KEY_HASHES['blake2b'] = partial(hashlib.blake2b, digest_size=16)
+
 
 class BaseBackend(object):
 
     scheme = None
 
+    # Safe to use from other threads than the creating one, i.e. asyncio executor threads
+    thread_safe = True
+
     def __init__(self, **config):
         self.config = config
 
+    def close(self):
+        """
+        Release resources held by backend, i.e. connections, threads or files.
+        No return.
+        """
+
+    def _get_config_flag(self, name, default=False):
+        """
+        Get boolean config value, also handling string values given as uri params, i.e. locmem://?FOO=false
+        """
+        value = self.config.get(name, default)
+        if isinstance(value, six.string_types):
+            return value.lower() not in ('', '0', 'false', 'no', 'off')
+        return bool(value)
+
 
 class CacheBackend(BaseBackend):
 
     NONE = '__None__'
+    GENERATION_PREFIX = 'generation:'
 
-    def get(self, uri):
+    serializer_class = TupleSerializer
+
+    def __init__(self, **config):
+        super(CacheBackend, self).__init__(**config)
+        self.generations = self._get_config_flag('GENERATIONS')
+
+        key_hash = self.config.get('KEY_HASH', 'sha1')
+        if key_hash not in KEY_HASHES:
+            raise ImproperlyConfigured('Unsupported cache key hash "%s".' % key_hash)
+        self._key_hash = KEY_HASHES[key_hash]
+
+        memo_size = int(self.config.get('KEY_MEMO_SIZE', 1000))
+        self._key_memo = LRUCache(memo_size) if memo_size > 0 else None
+
+        self.serializer = self._get_serializer()
+
+    def get(self, uri, versioned=False):
         """
         Return node for uri or None if not exists:
             {uri: x, content: y}
+        Versioned lookups are keyed by uri including version, else by uri without version.
         """
-        cache_key = self._build_cache_key(uri)
+        generations = self._get_generations((uri,))
+        cache_key = self._build_cache_key(uri, generations, versioned)
         value = self._get(cache_key)
         if value is not None:
             return self._decode_node(uri, value)
 
-    def get_many(self, uris):
+    def get_many(self, uris, versioned=False):
         """
         Return request uri map of found nodes as dicts:
             {requested_uri: {uri: x, content: y}}
         """
-        cache_keys = dict((self._build_cache_key(uri), uri) for uri in uris)
+        generations = self._get_generations(uris)
+        cache_keys = dict((self._build_cache_key(uri, generations, versioned), uri) for uri in uris)
         result = self._get_many(cache_keys)
         nodes = {}
         for cache_key in result:
@@ -49,36 +101,45 @@ class CacheBackend(BaseBackend):
                 nodes[uri] = node
         return nodes
 
-    def set(self, uri, content):
+    def set(self, uri, content, timeout=None, versioned=False):
         """
-        Cache node content for uri.
+        Cache node content for uri, optionally expiring after timeout seconds.
         No return.
         """
-        key, value = self._prepare_node(uri, content)
-        self._set(key, value)
+        generations = self._get_generations((uri,))
+        key, value = self._prepare_node(uri, content, generations, versioned)
+        if timeout is None:
+            self._set(key, value)
+        else:
+            self._set(key, value, timeout=timeout)
 
-    def set_many(self, nodes):
+    def set_many(self, nodes, timeout=None, versioned=False):
         """
         Takes nodes dict {uri: content, ...} as argument.
         No return.
         """
-        data = self._prepare_nodes(nodes)
-        self._set_many(data)
+        data = self._prepare_nodes(nodes, versioned)
+        if timeout is None:
+            self._set_many(data)
+        else:
+            self._set_many(data, timeout=timeout)
 
-    def delete(self, uri):
+    def delete(self, uri, versioned=False):
         """
         Remove node uri from cache.
         No return.
         """
-        cache_key = self._build_cache_key(uri)
+        generations = self._get_generations((uri,))
+        cache_key = self._build_cache_key(uri, generations, versioned)
         self._delete(cache_key)
 
-    def delete_many(self, uris):
+    def delete_many(self, uris, versioned=False):
         """
         Remove many nodes from cache.
         No return.
         """
-        cache_keys = (self._build_cache_key(uri) for uri in uris)
+        generations = self._get_generations(uris)
+        cache_keys = [self._build_cache_key(uri, generations, versioned) for uri in uris]
         self._delete_many(cache_keys)
 
     def clear(self):
@@ -87,16 +148,111 @@ class CacheBackend(BaseBackend):
         """
         raise NotImplementedError  # pragma: no cover
 
-    def _build_cache_key(self, uri):
+    def bump_generation(self, scheme, namespace=None):
+        """
+        Logically invalidate all cached nodes for scheme, or for a namespace within scheme,
+        by bumping its generation counter. Stale entries are left for the cache to evict.
+        Clears the whole cache if generations are not enabled for this backend.
+        No return.
+        """
+        if not self.generations:
+            self.clear()
+            return
+
+        key = self._build_generation_key(scheme, namespace)
+        if self._incr(key) is None and not self._add(key, self._seed_generation()):
+            # Concurrently seeded
+            self._incr(key)
+
+    def _get_generations(self, uris):
+        """
+        Fetch current scheme and namespace generations for given uris in one cache call.
+        Missing, i.e. evicted, generations are seeded.
+        Returns generation key map or None if generations are not enabled.
+        """
+        if not self.generations:
+            return None
+
+        keys = set()
+        for uri in uris:
+            keys.add(self._build_generation_key(uri.scheme))
+            keys.add(self._build_generation_key(uri.scheme, uri.namespace))
+
+        generations = self._get_many(keys)
+
+        if len(generations) < len(keys):
+            lost = []
+            for key in keys.difference(generations):
+                generation = self._seed_generation()
+                if self._add(key, generation):
+                    generations[key] = generation
+                else:
+                    lost.append(key)
+            if lost:
+                generations.update(self._get_many(lost))
+
+        return generations
+
+    def _seed_generation(self):
+        """
+        Return time based initial generation, never reusing one of an evicted generation counter
+        """
+        return six.text_type(int(time.time() * 1000000))
+
+    def _get_serializer(self):
+        serializer_class = self.config.get('SERIALIZER') or self.serializer_class
+        if isinstance(serializer_class, six.string_types):
+            try:
+                serializer_class = import_class(serializer_class)
+            except ImportError as e:
+                raise ImproperlyConfigured('Could not import content-io cache serializer "%s": %s' % (
+                    serializer_class, e
+                ))
+        options = self.config.get('SERIALIZER_OPTIONS') or {}
+        return serializer_class(**options)
+
+    def _build_generation_key(self, scheme, namespace=None):
+        key = self.GENERATION_PREFIX + (scheme or '')
+        if namespace:
+            key += '@' + namespace
+        return self._memoize_key(key, lambda: self._hash_key(key))
+
+    def _build_cache_key(self, uri, generations=None, versioned=False):
+        """
+        Build hex digest cache key to handle key length and whitespace to be compatible with Memcached
+        """
+        suffix = ''
+
+        # Mix in scheme and namespace generations
+        if generations is not None:
+            scheme_generation = generations.get(self._build_generation_key(uri.scheme))
+            namespace_generation = generations.get(self._build_generation_key(uri.scheme, uri.namespace))
+            suffix = '|%s.%s' % (scheme_generation or 0, namespace_generation or 0)
+
+        if versioned:
+            return self._memoize_key((uri + suffix, True), lambda: self._hash_key(uri.clone(ext=None) + suffix))
+
+        return self._memoize_key(uri + suffix, lambda: self._hash_key(uri.clone(ext=None, version=None) + suffix))
+
+    def _memoize_key(self, memo_key, build):
         """
-        Build sha1 hex cache key to handle key length and whitespace to be compatible with Memcached
+        Return memoized cache key, or build and memoize it
         """
-        key = uri.clone(ext=None, version=None)
+        if self._key_memo is None:
+            return build()
 
+        key = self._key_memo.get(memo_key)
+        if key is None:
+            key = build()
+            self._key_memo.set(memo_key, key)
+
+        return key
+
+    def _hash_key(self, key):
         if six.PY3:
             key = key.encode('utf-8')
 
-        return sha1(key).hexdigest()
+        return self._key_hash(key).hexdigest()
 
     def _get(self, key):
         raise NotImplementedError  # pragma: no cover
@@ -104,10 +260,10 @@ class CacheBackend(BaseBackend):
     def _get_many(self, keys):
         raise NotImplementedError  # pragma: no cover
 
-    def _set(self, key, value):
+    def _set(self, key, value, timeout=None):
         raise NotImplementedError  # pragma: no cover
 
-    def _set_many(self, data):
+    def _set_many(self, data, timeout=None):
         raise NotImplementedError  # pragma: no cover
 
     def _delete(self, key):
@@ -116,18 +272,39 @@ class CacheBackend(BaseBackend):
     def _delete_many(self, keys):
         raise NotImplementedError  # pragma: no cover
 
+    def _incr(self, key):
+        """
+        Increment integer value of key, returning new value or None if missing.
+        Not atomic, backends should override with an atomic increment where supported.
+        """
+        value = self._get(key)
+        if value is None:
+            return None
+        value = six.text_type(int(value) + 1)
+        self._set(key, value)
+        return value
+
+    def _add(self, key, value):
+        """
+        Set value of key only if missing, returning True if stored.
+        Not atomic, backends should override with an atomic add where supported.
+        """
+        if self._get(key) is not None:
+            return False
+        self._set(key, value)
+        return True
+
     def _encode_content(self, uri, content):
         """
         Encode/pack node uri and content in a way that the cache backend are able to persist.
         """
-        return uri, content
+        return self.serializer.dumps(uri, content)
 
     def _decode_content(self, content):
         """
         Decode/unpack cached node to uri and unicode content.
         """
-        uri, content = content
-        return uri, content
+        return self.serializer.loads(content)
 
     def _decode_node(self, uri, content):
         _uri, _content = self._decode_content(content)
@@ -139,13 +316,16 @@ class CacheBackend(BaseBackend):
                     'content': _content
                 }
 
-    def _prepare_node(self, uri, content):
-        key = self._build_cache_key(uri)
+    def _prepare_node(self, uri, content, generations=None, versioned=False):
+        key = self._build_cache_key(uri, generations, versioned)
         value = self._encode_content(uri, content)
         return key, value
 
-    def _prepare_nodes(self, nodes):
-        return dict(self._prepare_node(uri, content) for uri, content in six.iteritems(nodes))
+    def _prepare_nodes(self, nodes, versioned=False):
+        generations = self._get_generations(nodes)
+        return dict(
+            self._prepare_node(uri, content, generations, versioned) for uri, content in six.iteritems(nodes)
+        )
 
 
 class StorageBackend(BaseBackend):
@@ -193,6 +373,35 @@ class StorageBackend(BaseBackend):
         """
         raise NotImplementedError  # pragma: no cover
 
+    def get_fallbacks(self, fallback_uris):
+        """
+        Takes map of requested uri and fallback uris in priority order {requested_uri: [uri, ...]}.
+        Return request uri map of first found fallback nodes as dicts:
+            {requested_uri: {uri: x, content: y, meta: {}}}
+
+        Simple implementation getting one fallback level at a time,
+        could be better implemented by backend getting all levels at once.
+        """
+        nodes = {}
+        fallback_uris = dict((uri, list(uris)) for uri, uris in six.iteritems(fallback_uris) if uris)
+
+        while fallback_uris:
+            level_uris = {}
+            for requested_uri, uris in six.iteritems(fallback_uris):
+                level_uris.setdefault(uris.pop(0), []).append(requested_uri)
+
+            for uri, node in six.iteritems(self.get_many(level_uris.keys())):
+                for requested_uri in level_uris[uri]:
+                    nodes[requested_uri] = node
+                    fallback_uris.pop(requested_uri)
+
+            # Remove exhausted uris that has run out of fallback namespaces
+            for uri, uris in list(fallback_uris.items()):
+                if not uris:
+                    fallback_uris.pop(uri)
+
+        return nodes
+
     def get_revisions(self, uri):
         """
         Return list of tuples with uri and published state:
@@ -0,0 +1,5 @@
+from .backend import DiskCacheBackend
+
+
+class Backend(DiskCacheBackend):
+    pass
@@ -0,0 +1,211 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import os
+import six
+import sqlite3
+import time
+from contextlib import contextmanager
+from threading import Lock
+from ..base import CacheBackend
+from ..serializers import BinarySerializer
+from ...conf.exceptions import ImproperlyConfigured
+
+FILENAME = 'content-io-cache.sqlite'
+
+# Max number of sql variables per statement
+MAX_VARIABLES = 500
+
+
+class DiskCacheBackend(CacheBackend):
+    """
+    Persistent cache in a sqlite file, surviving process restarts and deploys, i.e. disk:///var/cache/content-io
+
+    Multi-key calls run in a single transaction. When the total size of cached values
+    exceeds MAX_SIZE, the oldest written entries are evicted down to CULL_RATIO of MAX_SIZE.
+    Generation counters are never evicted, since reseeding them invalidates their whole namespace.
+
+    Config:
+        NAME: Directory to store cache file in
+        MAX_SIZE: Max total size of cached values in bytes, default 256MB
+        CULL_RATIO: Share of MAX_SIZE to keep when evicting, default 0.9
+        TIMEOUT: Seconds to wait for database lock, default 5
+    """
+
+    scheme = 'disk'
+    serializer_class = BinarySerializer
+
+    def __init__(self, **config):
+        super(DiskCacheBackend, self).__init__(**config)
+        if not self.config.get('NAME'):
+            raise ImproperlyConfigured('Missing disk cache directory name.')
+
+        self.directory = self.config['NAME']
+        self.max_size = int(self.config.get('MAX_SIZE', 256 * 1024 * 1024))
+        self.cull_ratio = float(self.config.get('CULL_RATIO', 0.9))
+
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        self.path = os.path.join(self.directory, FILENAME)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(
+            self.path,
+            timeout=float(self.config.get('TIMEOUT', 5)),
+            check_same_thread=False,
+            isolation_level=None
+        )
+        self._setup()
+
+    def _setup(self):
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute('PRAGMA recursive_triggers=ON')
+
+        with self._transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS "content_io_cache" (
+                    "key" varchar(255) NOT NULL PRIMARY KEY,
+                    "value" blob NOT NULL,
+                    "size" integer NOT NULL,
+                    "stored_at" real NOT NULL,
+                    "expires_at" real NULL
+                );
+            """)
+            cursor.execute('CREATE INDEX IF NOT EXISTS "content_io_cache_stored_at" '
+                           'ON "content_io_cache" ("stored_at");')
+            cursor.execute('CREATE TABLE IF NOT EXISTS "content_io_cache_size" ("size" integer NOT NULL);')
+            cursor.execute('INSERT INTO content_io_cache_size (size) SELECT 0 '
+                           'WHERE NOT EXISTS (SELECT 1 FROM content_io_cache_size);')
+
+            # Keep track of total cache size
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS "content_io_cache_insert" AFTER INSERT ON "content_io_cache"
+                BEGIN UPDATE content_io_cache_size SET size = size + NEW.size; END;
+            """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS "content_io_cache_delete" AFTER DELETE ON "content_io_cache"
+                BEGIN UPDATE content_io_cache_size SET size = size - OLD.size; END;
+            """)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute('BEGIN')
+            try:
+                yield cursor
+            except Exception:
+                cursor.execute('ROLLBACK')
+                raise
+            else:
+                cursor.execute('COMMIT')
+
+    def close(self):
+        self._connection.close()
+
+    @property
+    def total_size(self):
+        with self._transaction() as cursor:
+            return cursor.execute('SELECT size FROM content_io_cache_size').fetchone()[0]
+
+    def clear(self):
+        with self._transaction() as cursor:
+            cursor.execute('DELETE FROM content_io_cache')
+
+    def _get(self, key):
+        return self._get_many((key,)).get(key)
+
+    def _get_many(self, keys):
+        keys = list(keys)
+        now = time.time()
+        result = {}
+
+        with self._transaction() as cursor:
+            for i in range(0, len(keys), MAX_VARIABLES):
+                chunk = keys[i:i + MAX_VARIABLES]
+                query = ('SELECT key, value FROM content_io_cache WHERE key IN (%s) '
+                         'AND (expires_at IS NULL OR expires_at > ?)') % ', '.join('?' * len(chunk))
+                for key, value in cursor.execute(query, chunk + [now]):
+                    if not isinstance(value, six.text_type):
+                        value = bytes(value)
+                    result[key] = value
+
+        return result
+
+    def _set(self, key, value, timeout=None):
+        self._set_many({key: value}, timeout=timeout)
+
+    def _set_many(self, data, timeout=None):
+        now = time.time()
+        expires_at = None if timeout is None else now + timeout
+        rows = []
+        for key, value in six.iteritems(data):
+            size = len(value)
+            if isinstance(value, six.binary_type):
+                value = sqlite3.Binary(value)
+            rows.append((key, value, size, now, expires_at))
+
+        with self._transaction() as cursor:
+            cursor.executemany('INSERT OR REPLACE INTO content_io_cache (key, value, size, stored_at, expires_at) '
+                               'VALUES (?, ?, ?, ?, ?)', rows)
+            self._cull(cursor)
+
+    def _incr(self, key):
+        with self._transaction() as cursor:
+            value = self._select(cursor, key)
+            if value is not None:
+                value = six.text_type(int(value) + 1)
+                self._insert(cursor, key, value)
+        return value
+
+    def _add(self, key, value):
+        with self._transaction() as cursor:
+            if self._select(cursor, key) is not None:
+                return False
+            self._insert(cursor, key, value)
+        return True
+
+    def _select(self, cursor, key):
+        row = cursor.execute('SELECT value FROM content_io_cache WHERE key = ? '
+                             'AND (expires_at IS NULL OR expires_at > ?)', (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def _insert(self, cursor, key, value):
+        cursor.execute('INSERT OR REPLACE INTO content_io_cache (key, value, size, stored_at, expires_at) '
+                       'VALUES (?, ?, ?, ?, NULL)', (key, value, len(value), time.time()))
+
+    def _build_generation_key(self, scheme, namespace=None):
+        # Keep prefix of hashed generation keys, to exclude them from culling
+        return self.GENERATION_PREFIX + super(DiskCacheBackend, self)._build_generation_key(scheme, namespace)
+
+    def _cull(self, cursor):
+        """
+        Evict oldest entries, but generation counters, until total size is below cull ratio of max size
+        """
+        total_size = cursor.execute('SELECT size FROM content_io_cache_size').fetchone()[0]
+        if total_size <= self.max_size:
+            return
+
+        excess = total_size - int(self.max_size * self.cull_ratio)
+        keys = []
+        query = 'SELECT key, size FROM content_io_cache WHERE key NOT LIKE ? ORDER BY stored_at, rowid'
+        for key, size in cursor.execute(query, (self.GENERATION_PREFIX + '%',)):
+            keys.append(key)
+            excess -= size
+            if excess <= 0:
+                break
+
+        self._delete_keys(cursor, keys)
+
+    def _delete(self, key):
+        self._delete_many((key,))
+
+    def _delete_many(self, keys):
+        with self._transaction() as cursor:
+            self._delete_keys(cursor, list(keys))
+
+    def _delete_keys(self, cursor, keys):
+        for i in range(0, len(keys), MAX_VARIABLES):
+            chunk = keys[i:i + MAX_VARIABLES]
+            cursor.execute('DELETE FROM content_io_cache WHERE key IN (%s)' % ', '.join('?' * len(chunk)), chunk)
@@ -1,7 +1,10 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+import time
+
 import six
+from threading import Lock
 from ..base import CacheBackend
 
 
@@ -12,6 +15,8 @@ class LocMemCacheBackend(CacheBackend):
     def __init__(self, **config):
         super(LocMemCacheBackend, self).__init__(**config)
         self._cache = {}
+        self._expires = {}
+        self._lock = Lock()
         self.calls = 0
         self.hits = 0
         self.misses = 0
@@ -19,9 +24,24 @@ class LocMemCacheBackend(CacheBackend):
 
     def clear(self):
         self._cache.clear()
+        self._expires.clear()
+
+    def _lookup(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._cache.pop(key, None)
+            del self._expires[key]
+        return self._cache.get(key)
+
+    def _store(self, key, value, timeout):
+        self._cache[key] = value
+        if timeout is None:
+            self._expires.pop(key, None)
+        else:
+            self._expires[key] = time.time() + timeout
 
     def _get(self, key):
-        value = self._cache.get(key)
+        value = self._lookup(key)
         self.calls += 1
         if value is None:
             self.misses += 1
@@ -32,7 +52,7 @@ class LocMemCacheBackend(CacheBackend):
     def _get_many(self, keys):
         result = {}
         for key in keys:
-            value = self._cache.get(key)
+            value = self._lookup(key)
             if value is not None:
                 result[key] = value
                 self.hits += 1
@@ -41,20 +61,21 @@ class LocMemCacheBackend(CacheBackend):
         self.calls += 1
         return result
 
-    def _set(self, key, value):
-        self._cache[key] = value
+    def _set(self, key, value, timeout=None):
+        self._store(key, value, timeout)
         self.calls += 1
         self.sets += 1
 
-    def _set_many(self, data):
+    def _set_many(self, data, timeout=None):
         for key, value in six.iteritems(data):
-            self._cache[key] = value
+            self._store(key, value, timeout)
             self.sets += 1
         self.calls += 1
 
     def _delete(self, key):
         if key in self._cache:
             del self._cache[key]
+        self._expires.pop(key, None)
         self.calls += 1
 
     def _delete_many(self, keys):
@@ -62,3 +83,20 @@ class LocMemCacheBackend(CacheBackend):
             self._delete(key)
             self.calls -= 1  # Revert individual _delete call count
         self.calls += 1
+
+    def _incr(self, key):
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                value = six.text_type(int(value) + 1)
+                self._cache[key] = value
+        self.calls += 1
+        return value
+
+    def _add(self, key, value):
+        with self._lock:
+            added = self._lookup(key) is None
+            if added:
+                self._store(key, value, None)
+        self.calls += 1
+        return added
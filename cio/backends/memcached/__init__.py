@@ -0,0 +1,5 @@
+from .backend import MemcachedCacheBackend
+
+
+class Backend(MemcachedCacheBackend):
+    pass
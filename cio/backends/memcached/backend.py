@@ -0,0 +1,257 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import logging
+import math
+import socket
+import six
+from contextlib import contextmanager
+from threading import Lock
+from ..base import CacheBackend
+from ..serializers import BinarySerializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 11211
+
+FLAG_BYTES = 0
+FLAG_TEXT = 1
+
+
+class MemcachedError(Exception):
+    pass
+
+
+class Connection(object):
+    """
+    Memcached text protocol connection.
+    """
+
+    def __init__(self, address, timeout=None, connect_timeout=None):
+        self._socket = socket.create_connection(address, timeout=connect_timeout)
+        self._socket.settimeout(timeout)
+        self._buffer = b''
+
+    def close(self):
+        self._socket.close()
+
+    def send(self, data):
+        self._socket.sendall(data)
+
+    def _recv(self):
+        data = self._socket.recv(65536)
+        if not data:
+            raise MemcachedError('Connection closed by server')
+        self._buffer += data
+
+    def readline(self):
+        while True:
+            index = self._buffer.find(b'\r\n')
+            if index >= 0:
+                line, self._buffer = self._buffer[:index], self._buffer[index + 2:]
+                return line
+            self._recv()
+
+    def read(self, size):
+        while len(self._buffer) < size + 2:
+            self._recv()
+        data, self._buffer = self._buffer[:size], self._buffer[size + 2:]
+        return data
+
+
+class ConnectionPool(object):
+    """
+    Thread safe pool of idle connections, creating new ones on demand.
+    """
+
+    def __init__(self, factory, maxsize=10):
+        self._factory = factory
+        self.maxsize = maxsize
+        self._idle = []
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._idle)
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+
+        if connection is None:
+            connection = self._factory()
+
+        try:
+            yield connection
+        except Exception:
+            # Connection in unknown protocol state -> Discard
+            connection.close()
+            raise
+        else:
+            with self._lock:
+                if len(self._idle) < self.maxsize:
+                    self._idle.append(connection)
+                    connection = None
+            if connection is not None:
+                connection.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class MemcachedCacheBackend(CacheBackend):
+    """
+    Memcached backend speaking the text protocol over a pool of connections, i.e. memcached://127.0.0.1:11211
+
+    Config:
+        TIMEOUT: Socket read/write timeout in seconds, default 1
+        CONNECT_TIMEOUT: Socket connect timeout in seconds, default TIMEOUT
+        POOL_SIZE: Max number of idle pooled connections, default 10
+        MAX_KEYS: Max number of keys per multi-get command, default 100
+    """
+
+    scheme = 'memcached'
+    serializer_class = BinarySerializer
+
+    def __init__(self, **config):
+        super(MemcachedCacheBackend, self).__init__(**config)
+        host, _, port = (self.config.get('NAME') or '127.0.0.1').rpartition(':')
+        if not host:
+            host, port = port, DEFAULT_PORT
+        self.address = (host, int(port))
+        self.timeout = float(self.config.get('TIMEOUT', 1))
+        self.connect_timeout = float(self.config.get('CONNECT_TIMEOUT', self.timeout))
+        self.max_keys = int(self.config.get('MAX_KEYS', 100))
+        self.pool = ConnectionPool(self._connect, maxsize=int(self.config.get('POOL_SIZE', 10)))
+        self.fail_open = True
+
+    def _connect(self):
+        return Connection(self.address, timeout=self.timeout, connect_timeout=self.connect_timeout)
+
+    def _execute(self, command, call, default=None):
+        """
+        Execute call with a pooled connection, failing open with default value on connection or protocol errors,
+        unless fail_open is disabled, i.e. by a sharded backend handling errors.
+        """
+        try:
+            with self.pool.connection() as connection:
+                return call(connection)
+        except (socket.error, MemcachedError) as e:
+            if not self.fail_open:
+                raise
+            logger.warn('Memcached %s command failed on %s:%s; %s', command, self.address[0], self.address[1], e)
+            return default
+
+    def close(self):
+        self.pool.clear()
+
+    def clear(self):
+        def flush_all(connection):
+            connection.send(b'flush_all\r\n')
+            self._expect(connection, b'OK')
+
+        self._execute('flush_all', flush_all)
+
+    def _get(self, key):
+        return self._get_many((key,)).get(key)
+
+    def _get_many(self, keys):
+        keys = list(keys)
+
+        def get(connection):
+            result = {}
+
+            # Pipeline all multi-get chunks before reading responses
+            chunks = [keys[i:i + self.max_keys] for i in range(0, len(keys), self.max_keys)]
+            connection.send(b''.join(b'get ' + self._encode_keys(chunk) + b'\r\n' for chunk in chunks))
+
+            for _ in chunks:
+                while True:
+                    line = connection.readline()
+                    if line == b'END':
+                        break
+                    elif not line.startswith(b'VALUE '):
+                        raise MemcachedError(line.decode('utf-8', 'replace'))
+                    _, key, flags, size = line.split(b' ')[:4]
+                    value = connection.read(int(size))
+                    if int(flags) == FLAG_TEXT:
+                        value = value.decode('utf-8')
+                    result[key.decode('ascii')] = value
+
+            return result
+
+        if not keys:
+            return {}
+
+        return self._execute('get', get, default={})
+
+    def _set(self, key, value, timeout=None):
+        self._set_many({key: value}, timeout=timeout)
+
+    def _set_many(self, data, timeout=None):
+        # Memcached treats exptime 0 as never, so round short timeouts up to a second
+        exptime = 0 if timeout is None else max(1, int(math.ceil(timeout)))
+
+        def set(connection):
+            commands = []
+            for key, value in six.iteritems(data):
+                flags = FLAG_BYTES
+                if isinstance(value, six.text_type):
+                    flags = FLAG_TEXT
+                    value = value.encode('utf-8')
+                header = 'set %s %d %d %d\r\n' % (key, flags, exptime, len(value))
+                commands.append(header.encode('ascii') + value + b'\r\n')
+            connection.send(b''.join(commands))
+
+            for _ in commands:
+                self._expect(connection, b'STORED')
+
+        if data:
+            self._execute('set', set)
+
+    def _delete(self, key):
+        self._delete_many((key,))
+
+    def _delete_many(self, keys):
+        keys = list(keys)
+
+        def delete(connection):
+            connection.send(b''.join(b'delete ' + self._encode_keys((key,)) + b'\r\n' for key in keys))
+            for _ in keys:
+                self._expect(connection, b'DELETED', b'NOT_FOUND')
+
+        if keys:
+            self._execute('delete', delete)
+
+    def _incr(self, key):
+        def incr(connection):
+            connection.send(b'incr ' + self._encode_keys((key,)) + b' 1\r\n')
+            line = connection.readline()
+            if line == b'NOT_FOUND':
+                return None
+            elif not line.isdigit():
+                raise MemcachedError(line.decode('utf-8', 'replace'))
+            return line.decode('ascii')
+
+        return self._execute('incr', incr)
+
+    def _add(self, key, value):
+        def add(connection):
+            data = value.encode('utf-8')
+            header = 'add %s %d 0 %d\r\n' % (key, FLAG_TEXT, len(data))
+            connection.send(header.encode('ascii') + data + b'\r\n')
+            return self._expect(connection, b'STORED', b'NOT_STORED') == b'STORED'
+
+        return self._execute('add', add, default=False)
+
+    def _encode_keys(self, keys):
+        return ' '.join(keys).encode('ascii')
+
+    def _expect(self, connection, *replies):
+        line = connection.readline()
+        if line not in replies:
+            raise MemcachedError(line.decode('utf-8', 'replace'))
+        return line
@@ -0,0 +1,99 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import struct
+import zlib
+import six
+
+
+class BaseSerializer(object):
+
+    def __init__(self, **options):
+        self.options = options
+
+    def dumps(self, uri, content):
+        """
+        Encode node uri and content to a value the cache backend is able to persist.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def loads(self, value):
+        """
+        Decode cached value to uri and unicode content tuple.
+        Return (None, None) for values not decodable by this serializer, i.e. treated as cache miss.
+        """
+        raise NotImplementedError  # pragma: no cover
+
+
+class TupleSerializer(BaseSerializer):
+    """
+    Keeps node as a python (uri, content) tuple, suitable for in-process caches only.
+    """
+
+    def dumps(self, uri, content):
+        return uri, content
+
+    def loads(self, value):
+        uri, content = value
+        return uri, content
+
+
+class BinarySerializer(BaseSerializer):
+    """
+    Compact binary framing of node uri and content:
+        version (1 byte) | flags (1 byte) | uri length (4 bytes) | uri (utf-8) | content (utf-8, maybe zlib compressed)
+
+    Options:
+        COMPRESS_THRESHOLD: Compress content larger than given number of bytes, default None (off)
+        COMPRESS_LEVEL: zlib compression level, default 6
+    """
+
+    VERSION = 1
+
+    FLAG_NONE = 1
+    FLAG_COMPRESSED = 2
+
+    HEADER = struct.Struct('>BBI')
+
+    def __init__(self, **options):
+        super(BinarySerializer, self).__init__(**options)
+        threshold = options.get('COMPRESS_THRESHOLD')
+        self.compress_threshold = int(threshold) if threshold is not None else None
+        self.compress_level = int(options.get('COMPRESS_LEVEL', 6))
+
+    def dumps(self, uri, content):
+        flags = 0
+        uri = uri.encode('utf-8')
+
+        if content is None:
+            flags |= self.FLAG_NONE
+            content = b''
+        else:
+            content = content.encode('utf-8')
+            if self.compress_threshold is not None and len(content) > self.compress_threshold:
+                flags |= self.FLAG_COMPRESSED
+                content = zlib.compress(content, self.compress_level)
+
+        return self.HEADER.pack(self.VERSION, flags, len(uri)) + uri + content
+
+    def loads(self, value):
+        if not isinstance(value, six.binary_type) or len(value) < self.HEADER.size:
+            return None, None
+
+        version, flags, uri_length = self.HEADER.unpack_from(value)
+        if version != self.VERSION:
+            # Written by another format version, i.e. during rolling deploy -> Treat as miss
+            return None, None
+
+        offset = self.HEADER.size
+        uri = value[offset:offset + uri_length].decode('utf-8')
+
+        if flags & self.FLAG_NONE:
+            content = None
+        else:
+            content = value[offset + uri_length:]
+            if flags & self.FLAG_COMPRESSED:
+                content = zlib.decompress(content)
+            content = content.decode('utf-8')
+
+        return uri, content
@@ -0,0 +1,5 @@
+from .backend import ShardedCacheBackend
+
+
+class Backend(ShardedCacheBackend):
+    pass
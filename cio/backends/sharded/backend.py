@@ -0,0 +1,232 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import logging
+import six
+import time
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
+from threading import Lock
+from .ring import HashRing
+from .. import get_backend
+from ..base import CacheBackend
+from ..serializers import BinarySerializer
+from ...conf.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+
+class ShardedCacheBackend(CacheBackend):
+    """
+    Spreads cache keys over several cache backends using a consistent hash ring, i.e.
+
+        CACHE = {
+            'BACKEND': 'sharded://',
+            'SERVERS': [
+                'memcached://10.0.0.1:11211',
+                {'BACKEND': 'memcached://10.0.0.2:11211', 'WEIGHT': 2},
+            ]
+        }
+
+    Multi-key calls are split per shard and run concurrently when more than one shard is involved.
+
+    Failing shards are handled as cache misses. After MAX_FAILURES consecutive errors a server
+    is ejected from the ring, remapping its keys to remaining servers, and retried after RETRY_TIMEOUT.
+    A retried server is flushed before taking back its keys, since it missed deletes while ejected.
+
+    Config:
+        SERVERS: List of cache backend configs, with optional WEIGHT
+        CONCURRENT: Run shards concurrently, default True
+        MAX_FAILURES: Consecutive errors before ejecting a server, default 3
+        RETRY_TIMEOUT: Seconds before retrying an ejected server, default 30
+    """
+
+    scheme = 'sharded'
+    serializer_class = BinarySerializer
+
+    def __init__(self, **config):
+        super(ShardedCacheBackend, self).__init__(**config)
+        servers = self.config.get('SERVERS')
+        if not servers:
+            raise ImproperlyConfigured('Missing sharded cache SERVERS.')
+
+        self.max_failures = int(self.config.get('MAX_FAILURES', 3))
+        self.retry_timeout = float(self.config.get('RETRY_TIMEOUT', 30))
+        self._failures = {}
+        self._ejected = {}
+        self._lock = Lock()
+
+        self.shards = {}
+        self.ring = HashRing()
+        for server in servers:
+            self.add_server(server)
+
+        self.concurrent = self._get_config_flag('CONCURRENT', True)
+        self._pool = None
+        self._pool_lock = Lock()
+
+    def add_server(self, server):
+        weight = 1
+        if isinstance(server, dict):
+            server = dict(server)
+            weight = server.pop('WEIGHT', 1)
+            name = server.get('NAME') or server['BACKEND']
+        else:
+            name = server
+
+        shard = get_backend(server)
+        # Let shard errors through to be counted, instead of failing open within shard
+        if hasattr(shard, 'fail_open'):
+            shard.fail_open = False
+
+        self.shards[name] = shard
+        self.ring.add(name, weight)
+        return name
+
+    def remove_server(self, name):
+        """
+        Take server out of rotation, remapping its slice of keys to remaining servers.
+        """
+        with self._lock:
+            self._failures.pop(name, None)
+            self._ejected.pop(name, None)
+            if name in self.ring:
+                self.ring.remove(name)
+        return self.shards.pop(name)
+
+    def get_shard(self, key):
+        return self.shards[self.ring.get(key)]
+
+    def close(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            pool.join()
+        for shard in self.shards.values():
+            shard.close()
+
+    def clear(self):
+        self._map(lambda shard, _: shard.clear(), dict((name, None) for name in self.shards))
+
+    def _route(self, key):
+        """
+        Return name of server owning key, or None if all servers are ejected
+        """
+        if self._ejected:
+            self._revive()
+        return self.ring.get(key)
+
+    def _revive(self):
+        """
+        Put ejected servers due for retry back in rotation, to be ejected again on next error.
+        Revived servers are flushed first, dropping entries deleted or invalidated while ejected.
+        """
+        now = time.time()
+        with self._lock:
+            due = [(name, weight) for name, (weight, retry_at) in six.iteritems(self._ejected) if retry_at <= now]
+            for name, weight in due:
+                # Postpone next retry, keeping other threads from reviving server while flushed
+                self._ejected[name] = (weight, now + self.retry_timeout)
+
+        for name, weight in due:
+            try:
+                self.shards[name].clear()
+            except Exception as e:
+                logger.warn('Cache shard %s failed to flush on revival; %s', name, e)
+                continue
+
+            with self._lock:
+                if self._ejected.pop(name, None) is not None:
+                    self._failures[name] = self.max_failures - 1
+                    self.ring.add(name, weight)
+
+    def _call(self, name, call, args, default=None):
+        """
+        Call given function for shard, counting errors and ejecting failing server
+        """
+        try:
+            result = call(self.shards[name], args)
+        except Exception as e:
+            logger.warn('Cache shard %s failed; %s', name, e)
+            with self._lock:
+                failures = self._failures[name] = self._failures.get(name, 0) + 1
+                if failures >= self.max_failures and name in self.ring:
+                    logger.warn('Ejecting cache shard %s after %d consecutive errors', name, failures)
+                    self._ejected[name] = (self.ring.nodes[name], time.time() + self.retry_timeout)
+                    self.ring.remove(name)
+            return default
+        else:
+            if name in self._failures:
+                with self._lock:
+                    self._failures.pop(name, None)
+            return result
+
+    def _split(self, keys):
+        shard_keys = defaultdict(list)
+        for key in keys:
+            name = self._route(key)
+            if name is not None:
+                shard_keys[name].append(key)
+        return shard_keys
+
+    def _map(self, call, shard_args, default=None):
+        """
+        Call given function for each shard and argument, concurrently if more than one shard.
+        """
+        if len(shard_args) <= 1 or not self.concurrent:
+            return [self._call(name, call, args, default) for name, args in six.iteritems(shard_args)]
+
+        return self.pool.map(lambda item: self._call(item[0], call, item[1], default), list(six.iteritems(shard_args)))
+
+    @property
+    def pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPool(len(self.shards))
+            return self._pool
+
+    def _get(self, key):
+        name = self._route(key)
+        if name is not None:
+            return self._call(name, lambda shard, key: shard._get(key), key)
+
+    def _get_many(self, keys):
+        result = {}
+        for shard_result in self._map(lambda shard, keys: shard._get_many(keys), self._split(keys), default={}):
+            result.update(shard_result)
+        return result
+
+    def _set(self, key, value, timeout=None):
+        options = {} if timeout is None else {'timeout': timeout}
+        name = self._route(key)
+        if name is not None:
+            self._call(name, lambda shard, key: shard._set(key, value, **options), key)
+
+    def _set_many(self, data, timeout=None):
+        options = {} if timeout is None else {'timeout': timeout}
+        shard_data = defaultdict(dict)
+        for key, value in six.iteritems(data):
+            name = self._route(key)
+            if name is not None:
+                shard_data[name][key] = value
+        self._map(lambda shard, data: shard._set_many(data, **options), shard_data)
+
+    def _delete(self, key):
+        name = self._route(key)
+        if name is not None:
+            self._call(name, lambda shard, key: shard._delete(key), key)
+
+    def _delete_many(self, keys):
+        self._map(lambda shard, keys: shard._delete_many(keys), self._split(keys))
+
+    def _incr(self, key):
+        name = self._route(key)
+        if name is not None:
+            return self._call(name, lambda shard, key: shard._incr(key), key)
+
+    def _add(self, key, value):
+        name = self._route(key)
+        if name is not None:
+            return self._call(name, lambda shard, key: shard._add(key, value), key, default=False)
+        return False
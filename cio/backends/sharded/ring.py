@@ -0,0 +1,64 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import struct
+from bisect import bisect, insort
+from hashlib import md5
+
+
+class HashRing(object):
+    """
+    Ketama style consistent hash ring, mapping keys to weighted nodes.
+    Removing a node only remaps keys previously owned by that node.
+    """
+
+    POINTS_PER_WEIGHT = 160
+
+    def __init__(self, nodes=None):
+        self._points = []
+        self._nodes = {}
+        for node, weight in (nodes or {}).items():
+            self.add(node, weight)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, node):
+        return node in self._nodes
+
+    @property
+    def nodes(self):
+        return dict(self._nodes)
+
+    def add(self, node, weight=1):
+        if node in self._nodes:
+            self.remove(node)
+
+        self._nodes[node] = weight
+
+        # Each md5 digest gives four 32 bit points on the ring
+        for i in range(int(self.POINTS_PER_WEIGHT * weight) // 4):
+            digest = md5(('%s-%d' % (node, i)).encode('utf-8')).digest()
+            for point in struct.unpack('<4I', digest):
+                insort(self._points, (point, node))
+
+    def remove(self, node):
+        self._nodes.pop(node)
+        self._points = [point for point in self._points if point[1] != node]
+
+    def get(self, key):
+        """
+        Return node owning given key, or None if ring is empty.
+        """
+        if not self._points:
+            return None
+
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        point = struct.unpack('<I', md5(key).digest()[:4])[0]
+
+        index = bisect(self._points, (point, ''))
+        if index == len(self._points):
+            index = 0
+
+        return self._points[index][1]
@@ -0,0 +1,5 @@
+from .backend import SharedMemoryCacheBackend
+
+
+class Backend(SharedMemoryCacheBackend):
+    pass
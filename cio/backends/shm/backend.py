@@ -0,0 +1,325 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import fcntl
+import math
+import mmap
+import os
+import struct
+import time
+import six
+from contextlib import contextmanager
+from hashlib import md5
+from threading import Lock
+from ..base import CacheBackend
+from ..serializers import BinarySerializer
+from ...conf.exceptions import ImproperlyConfigured
+
+MAGIC = b'CIOSHM03'
+
+# magic, slots, arena size, arena tail, epoch, used slot count, deleted slot count
+HEADER = struct.Struct('<8sIIIIII')
+HEADER_SIZE = 64
+TAIL_OFFSET = 16
+EPOCH_OFFSET = 20
+COUNT_OFFSET = 24
+DELETED_OFFSET = 28
+
+# seq, state, key hash, arena offset, key length, padding, value length, value flags, expiry timestamp (0 = never)
+SLOT = struct.Struct('<IIQIHHIII')
+SEQ = struct.Struct('<I')
+
+EMPTY = 0
+USED = 1
+DELETED = 2
+
+FLAG_BYTES = 0
+FLAG_TEXT = 1
+
+MAX_LOAD = 0.75
+MAX_READ_RETRIES = 10
+
+
+class SharedMemoryCacheBackend(CacheBackend):
+    """
+    Cache shared by all processes on a host through a memory mapped file, i.e. shm:///dev/shm/content-io
+
+    The file holds a fixed size open addressing slot table and a value arena.
+    Reads are lock free, using per slot sequence locks, while writes are serialized by a file lock,
+    taken on a file descriptor opened per process.
+    When the arena or table is full, the whole cache is flushed and refilled.
+
+    The first process, i.e. the pre-fork master, creates the file and workers attach to it.
+
+    Config:
+        NAME: Path to shared file, preferably on tmpfs
+        SLOTS: Number of table slots, rounded up to power of two, default 16384
+        SIZE: Value arena size in bytes, default 32MB
+    """
+
+    scheme = 'shm'
+    serializer_class = BinarySerializer
+
+    def __init__(self, **config):
+        super(SharedMemoryCacheBackend, self).__init__(**config)
+        if not self.config.get('NAME'):
+            raise ImproperlyConfigured('Missing shared memory cache file name.')
+
+        self.path = self.config['NAME']
+        slots = int(self.config.get('SLOTS', 16384))
+        self.slots = 1 << max(slots - 1, 1).bit_length()
+        self.arena_size = int(self.config.get('SIZE', 32 * 1024 * 1024))
+        self.table_offset = HEADER_SIZE
+        self.arena_offset = self.table_offset + self.slots * SLOT.size
+        self.size = self.arena_offset + self.arena_size
+
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._pid = None
+        self._lock_fd = None
+        with self._write_lock():
+            self._attach()
+
+    def _attach(self):
+        """
+        Map shared file, (re)initializing it if new or created with other geometry
+        """
+        initialize = os.fstat(self._fd).st_size != self.size
+        if initialize:
+            os.ftruncate(self._fd, self.size)
+
+        self._mm = mmap.mmap(self._fd, self.size)
+        magic, slots, arena_size = HEADER.unpack_from(self._mm, 0)[:3]
+        if initialize or (magic, slots, arena_size) != (MAGIC, self.slots, self.arena_size):
+            self._mm[:self.arena_offset] = b'\0' * self.arena_offset
+            HEADER.pack_into(self._mm, 0, MAGIC, self.slots, self.arena_size, 0, 0, 0, 0)
+
+    def close(self):
+        self._mm.close()
+        os.close(self._fd)
+        if self._pid == os.getpid():
+            os.close(self._lock_fd)
+        self._pid = self._lock_fd = None
+
+    def _get_lock(self):
+        """
+        Return thread lock and file descriptor to flock, (re)opened per process,
+        since a descriptor inherited over fork shares its lock with the parent.
+        """
+        pid = os.getpid()
+        if self._pid != pid:
+            self._lock = Lock()
+            self._lock_fd = os.open(self.path, os.O_RDWR)
+            self._pid = pid
+        return self._lock, self._lock_fd
+
+    @contextmanager
+    def _write_lock(self):
+        lock, fd = self._get_lock()
+        with lock:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _read_int(self, offset):
+        return SEQ.unpack_from(self._mm, offset)[0]
+
+    def _write_int(self, offset, value):
+        SEQ.pack_into(self._mm, offset, value)
+
+    def _hash(self, key):
+        return struct.unpack_from('<Q', md5(key).digest())[0]
+
+    def _slot_offset(self, index):
+        return self.table_offset + index * SLOT.size
+
+    def _probe(self, key_hash):
+        mask = self.slots - 1
+        index = key_hash & mask
+        for _ in range(self.slots):
+            yield index
+            index = (index + 1) & mask
+
+    def _read_slot(self, index, key, key_hash):
+        """
+        Read value of slot if holding key, retrying while slot is concurrently written.
+        Returns tuple of state and value.
+        """
+        offset = self._slot_offset(index)
+        for _ in range(MAX_READ_RETRIES):
+            seq, state, slot_hash, data_offset, key_length, _, value_length, flags, expires = SLOT.unpack_from(
+                self._mm, offset
+            )
+            if seq & 1:
+                continue  # Write in progress
+
+            value = None
+            if state == USED and slot_hash == key_hash and not (expires and expires <= time.time()):
+                start = self.arena_offset + data_offset
+                data = self._mm[start:start + key_length + value_length]
+                if data[:key_length] == key:
+                    value = data[key_length:]
+                    if flags == FLAG_TEXT:
+                        value = value.decode('utf-8')
+
+            if self._read_int(offset) == seq:
+                return state, value
+
+        return None, None
+
+    def _lookup(self, key):
+        key_hash = self._hash(key)
+        for index in self._probe(key_hash):
+            state, value = self._read_slot(index, key, key_hash)
+            if state is None or state == EMPTY:
+                return None
+            elif value is not None:
+                return value
+
+    def _get(self, key):
+        key = key.encode('utf-8')
+        for _ in range(MAX_READ_RETRIES):
+            epoch = self._read_int(EPOCH_OFFSET)
+            value = self._lookup(key)
+            if self._read_int(EPOCH_OFFSET) == epoch:
+                return value
+
+    def _get_many(self, keys):
+        result = {}
+        for key in keys:
+            value = self._get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    def _write_slot(self, index, state, key_hash=0, data_offset=0, key_length=0, value_length=0, flags=0, expires=0):
+        offset = self._slot_offset(index)
+        seq = self._read_int(offset)
+        self._write_int(offset, seq + 1)
+        SLOT.pack_into(
+            self._mm, offset, seq + 1, state, key_hash, data_offset, key_length, 0, value_length, flags, expires
+        )
+        self._write_int(offset, seq + 2)
+
+    def _find_slot(self, key, key_hash):
+        """
+        Return index of slot holding key, or first free slot, and whether key was found
+        """
+        free = None
+        for index in self._probe(key_hash):
+            state, slot_hash, data_offset, key_length = SLOT.unpack_from(self._mm, self._slot_offset(index))[1:5]
+            if state == EMPTY:
+                return (index if free is None else free), False
+            elif state == DELETED:
+                if free is None:
+                    free = index
+            elif slot_hash == key_hash:
+                start = self.arena_offset + data_offset
+                if self._mm[start:start + key_length] == key:
+                    return index, True
+        return free, False
+
+    def _store(self, key, value, expires=0):
+        flags = FLAG_BYTES
+        if isinstance(value, six.text_type):
+            flags = FLAG_TEXT
+            value = value.encode('utf-8')
+
+        key = key.encode('utf-8')
+        size = len(key) + len(value)
+        if size > self.arena_size:
+            # Too large to cache, but never leave previous value to be served
+            self._remove(key)
+            return
+
+        tail = self._read_int(TAIL_OFFSET)
+        count = self._read_int(COUNT_OFFSET)
+        deleted = self._read_int(DELETED_OFFSET)
+        if tail + size > self.arena_size or count + deleted + 1 > self.slots * MAX_LOAD:
+            self._reset()
+            tail = count = deleted = 0
+
+        key_hash = self._hash(key)
+        index, found = self._find_slot(key, key_hash)
+        if index is None:
+            return
+
+        reused = not found and SLOT.unpack_from(self._mm, self._slot_offset(index))[1] == DELETED
+        start = self.arena_offset + tail
+        self._mm[start:start + size] = key + value
+        self._write_slot(index, USED, key_hash, tail, len(key), len(value), flags, expires)
+        self._write_int(TAIL_OFFSET, tail + size)
+        if not found:
+            self._write_int(COUNT_OFFSET, count + 1)
+        if reused:
+            self._write_int(DELETED_OFFSET, deleted - 1)
+
+    def _remove(self, key):
+        """
+        Tombstone slot holding key, if any
+        """
+        index, found = self._find_slot(key, self._hash(key))
+        if found:
+            self._write_slot(index, DELETED)
+            self._write_int(COUNT_OFFSET, self._read_int(COUNT_OFFSET) - 1)
+            self._write_int(DELETED_OFFSET, self._read_int(DELETED_OFFSET) + 1)
+
+    def _reset(self):
+        self._write_int(EPOCH_OFFSET, self._read_int(EPOCH_OFFSET) + 1)
+        for index in range(self.slots):
+            offset = self._slot_offset(index)
+            if SLOT.unpack_from(self._mm, offset)[1] != EMPTY:
+                self._write_slot(index, EMPTY)
+        self._write_int(TAIL_OFFSET, 0)
+        self._write_int(COUNT_OFFSET, 0)
+        self._write_int(DELETED_OFFSET, 0)
+
+    def _set(self, key, value, timeout=None):
+        self._set_many({key: value}, timeout=timeout)
+
+    def _set_many(self, data, timeout=None):
+        expires = 0 if timeout is None else int(math.ceil(time.time() + timeout))
+        with self._write_lock():
+            for key, value in six.iteritems(data):
+                self._store(key, value, expires)
+
+    def _delete(self, key):
+        self._delete_many((key,))
+
+    def _delete_many(self, keys):
+        with self._write_lock():
+            for key in keys:
+                self._remove(key.encode('utf-8'))
+
+    def _incr(self, key):
+        with self._write_lock():
+            value = self._lookup(key.encode('utf-8'))
+            if value is not None:
+                value = six.text_type(int(value) + 1)
+                self._store(key, value)
+        return value
+
+    def _add(self, key, value):
+        with self._write_lock():
+            if self._lookup(key.encode('utf-8')) is not None:
+                return False
+            self._store(key, value)
+        return True
+
+    def clear(self):
+        with self._write_lock():
+            self._reset()
+
+    def stats(self):
+        """
+        Return table and arena usage
+        """
+        return {
+            'slots': self.slots,
+            'count': self._read_int(COUNT_OFFSET),
+            'deleted': self._read_int(DELETED_OFFSET),
+            'size': self.arena_size,
+            'used': self._read_int(TAIL_OFFSET),
+            'epoch': self._read_int(EPOCH_OFFSET),
+        }
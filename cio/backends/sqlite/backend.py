@@ -3,12 +3,16 @@ from __future__ import unicode_literals
 
 import six
 import sqlite3
+from collections import defaultdict
 from sqlite3 import IntegrityError
 from ..exceptions import NodeDoesNotExist, PersistenceError
 from ...backends.base import DatabaseBackend
 from ...conf.exceptions import ImproperlyConfigured
 from ...utils.uri import URI
 
+# Max number of sql variables per statement
+MAX_VARIABLES = 500
+
 
 class SqliteBackend(DatabaseBackend):
 
@@ -20,6 +24,7 @@ class SqliteBackend(DatabaseBackend):
             raise ImproperlyConfigured('Missing sqlite database name.')
         database = self.config['NAME']
         kwargs = self.config.get('OPTIONS', {})
+        self.thread_safe = not kwargs.get('check_same_thread', True)
         self._connection = sqlite3.connect(database, **kwargs)
         self._setup()
 
@@ -94,6 +99,36 @@ class SqliteBackend(DatabaseBackend):
 
         return self._serialize(uri, node)
 
+    def get_fallbacks(self, fallback_uris):
+        """
+        Get all fallback levels at once, with one query per distinct extension and version.
+        """
+        nodes = {}
+        rows = {}
+        groups = defaultdict(set)
+
+        for uris in fallback_uris.values():
+            for uri in uris:
+                groups[(uri.ext, uri.version)].add(uri)
+
+        for (ext, version), uris in six.iteritems(groups):
+            # Uris differing only by query share key
+            keys = defaultdict(list)
+            for uri in uris:
+                keys[self._build_key(uri)].append(uri)
+            for node in self._select_many(keys.keys(), ext, version):
+                for uri in keys[node['key']]:
+                    rows.setdefault(uri, node)
+
+        # Pick first found fallback per requested uri
+        for requested_uri, uris in six.iteritems(fallback_uris):
+            for uri in uris:
+                if uri in rows:
+                    nodes[requested_uri] = self._serialize(uri, rows[uri])
+                    break
+
+        return nodes
+
     def get_revisions(self, uri):
         key = self._build_key(uri)
         nodes = self._call_select('plugin, version, is_published FROM content_io_node WHERE key=:key', key=key)
@@ -142,6 +177,31 @@ class SqliteBackend(DatabaseBackend):
         else:
             return dict((c, v) for c, v in six.moves.zip(columns, node))
 
+    def _select_many(self, keys, ext=None, version=None):
+        columns = ('id', 'key', 'content', 'plugin', 'version', 'is_published', 'meta')
+        keys = list(keys)
+        nodes = []
+
+        for i in range(0, len(keys), MAX_VARIABLES):
+            chunk = keys[i:i + MAX_VARIABLES]
+            params = dict(('key%d' % j, key) for j, key in enumerate(chunk))
+            statements = ['key IN (%s)' % ', '.join(':key%d' % j for j in range(len(chunk)))]
+
+            if ext:
+                statements.append('plugin=:plugin')
+                params['plugin'] = ext
+            if version:
+                statements.append('version=:version')
+                params['version'] = version
+            else:
+                statements.append('is_published=1')
+
+            query = ', '.join(columns) + ' FROM content_io_node WHERE ' + ' AND '.join(statements)
+            result = self._call_select(query, **params)
+            nodes.extend(dict(six.moves.zip(columns, node)) for node in result.fetchall())
+
+        return nodes
+
     def _create(self, uri, content, **meta):
         node = {
             'key': self._build_key(uri),
@@ -6,24 +6,65 @@ import six
 from contextlib import contextmanager
 from types import ModuleType
 from . import default_settings
-from ..utils.thread import ThreadLocalObject
+from .exceptions import ImproperlyConfigured
+from ..utils.thread import ContextLocalObject, ThreadLocalObject
 
 logger = logging.getLogger(__name__)
 
 
-class LocalSettings(ThreadLocalObject):
+class SettingsSnapshot(object):
+    """
+    Immutable copy of settings with attribute access, for hot paths.
+    Nested dicts are shared with the settings, and not copied.
+    """
+
+    def __init__(self, settings):
+        self.__dict__.update(settings)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Settings snapshot is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('Settings snapshot is immutable')
+
+    def __getitem__(self, key):
+        try:
+            return self.__dict__[key]
+        except KeyError:
+            raise KeyError(key)
+
+
+class LocalSettings(object):
+    """
+    Settings local to each thread, or asyncio task, on top of base settings, see Settings.override.
+    """
 
     def __init__(self, base):
         super(LocalSettings, self).__init__()
         self._base = base
         self._local = {}
+        self._snapshot = None
 
     def __contains__(self, key):
         return key in self._local
 
+    def __len__(self):
+        return len(self._local)
+
     def get(self, var):
         return self._local[var]
 
+    def snapshot(self):
+        """
+        Return snapshot of base settings with thread local settings applied, kept until either changes.
+        """
+        version = self._base._version
+        if self._snapshot is None or self._snapshot[0] != version:
+            merged = dict(self._base)
+            merged.update(self._local)
+            self._snapshot = (version, SettingsSnapshot(merged))
+        return self._snapshot[1]
+
     def set(self, **vars):
         def deepupdate(original, update):
             for key, value in six.iteritems(original):
@@ -41,22 +82,81 @@ class LocalSettings(ThreadLocalObject):
 
             self._local[setting] = value
 
+        self._snapshot = None
+
+    def push(self, **vars):
+        """
+        Set thread local settings, returning previous ones to be restored
+        """
+        previous = dict(self._local)
+        self.set(**vars)
+        return previous
+
+    def restore(self, previous):
+        self._local = previous
+        self._snapshot = None
+
+
+class ThreadLocalSettings(LocalSettings, ThreadLocalObject):
+    pass
+
+
+class ContextLocalSettings(LocalSettings, ContextLocalObject):
+    # Tasks and executor threads start with local settings of the task spawning them
+    context_inherit = ('_local',)
+
 
 class Settings(dict):
 
     def __init__(self, conf=None, **settings):
         super(Settings, self).__init__()
-        self._listeners = set()
-        self._local = LocalSettings(self)
+        self._listeners = {}
+        self._frozen = set()
+        self._local = None
+        self._version = 0
+        self._snapshot = None
         self.configure(conf=conf, **settings)
 
     @contextmanager
     def __call__(self, **settings):
         state = self.deepcopy()
         self.configure(**settings)
-        yield
-        self.clear()
-        self.update(state)
+        try:
+            yield
+        finally:
+            keys = set(self) | set(state)
+            changed = set(key for key in keys if key not in state or self._is_changed(key, state[key]))
+            self.clear()
+            self.update(state)
+            self._notify(changed)
+
+    @contextmanager
+    def override(self, **settings):
+        """
+        Lightweight thread, or asyncio task, local settings scope, i.e. per request or tenant,
+        local storage selected by settings.LOCAL_STORAGE.
+
+        Listeners are not notified, hence backends, pipes and plugins are not reloaded,
+        only settings read on use are affected, like plugin, cache pipe and uri settings.
+        """
+        local = self._get_local()
+        previous = local.push(**settings)
+        try:
+            yield
+        finally:
+            local.restore(previous)
+
+    def _get_local(self):
+        """
+        Return local settings, created on first use to respect a configured settings.LOCAL_STORAGE.
+        """
+        if self._local is None:
+            from ..utils.thread import get_local_object_class
+            if get_local_object_class() is ContextLocalObject:
+                self._local = ContextLocalSettings(self)
+            else:
+                self._local = ThreadLocalSettings(self)
+        return self._local
 
     def deepcopy(self):
         copy = {}
@@ -73,28 +173,105 @@ class Settings(dict):
             conf = conf.__dict__
 
         if local:
-            self._local.set(**conf or settings)
+            self._get_local().set(**conf or settings)
 
         else:
+            for setting in self._frozen:
+                if setting in (conf or settings) and self._is_changed(setting, (conf or settings)[setting]):
+                    raise ImproperlyConfigured('Setting %s can not be changed after content-io is imported.' % setting)
+
+            changed = set()
             for setting, value in six.iteritems(conf or settings):
                 if setting.isupper():
+                    if self._is_changed(setting, value):
+                        changed.add(setting)
                     self[setting] = value
 
-            for callback in self._listeners:
-                try:
-                    callback()
-                except Exception as e:
-                    logger.warn('Failed to notify callback about new settings; %s', e)
+            self._notify(changed)
+
+    def watch(self, callback, keys=None):
+        """
+        Call given callback when settings are configured,
+        or only when any of given setting keys has changed.
+        """
+        self._listeners[callback] = frozenset(keys) if keys is not None else None
+
+    def unwatch(self, callback):
+        """
+        Stop calling given callback when settings are configured.
+        """
+        self._listeners.pop(callback, None)
+
+    def freeze(self, key):
+        """
+        Raise ImproperlyConfigured when given setting is configured to a new value,
+        i.e. for settings only read once at import.
+        """
+        self._frozen.add(key)
+
+    def _is_changed(self, key, value):
+        if key not in self:
+            return True
+        current = super(Settings, self).__getitem__(key)
+        # Same mutable instance is probably updated in place
+        return current is value and isinstance(value, (dict, list)) or current != value
+
+    def _notify(self, changed):
+        for callback, keys in list(self._listeners.items()):
+            if keys is not None and keys.isdisjoint(changed):
+                continue
+            try:
+                callback()
+            except Exception as e:
+                logger.warn('Failed to notify callback about new settings; %s', e)
+
+    @property
+    def overridden(self):
+        """
+        True if local settings are configured for current thread, or asyncio task
+        """
+        return bool(self._local)
+
+    @property
+    def snapshot(self):
+        """
+        Immutable snapshot of settings, with thread local settings applied if any,
+        giving attribute speed access for hot paths. Rebuilt on first access after settings change.
+        """
+        if self._local:
+            return self._local.snapshot()
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self._snapshot = SettingsSnapshot(self)
+        return snapshot
+
+    def _invalidate(self):
+        self._version += 1
+        self._snapshot = None
+
+    def __setitem__(self, key, value):
+        super(Settings, self).__setitem__(key, value)
+        self._invalidate()
+
+    def __delitem__(self, key):
+        super(Settings, self).__delitem__(key)
+        self._invalidate()
+
+    def update(self, *args, **kwargs):
+        super(Settings, self).update(*args, **kwargs)
+        self._invalidate()
 
-    def watch(self, callback):
-        self._listeners.add(callback)
+    def clear(self):
+        super(Settings, self).clear()
+        self._invalidate()
 
     def __getitem__(self, key):
         """
         First try environment specific setting, then this config
         """
-        if key in self._local:
-            return self._local.get(key)
+        local = self._local
+        if local is not None and key in local:
+            return local.get(key)
 
         return super(Settings, self).__getitem__(key)
 
@@ -20,6 +20,35 @@ PIPELINE = [
     'cio.pipeline.pipes.storage.NamespaceFallbackPipe'
 ]
 
+# Per thread history of nodes sent through pipeline, see cio.pipeline.history
+HISTORY = {
+    'MODE': 'ring',  # "off", bounded "ring" buffer of every send, or "sample" of sends
+    'MAX_SIZE': 1000,
+    'SAMPLE_RATE': 0.01,
+}
+
+# Listeners of pipe handler latencies and served nodes, i.e. cio.pipeline.tracing.LogListener
+TRACE_LISTENERS = []
+
+# Flush policy of buffered nodes, see cio.pipeline.handler.PipelineHandler.load_buffer
+BUFFER = {
+    'MAX_NODES': None,  # Flush when number of buffered nodes is reached
+    'MAX_URIS': None,  # Flush when number of distinct buffered uris is reached
+    'READ_AHEAD': None,  # Flush accessed node with given number of other buffered uris, instead of all
+}
+
+# Only keep initial, first namespaced and current uri and content of nodes, instead of full history
+NODE_COMPACT = False
+
+# Learning prefetch of nodes per request scope, disabled when None, see cio.pipeline.prefetch
+PREFETCH = None
+
+# Storage of environment, node buffer and history; "thread" local, or asyncio task local "context"
+LOCAL_STORAGE = 'thread'
+
+# Max number of threads running blocking pipes and backends for the asyncio api
+ASYNC_MAX_WORKERS = 4
+
 PLUGINS = [
     'cio.plugins.txt.TextPlugin',
     'cio.plugins.md.MarkdownPlugin'
@@ -35,3 +64,6 @@ URI_DEFAULT_EXT = 'txt'
 URI_QUERY_SEPARATOR = '?'
 URI_QUERY_PARAMETER_SEPARATOR = '&'
 URI_QUERY_VARIABLE_SEPARATOR = '='
+
+# Max number of parsed uris cached, 0 to disable
+URI_CACHE_MAX_SIZE = 10000
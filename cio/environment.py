@@ -5,18 +5,29 @@ import six
 from collections import namedtuple
 from contextlib import contextmanager
 from .conf import settings
-from .utils.thread import ThreadLocalObject
+from .utils.thread import get_local_object_class
 
 DEFAULT = 'default'
-State = namedtuple('State', ['i18n', 'l10n', 'g11n'])
 
 
-class Environment(ThreadLocalObject):
+class State(namedtuple('State', ['i18n', 'l10n', 'g11n'])):
+
+    def __new__(cls, i18n, l10n, g11n):
+        state = super(State, cls).__new__(cls, i18n, l10n, g11n)
+        # Fallback namespaces per scheme, i.e. all but the first one
+        state.fallbacks = dict((scheme, namespaces[1:]) for scheme, namespaces in zip(cls._fields, state))
+        return state
+
+
+class Environment(get_local_object_class()):
+
+    # Tasks spawned within an environment start in it
+    context_inherit = ('_stack',)
 
     def __init__(self):
         super(Environment, self).__init__()
         self.reset()
-        settings.watch(self.reset)
+        settings.watch(self.reset, keys=('ENVIRONMENT',))
 
     @contextmanager
     def __call__(self, name=None, i18n=None, l10n=None, g11n=None):
@@ -1,15 +1,26 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+from .conf import settings
 from .environment import env
 from .utils.formatters import ContentFormatter
 from .utils.uri import URI
+from abc import ABCMeta
 import six
 
 empty = object()
 
 
+@six.add_metaclass(ABCMeta)
 class Node(object):
+    """
+    Node of content, keeping history of applied uris and contents,
+    or only initial, first namespaced and current ones when settings.NODE_COMPACT.
+
+    Node proxies, like buffered nodes, register as virtual subclasses instead of inheriting node slots.
+    """
+
+    __slots__ = ('env', '_uri', '_content', 'meta')
 
     _formatter = ContentFormatter()
 
@@ -45,7 +56,15 @@ class Node(object):
 
     def set_uri(self, uri):
         if uri != self.get_uri():
-            self._uri.append(URI(uri))
+            uris = self._uri
+            uris.append(URI(uri))
+
+            # Forget uris applied in between, but a first one with a namespace
+            if len(uris) > 2 and settings.snapshot.NODE_COMPACT:
+                applied = [_uri for _uri in uris[1:-1] if _uri.namespace][:1]
+                if applied and URI(uris[0]).namespace:
+                    applied = []
+                uris[1:-1] = applied
 
     uri = property(get_uri, set_uri)
 
@@ -54,7 +73,10 @@ class Node(object):
 
     def set_content(self, content):
         if content != self.get_content():
-            self._content.append(content)
+            if len(self._content) > 1 and settings.snapshot.NODE_COMPACT:
+                self._content[-1] = content
+            else:
+                self._content.append(content)
 
     content = property(get_content, set_content)
 
@@ -1,12 +1,18 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
-from collections import defaultdict
+import six
+from collections import OrderedDict
 from ..node import Node
-from ..utils.thread import ThreadLocalObject
+from ..utils.thread import get_local_object_class
 
 
-class BufferedNode(Node):
+class BufferedNode(object):
+    """
+    Lazy proxy of a buffered node, flushing the buffer on first access of its uri or content.
+    """
+
+    __slots__ = ('_node', '_callback', '_flushed')
 
     def __init__(self, node, callback):
         self._node = node
@@ -20,10 +26,32 @@ class BufferedNode(Node):
             uri = self._node.initial_uri
         return '<BufferedNode: %s>' % uri
 
+    def __bytes__(self):
+        self.flush()
+        return self._node.__bytes__()
+
+    def __unicode__(self):
+        self.flush()
+        return self._node.__unicode__()
+
+    __str__ = __bytes__ if six.PY2 else __unicode__
+
     def flush(self):
         if not self._flushed:
             self._callback(self)
 
+    def render(self, **context):
+        self.flush()
+        return self._node.render(**context)
+
+    def for_json(self):
+        self.flush()
+        return self._node.for_json()
+
+    @property
+    def env(self):
+        return self._node.env
+
     @property
     def uri(self):
         self.flush()
@@ -56,31 +84,69 @@ class BufferedNode(Node):
         return self._node.namespace_uri
 
 
-class NodeBuffer(ThreadLocalObject):
+Node.register(BufferedNode)
+
+
+class NodeBuffer(get_local_object_class()):
+    """
+    Buffered nodes per method, grouped by requested, namespaced, uri in order of first buffering.
+    """
 
     def __init__(self):
         super(NodeBuffer, self).__init__()
         self._buffer = {}
+        self._sizes = {}
+        self.batch_depth = 0
 
     def __len__(self):
-        return sum(len(method_nodes) for method_nodes in self._buffer.values())
+        return sum(self._sizes.values())
+
+    def __contains__(self, method):
+        return bool(self._buffer.get(method))
+
+    def size(self, method):
+        """
+        Return number of buffered nodes and distinct uris for method
+        """
+        return self._sizes.get(method, 0), len(self._buffer.get(method, ()))
 
     def add(self, method, node):
         if method not in self._buffer:
-            self._buffer[method] = defaultdict(list)
+            self._buffer[method] = OrderedDict()
+            self._sizes[method] = 0
 
         buffer = self._buffer[method]
-        buffer[node.initial_uri].append(node)
+        uri = node._node.uri
+        if uri in buffer:
+            buffer[uri].append(node)
+        else:
+            buffer[uri] = [node]
+        self._sizes[method] += 1
+
+    def pop(self, method, uri=None, limit=None):
+        """
+        Pop buffered nodes for method, or given uri and oldest other uris up to a limit of distinct uris
+        """
+        buffer = self._buffer.get(method)
+
+        if not buffer:
+            return {}
 
-    def pop(self, method):
-        buffer = self._buffer.get(method, defaultdict(list))
+        if limit is None or len(buffer) <= limit:
+            self._buffer[method] = OrderedDict()
+            self._sizes[method] = 0
+            return buffer
 
-        if buffer:
-            _clone = dict(buffer)
-            buffer.clear()
-            buffer = _clone
+        popped = OrderedDict()
+        if uri in buffer:
+            popped[uri] = buffer.pop(uri)
+        while len(popped) < limit:
+            buffered_uri, nodes = buffer.popitem(last=False)
+            popped[buffered_uri] = nodes
 
-        return buffer
+        self._sizes[method] -= sum(len(nodes) for nodes in popped.values())
+        return popped
 
     def clear(self):
         self._buffer.clear()
+        self._sizes.clear()
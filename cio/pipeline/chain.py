@@ -0,0 +1,61 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+
+def compile_chain(handlers):
+    """
+    Compile (request_handler, response_handler) pairs into a single call chain function,
+    taking a request dict and returning the response dict.
+
+    Each pipe becomes a link calling its request handler, the rest of the chain,
+    if any node requests are left, and then its response handler.
+    Links are specialized on which handlers the pipe implements,
+    and pipes implementing none of them are left out.
+    """
+    chain = _terminal
+
+    for request_handler, response_handler in reversed(handlers):
+        if request_handler and response_handler:
+            chain = _link(request_handler, response_handler, chain)
+        elif request_handler:
+            chain = _request_link(request_handler, chain)
+        elif response_handler:
+            chain = _response_link(response_handler, chain)
+
+    return chain
+
+
+def _terminal(request):
+    # Turn request to response
+    return request
+
+
+def _link(request_handler, response_handler, next_link):
+    def link(request):
+        pipe_response = request_handler(request)
+        response = next_link(request) if request else request
+        if response:
+            response = response_handler(response)
+        if pipe_response:
+            response.update(pipe_response)
+        return response
+    return link
+
+
+def _request_link(request_handler, next_link):
+    def link(request):
+        pipe_response = request_handler(request)
+        response = next_link(request) if request else request
+        if pipe_response:
+            response.update(pipe_response)
+        return response
+    return link
+
+
+def _response_link(response_handler, next_link):
+    def link(request):
+        response = next_link(request) if request else request
+        if response:
+            response = response_handler(response)
+        return response
+    return link
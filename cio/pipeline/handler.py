@@ -2,11 +2,17 @@
 from __future__ import unicode_literals
 
 import logging
-from collections import defaultdict
+import six
+from contextlib import contextmanager
 from functools import partial
+from timeit import default_timer
 from .buffer import NodeBuffer, BufferedNode
-from .history import NodeHistory
+from .chain import compile_chain
+from .history import NodeHistory, TracedRequest
+from .prefetch import Prefetcher
+from .tracing import Tracer
 from ..conf import settings
+from ..conf.exceptions import ImproperlyConfigured
 from ..utils.imports import import_class
 
 logger = logging.getLogger(__name__)
@@ -19,16 +25,47 @@ class PipelineHandler(object):
     def __init__(self):
         self.history = NodeHistory()
         self._buffer = NodeBuffer()
+        self._flush_callbacks = {}
+        self.prefetcher = Prefetcher(self)
+        self.tracer = Tracer(self)
         self.load()
-        settings.watch(self.load)
+        settings.watch(self.load, keys=('PIPELINE', 'TRACE_LISTENERS', 'BUFFER'))
 
     def load(self):
+        """
+        Load pipes from settings.PIPELINE, either a list of pipes used for all methods,
+        or a dict of pipe lists per method, i.e. {'get': [...]} for read-only nodes.
+        Methods without declared pipes pass nodes through untouched.
+        """
+        self.tracer.load()
+        self.load_buffer()
         self.pipes = []
-        for pipe_path in settings.PIPELINE:
-            self.add_pipe(pipe_path)
+        self.method_pipes = dict((method, []) for method in PIPELINE_CALLS)
+
+        if isinstance(settings.PIPELINE, dict):
+            for method, pipe_paths in six.iteritems(settings.PIPELINE):
+                if method not in self.method_pipes:
+                    raise ImproperlyConfigured('Unknown content-io pipeline method "%s"' % method)
+                for pipe_path in pipe_paths:
+                    self.add_pipe(pipe_path, methods=(method,))
+        else:
+            for pipe_path in settings.PIPELINE:
+                self.add_pipe(pipe_path)
+
         self.build()
 
-    def add_pipe(self, pipe):
+    def load_buffer(self):
+        """
+        Load flush policy of buffered nodes from settings.BUFFER;
+        flush when MAX_NODES nodes or MAX_URIS distinct uris are buffered,
+        and on node access only flush it together with the READ_AHEAD oldest other buffered uris.
+        """
+        config = settings.BUFFER or {}
+        self.buffer_max_nodes = config.get('MAX_NODES')
+        self.buffer_max_uris = config.get('MAX_URIS')
+        self.buffer_read_ahead = config.get('READ_AHEAD')
+
+    def add_pipe(self, pipe, methods=PIPELINE_CALLS):
         try:
             if isinstance(pipe, type):
                 pipe_class = pipe
@@ -37,59 +74,137 @@ class PipelineHandler(object):
         except ImportError as e:
             raise ImportError('Could not import content-io pipe "%s" (Is it on sys.path?): %s' % (pipe, e))
         else:
-            self.pipes.append(pipe_class)
+            if pipe_class not in self.pipes:
+                self.pipes.append(pipe_class)
+            for method in methods:
+                self.method_pipes[method].append(pipe_class)
 
     def build(self):
-        self._pipeline = defaultdict(list)
-        for pipe_class in self.pipes:
-            pipe = pipe_class()
-            for call in PIPELINE_CALLS:
-                request_handler = getattr(pipe, '%s_request' % call, None)
-                response_handler = getattr(pipe, '%s_response' % call, None)
-                self._pipeline[call].append((request_handler, response_handler))
+        """
+        Compile a call chain per method, only containing pipes implementing that method.
+        Pipes are instantiated once and shared by all methods.
+        A traced variant of each chain, used when logging history, marks which pipe served each node.
+        Handlers are wrapped by the tracer when trace listeners are attached.
+        """
+        pipes = dict((pipe_class, pipe_class()) for pipe_class in self.pipes)
+        self._handlers = {}
+        self._traced_handlers = {}
+        self._pipeline = {}
+        self._traced_pipeline = {}
+        self._async_pipeline = {}
+
+        for method in PIPELINE_CALLS:
+            handlers = []
+            traced_handlers = []
+            for pipe_class in self.method_pipes[method]:
+                pipe = pipes[pipe_class]
+                name = pipe_class.__name__
+                request_handler = getattr(pipe, '%s_request' % method, None)
+                response_handler = getattr(pipe, '%s_response' % method, None)
+                served_handler = self.history.trace(name, request_handler)
+
+                trace = partial(self.tracer.trace, method, name)
+                response_handler = trace('response', response_handler)
+                handlers.append((trace('request', request_handler), response_handler))
+                traced_handlers.append((trace('request', served_handler), response_handler))
+            self._handlers[method] = handlers
+            self._traced_handlers[method] = traced_handlers
+            self._pipeline[method] = compile_chain(handlers)
+            self._traced_pipeline[method] = compile_chain(traced_handlers)
 
     def send(self, method, *nodes):
-        request = dict((node.uri, node) for node in nodes)
-        response_chain = []
+        traced = self.history.sample()
+        listeners = self.tracer.listeners
 
-        # Iterate request chain
-        for request_handler, response_handler in self._pipeline[method]:
-            if request_handler:
-                pipe_response = request_handler(request)
-            else:
-                pipe_response = None
+        if not traced and not listeners:
+            request = dict((node.uri, node) for node in nodes)
+            return self._pipeline[method](request)
 
-            # Build response chain
-            response_chain.append((response_handler, pipe_response))
+        if traced:
+            request = TracedRequest((node.uri, node) for node in nodes)
+            pipeline = self._traced_pipeline
+        else:
+            request = dict((node.uri, node) for node in nodes)
+            pipeline = self._pipeline
 
-            # Go no further in pipeline if out of node requests
-            if not request:
-                break
+        if listeners:
+            self.tracer.send_started(method, request)
 
-        # Turn request to response
-        response = request
+        start = default_timer()
+        try:
+            response = pipeline[method](request)
+        except BaseException as e:
+            # Let listeners close their send, i.e. span, of failing pipe
+            if listeners:
+                self.tracer.send_failed(method, request, default_timer() - start, e)
+            raise
+        duration = default_timer() - start
 
-        # Iterate response chain
-        for response_handler, pipe_response in reversed(response_chain):
-            if response and response_handler:
-                response = response_handler(response)
-            if pipe_response:
-                response.update(pipe_response)
+        if listeners:
+            self.tracer.send_finished(method, response, duration)
 
         # Log response
-        self.history.log(method, *response.values())
+        if traced:
+            self.history.log(method, response, duration)
 
         return response
 
+    def asend(self, method, *nodes):
+        """
+        Coroutine sending nodes through pipeline, awaiting coroutine pipe handlers
+        and running blocking ones in an executor. Requires Python 3.5+, see cio.aio.
+        """
+        from ..aio.pipeline import send
+        return send(self, method, *nodes)
+
+    @contextmanager
+    def batch(self):
+        """
+        Buffer all nodes, even non-lazy, until exit of outermost batch or first access of a buffered node.
+        """
+        self._buffer.batch_depth += 1
+        try:
+            yield
+        finally:
+            self._buffer.batch_depth -= 1
+
+        if not self._buffer.batch_depth:
+            for method in PIPELINE_CALLS:
+                if method in self._buffer:
+                    self.flush(method)
+
+    @property
+    def batching(self):
+        return self._buffer.batch_depth > 0
+
+    def prefetch(self, scope):
+        """
+        Context manager learning nodes fetched within named scope, and prefetching them on next entry.
+        """
+        return self.prefetcher(scope)
+
     def buffer(self, method, node):
-        callback = partial(self.flush, method)
+        callback = self._flush_callbacks.get(method)
+        if callback is None:
+            callback = self._flush_callbacks[method] = partial(self.flush, method)
         buffered_node = BufferedNode(node, callback=callback)
         self._buffer.add(method, buffered_node)
+
+        # Flush when buffer reaches its bounds
+        if self.buffer_max_nodes or self.buffer_max_uris:
+            nodes, uris = self._buffer.size(method)
+            if (self.buffer_max_nodes and nodes >= self.buffer_max_nodes) or \
+                    (self.buffer_max_uris and uris >= self.buffer_max_uris):
+                self.flush(method)
+
         return buffered_node
 
     def flush(self, method, sender=None):
-        # Extract nodes from buffer
-        buffer = self._buffer.pop(method)
+        # Extract nodes from buffer, or only read ahead of accessed node
+        if sender is not None and self.buffer_read_ahead is not None:
+            buffer = self._buffer.pop(method, sender._node.uri, limit=self.buffer_read_ahead + 1)
+        else:
+            buffer = self._buffer.pop(method)
 
         # Re-buffer triggering node if buffer for some reason is empty
         if not buffer:
@@ -102,15 +217,15 @@ class PipelineHandler(object):
             buffer = self._buffer.pop(method)
 
         # Extract and flatten wrapped nodes, send only distinct uri's
-        nodes = (buffered_nodes[0]._node for buffered_nodes in buffer.values())
+        nodes = [buffered_nodes[0]._node for buffered_nodes in buffer.values()]
 
         # Send nodes through pipeline
-        response = self.send(method, *nodes)
+        self.send(method, *nodes)
 
         # Update buffered nodes to make sure uri duplicates,
         # not sent through pipeline, gets content
-        for node in response.values():
-            for buffered_node in buffer[node.initial_uri]:
+        for node, buffered_nodes in zip(nodes, buffer.values()):
+            for buffered_node in buffered_nodes:
                 buffered_node.content = node.content
 
     def clear(self):
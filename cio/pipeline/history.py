@@ -1,21 +1,118 @@
-from collections import defaultdict
-from ..utils.thread import ThreadLocalObject
+# coding=utf-8
+from __future__ import unicode_literals
 
+import inspect
+import random
+import six
+import warnings
+from collections import deque, namedtuple
+from ..conf import settings
+from ..conf.exceptions import ImproperlyConfigured
+from ..node import Node
+from ..utils.thread import get_local_object_class
 
-class NodeHistory(ThreadLocalObject):
+HISTORY_MODES = ('off', 'ring', 'sample')
+
+
+class HistoryRecord(namedtuple('HistoryRecord', 'uri method pipe duration')):
+    """
+    Compact record of a node sent through the pipeline;
+    name of pipe serving the node, or None if reaching end of pipeline,
+    and duration in seconds of the whole send.
+    """
+    __slots__ = ()
+
+
+class TracedRequest(dict):
+    """
+    Request dict passed through traced pipeline, collecting name of pipe serving each uri.
+    """
+    __slots__ = ('served',)
+
+    def __init__(self, *args, **kwargs):
+        super(TracedRequest, self).__init__(*args, **kwargs)
+        self.served = {}
+
+
+class HistoryRecords(get_local_object_class()):
+
+    def __init__(self, max_size):
+        super(HistoryRecords, self).__init__()
+        self.records = deque(maxlen=max_size)
+
+
+class NodeHistory(object):
+    """
+    Per thread history of nodes sent through the pipeline, configured by settings.HISTORY:
+
+        HISTORY = {
+            'MODE': 'ring',  # "off", bounded "ring" buffer of every send, or "sample" of sends
+            'MAX_SIZE': 1000,  # Max number of records kept per thread
+            'SAMPLE_RATE': 0.01,  # Fraction of sends recorded in "sample" mode
+        }
+    """
 
     def __init__(self):
-        super(NodeHistory, self).__init__()
-        self._history = defaultdict(list)
+        self.load()
+        settings.watch(self.load, keys=('HISTORY',))
+
+    def load(self):
+        config = settings.HISTORY or {}
+        mode = config.get('MODE', 'ring')
+        if mode not in HISTORY_MODES:
+            raise ImproperlyConfigured('Unknown content-io history mode "%s"; must be one of %s' % (
+                mode, ', '.join(HISTORY_MODES)
+            ))
+        self.mode = mode
+        self.max_size = int(config.get('MAX_SIZE', 1000))
+        self.sample_rate = float(config.get('SAMPLE_RATE', 0.01))
+        self._local = HistoryRecords(self.max_size)
 
     def __len__(self):
-        return sum(len(nodes) for nodes in self._history.values())
+        return len(self._local.records)
+
+    def sample(self):
+        """
+        Return True if next send should be traced and logged.
+        """
+        if self.mode == 'ring':
+            return True
+        elif self.mode == 'sample':
+            return random.random() < self.sample_rate
+        return False
 
-    def log(self, method, *nodes):
-        self._history[method].extend(nodes)
+    def trace(self, pipe_name, request_handler):
+        """
+        Wrap pipe request handler to mark nodes it serves in traced requests.
+        Coroutine handlers are left untouched, i.e. not marked.
+        """
+        iscoroutinefunction = getattr(inspect, 'iscoroutinefunction', None)
+        if request_handler is None or (iscoroutinefunction and iscoroutinefunction(request_handler)):
+            return request_handler
+
+        def traced_request_handler(request):
+            response = request_handler(request)
+            if response:
+                request.served.update(dict.fromkeys(response, pipe_name))
+            return response
+
+        return traced_request_handler
+
+    def log(self, method, response, duration=None):
+        served = getattr(response, 'served', {})
+        self._local.records.extend(
+            HistoryRecord(node.uri, method, served.get(uri), duration) for uri, node in six.iteritems(response)
+        )
 
     def list(self, method):
-        return self._history[method]
+        """
+        Deprecated, return nodes rebuilt from records of given method, i.e. without content, use records instead.
+        """
+        warnings.warn('NodeHistory.list is deprecated, use NodeHistory.records', DeprecationWarning, stacklevel=2)
+        return [Node(record.uri) for record in self.records(method)]
+
+    def records(self, method):
+        return [record for record in self._local.records if record.method == method]
 
     def clear(self):
-        self._history.clear()
+        self._local.records.clear()
@@ -8,11 +8,21 @@ from ...backends import cache
 
 
 class CachePipe(BasePipe):
+    """
+    Caches nodes without specified version, i.e. default or published, by uri without version.
+
+    Specific versions are cached by version specific keys, configured by CACHE['PIPE']:
+
+        'CACHE_VERSIONS': True,  # Cache numbered, immutable, revisions forever, default False
+        'DRAFT_TIMEOUT': 10,  # Cache drafts for given seconds, default None (not cached)
+
+    Versions are invalidated when set, published or deleted.
+    """
 
     def get_request(self, request):
         response = {}
 
-        # Only get nodes from cache without specified version
+        # Get nodes without specified version
         uris = tuple(uri for uri, node in six.iteritems(request) if not node.uri.version)
 
         if uris:
@@ -22,10 +32,22 @@ class CachePipe(BasePipe):
                 node = response[node.uri] = request.pop(uri)
                 self.materialize_node(node, **cached_node)
 
+        # Get nodes with specified version, if cacheable
+        revisions, drafts = self._split_versions(uri for uri, node in six.iteritems(request) if node.uri.version)
+        versioned_uris = revisions + drafts
+
+        if versioned_uris:
+            cached_nodes = cache.get_many(versioned_uris, versioned=True)
+
+            for uri, cached_node in six.iteritems(cached_nodes):
+                node = response[node.uri] = request.pop(uri)
+                self.materialize_node(node, **cached_node)
+
         return response
 
     def get_response(self, response):
         nodes = {}
+        versioned_nodes = {}
 
         # Cache nodes without specified version (i.e. default or published)
         for uri, node in six.iteritems(response):
@@ -34,20 +56,81 @@ class CachePipe(BasePipe):
                 nodes[origin_uri] = node.content
                 # Empty node meta to be coherent with cached nodes
                 node.meta.clear()
+            else:
+                versioned_nodes[uri] = node
 
-        pipe_config = settings.CACHE.get('PIPE', {})
+        pipe_config = self._get_config()
         cache_on_get = pipe_config.get('CACHE_ON_GET', True)
 
         if nodes and cache_on_get:
             cache.set_many(nodes)
 
+        # Cache nodes with specified version, revisions forever and drafts with timeout
+        revisions, drafts = self._split_versions(versioned_nodes)
+        for uris, timeout in ((revisions, None), (drafts, pipe_config.get('DRAFT_TIMEOUT'))):
+            nodes = {}
+            for uri in uris:
+                node = versioned_nodes[uri]
+                nodes[node.uri.clone(namespace=uri.namespace)] = node.content
+                node.meta.clear()
+
+            if nodes and cache_on_get:
+                cache.set_many(nodes, timeout=timeout, versioned=True)
+
+        return response
+
+    def set_response(self, response):
+        uris = set(response.keys())
+        uris.update(node.uri for node in response.values())
+        self._delete_versions(uris)
         return response
 
     def publish_response(self, response):
         nodes = dict((node.uri, node.content) for uri, node in six.iteritems(response))
         cache.set_many(nodes)
+
+        # Published draft is now a numbered revision
+        revisions, _ = self._split_versions(nodes)
+        if revisions:
+            cache.set_many(dict((uri, nodes[uri]) for uri in revisions), versioned=True)
+        self._delete_versions(uri for uri in response.keys() if uri not in nodes)
+
         return response
 
     def delete_response(self, response):
         cache.delete_many(response.keys())
+        self._delete_versions(response.keys())
         return response
+
+    def _get_config(self):
+        # Cache setting is a plain backend uri until the cache backend is loaded
+        config = settings.snapshot.CACHE
+        if isinstance(config, dict):
+            return config.get('PIPE', {})
+        return {}
+
+    def _split_versions(self, uris):
+        """
+        Split versioned uris into numbered revisions and drafts, each only if caching of such is enabled.
+        """
+        pipe_config = self._get_config()
+        cache_versions = pipe_config.get('CACHE_VERSIONS', False)
+        cache_drafts = pipe_config.get('DRAFT_TIMEOUT') is not None
+        revisions = []
+        drafts = []
+
+        for uri in uris:
+            if not uri.version:
+                continue
+            elif uri.version.isdigit():
+                if cache_versions:
+                    revisions.append(uri)
+            elif cache_drafts:
+                drafts.append(uri)
+
+        return tuple(revisions), tuple(drafts)
+
+    def _delete_versions(self, uris):
+        revisions, drafts = self._split_versions(uris)
+        if revisions or drafts:
+            cache.delete_many(revisions + drafts, versioned=True)
@@ -1,14 +1,30 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+import six
 from .base import BasePipe
+from ...backends import RENDERED, storage
+from ...backends.exceptions import NodeDoesNotExist
+from ...conf import settings
 from ...conf.exceptions import ImproperlyConfigured
-from ...node import empty
+from ...node import Node, empty
 from ...plugins import plugins
+from ...plugins.base import BasePlugin
 from ...plugins.exceptions import UnknownPlugin
 
 
 class PluginPipe(BasePipe):
+    """
+    Loads and renders nodes with their plugins.
+
+    Published nodes are optionally rendered once at publish, configured by STORAGE['PIPE']:
+
+        'PRERENDER': True,  # Persist rendered content in node meta, default False
+
+    Pre-rendered content is served as long as its signature,
+    of plugin, plugin version, plugin settings and raw content, still matches.
+    Plugins not overriding render or render_node are not pre-rendered.
+    """
 
     def render_response(self, response):
         for node in response.values():
@@ -20,11 +36,50 @@ class PluginPipe(BasePipe):
                     node.uri
                 ))
             else:
-                data = plugin.load_node(node)
-                node.content = plugin.render_node(node, data)
+                rendered = node.meta.pop(RENDERED, None) if node.meta else None
+                if rendered and rendered.get('signature') == plugin.signature(node.content):
+                    node.content = rendered['content']
+                else:
+                    data = plugin.load_node(node)
+                    node.content = plugin.render_node(node, data)
 
         return response
 
+    def is_rendering(self, plugin):
+        """
+        Return True if plugin renders content, i.e. overrides render or render_node
+        """
+        plugin_class = type(plugin)
+        for name in ('render', 'render_node'):
+            method = six.get_unbound_function(getattr(plugin_class, name))
+            if method is not six.get_unbound_function(getattr(BasePlugin, name)):
+                return True
+        return False
+
+    def prerender(self, plugin, uri):
+        """
+        Render stored node about to be published, returning meta to persist, if found
+        """
+        try:
+            stored_node = storage.get(uri)
+        except NodeDoesNotExist:
+            return None
+
+        node = Node(stored_node['uri'], stored_node['content'])
+        signature = plugin.signature(node.content)
+        data = plugin.load_node(node)
+        return {
+            'signature': signature,
+            'content': plugin.render_node(node, data)
+        }
+
+    def _get_config(self):
+        # Storage setting is a plain backend uri until the storage backend is loaded
+        config = settings.snapshot.STORAGE
+        if isinstance(config, dict):
+            return config.get('PIPE', {})
+        return {}
+
     def get_response(self, response):
         return self.render_response(response)
 
@@ -50,6 +105,10 @@ class PluginPipe(BasePipe):
                 # TODO: Should we maybe raise here?
             else:
                 node = plugin.publish_node(node)
+                if self._get_config().get('PRERENDER') and self.is_rendering(plugin):
+                    rendered = self.prerender(plugin, uri)
+                    if rendered:
+                        node.meta[RENDERED] = rendered
 
     def publish_response(self, response):
         return self.render_response(response)
@@ -12,7 +12,7 @@ class StoragePipe(BasePipe):
 
     def get_request(self, request):
         response = {}
-        stored_nodes = storage.get_many(request.keys())
+        stored_nodes = storage.get_many(request.keys(), rendered=True)
 
         for uri, stored_node in six.iteritems(stored_nodes):
             node = response[node.uri] = request.pop(uri)
@@ -25,7 +25,7 @@ class StoragePipe(BasePipe):
             # Redirect nodes without extension (non-persisted) to default
             for node in response.values():
                 if not node.uri.ext:
-                    node.uri = node.uri.clone(ext=settings.URI_DEFAULT_EXT)
+                    node.uri = node.uri.clone(ext=settings.snapshot.URI_DEFAULT_EXT)
 
         return response
 
@@ -63,26 +63,17 @@ class NamespaceFallbackPipe(BasePipe):
 
         # Build fallback URI map
         for uri, node in six.iteritems(request):
-            # if node.uri != node.initial_uri:
-            namespaces = getattr(node.env, uri.scheme)[1:]
+            namespaces = node.env.fallbacks.get(uri.scheme)
             if namespaces:
-                uris = [uri.clone(namespace=namespace) for namespace in namespaces]
-                fallback_uris[node.uri] = uris
+                fallback_uris[uri] = [uri.clone(namespace=namespace) for namespace in namespaces]
 
-        # Fetch nodes from storage, each fallback level slice at a time
-        while fallback_uris:
-            level_uris = dict((fallback.pop(0), uri) for uri, fallback in six.iteritems(fallback_uris))
-            stored_nodes = storage.get_many(level_uris.keys())
+        if fallback_uris:
+            # Fetch first found fallback nodes from storage, all levels at once
+            stored_nodes = storage.get_fallbacks(fallback_uris, rendered=True)
 
             # Set node fallback content and add to response
             for uri, stored_node in six.iteritems(stored_nodes):
-                requested_uri = level_uris[uri]
-                node = response[node.uri] = request.pop(requested_uri)
+                node = response[node.uri] = request.pop(uri)
                 self.materialize_node(node, **stored_node)
 
-            # Remove exhausted uris that has run out of fallback namespaces
-            for uri, fallback in list(fallback_uris.items()):
-                if not fallback:
-                    fallback_uris.pop(uri)
-
         return response
@@ -0,0 +1,129 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import six
+from contextlib import contextmanager
+from threading import Lock
+from ..conf import settings
+from ..environment import env
+from ..utils.lru import LRUCache
+from ..utils.thread import get_local_object_class
+
+
+class PrefetchState(get_local_object_class()):
+
+    def __init__(self):
+        super(PrefetchState, self).__init__()
+        self.scopes = []
+
+
+class Scope(object):
+
+    def __init__(self, name):
+        self.name = name
+        self.fetched = set()
+        self.prefetched = {}
+
+
+class Prefetcher(object):
+    """
+    Learns which nodes are fetched within named request scopes, i.e. views or routes,
+    and buffers them all when entering the scope again, to be fetched by the first flush.
+
+    Each scope keeps a bounded manifest of (uri, default, environment state) scores,
+    decayed on every scope exit and incremented for the nodes fetched.
+
+    Enabled by settings.PREFETCH:
+
+        PREFETCH = {
+            'MAX_SCOPES': 1000,  # Number of scope manifests to keep
+            'MAX_NODES': 200,  # Number of nodes per manifest
+            'DECAY': 0.5,  # Score factor applied on each scope exit
+            'MIN_SCORE': 0.2,  # Nodes scoring lower are forgotten
+        }
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._state = PrefetchState()
+        self._lock = Lock()
+        self.load()
+        settings.watch(self.load, keys=('PREFETCH',))
+
+    def load(self):
+        config = settings.PREFETCH
+        self.enabled = config is not None
+        config = config or {}
+        self.max_nodes = int(config.get('MAX_NODES', 200))
+        self.decay = float(config.get('DECAY', 0.5))
+        self.min_score = float(config.get('MIN_SCORE', 0.2))
+        self.manifests = LRUCache(maxsize=int(config.get('MAX_SCOPES', 1000)))
+
+    @property
+    def active(self):
+        return bool(self._state.scopes)
+
+    @contextmanager
+    def __call__(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        scope = Scope(name)
+        self._prefetch(scope)
+        self._state.scopes.append(scope)
+        try:
+            yield
+        finally:
+            self._state.scopes.pop()
+            self._learn(scope)
+
+    def get(self, uri, default=None):
+        """
+        Record node fetched within active scopes and return its prefetched node, if any.
+        """
+        key = (uri, default, env.state)
+        node = None
+        for scope in reversed(self._state.scopes):
+            scope.fetched.add(key)
+            if node is None:
+                node = scope.prefetched.get(key)
+        return node
+
+    def manifest(self, name):
+        """
+        Return (uri, default, environment state) tuples of nodes to prefetch for scope, best scoring first.
+        """
+        manifest = self.manifests.get(name) or {}
+        return sorted(manifest, key=manifest.get, reverse=True)
+
+    def _prefetch(self, scope):
+        from ..api import _init_get_node
+
+        states = {}
+        for key in self.manifest(scope.name):
+            states.setdefault(key[2], []).append(key)
+
+        # Init nodes within the environment they were fetched in
+        for state, keys in six.iteritems(states):
+            with env(**state._asdict()):
+                for key in keys:
+                    node = _init_get_node(key[0], key[1])
+                    scope.prefetched[key] = self.handler.buffer('get', node)
+
+    def _learn(self, scope):
+        with self._lock:
+            manifest = dict(self.manifests.get(scope.name) or {})
+
+            for key in manifest:
+                manifest[key] *= self.decay
+            for key in scope.fetched:
+                manifest[key] = manifest.get(key, 0) + 1
+
+            # Forget rarely fetched nodes and keep the best scoring ones
+            manifest = dict((key, score) for key, score in six.iteritems(manifest) if score >= self.min_score)
+            if len(manifest) > self.max_nodes:
+                best = sorted(six.iteritems(manifest), key=lambda item: item[1], reverse=True)
+                manifest = dict(best[:self.max_nodes])
+
+            self.manifests.set(scope.name, manifest)
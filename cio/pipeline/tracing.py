@@ -0,0 +1,239 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import inspect
+import logging
+import six
+from bisect import bisect_left
+from collections import namedtuple
+from threading import Lock
+from timeit import default_timer
+from ..conf import settings
+from ..utils.imports import import_class
+from ..utils.thread import get_local_object_class
+
+logger = logging.getLogger(__name__)
+
+
+class PipeEvent(namedtuple('PipeEvent', 'method pipe stage start duration nodes_in nodes_out served')):
+    """
+    Call of a pipe request or response handler;
+    stage is "request" or "response", start is a timeit.default_timer timestamp,
+    nodes_out is the number of nodes passed on by a request handler, or returned by a response handler,
+    and served is a tuple of uris satisfied by a request handler.
+    """
+    __slots__ = ()
+
+
+class Span(namedtuple('Span', 'name start duration tags children')):
+    __slots__ = ()
+
+
+class BaseListener(object):
+    """
+    Optional implementable listener methods:
+
+    def send_started(self, method, request):
+        pass
+
+    def pipe_called(self, event):
+        pass
+
+    def send_finished(self, method, response, duration):
+        pass
+
+    def send_failed(self, method, request, duration, error):
+        pass
+    """
+
+
+class LogListener(BaseListener):
+    """
+    Logs sends and pipe calls with their latency.
+    """
+
+    def __init__(self, logger=logger, level=logging.DEBUG):
+        self.logger = logger
+        self.level = level
+
+    def pipe_called(self, event):
+        self.logger.log(
+            self.level, '%s.%s_%s: %.3fms, %d -> %d nodes',
+            event.pipe, event.method, event.stage, event.duration * 1000, event.nodes_in, event.nodes_out
+        )
+
+    def send_finished(self, method, response, duration):
+        self.logger.log(self.level, '%s: %.3fms, %d nodes', method, duration * 1000, len(response))
+
+    def send_failed(self, method, request, duration, error):
+        self.logger.log(self.level, '%s: %.3fms, %d nodes, failed: %r', method, duration * 1000, len(request), error)
+
+
+class HistogramListener(BaseListener):
+    """
+    Aggregates pipe call latencies per (method, pipe, stage) into histogram buckets of upper bounds in seconds.
+    """
+
+    buckets = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+
+    def __init__(self, buckets=None):
+        if buckets is not None:
+            self.buckets = tuple(sorted(buckets))
+        self._lock = Lock()
+        self.clear()
+
+    def pipe_called(self, event):
+        key = (event.method, event.pipe, event.stage)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    'count': 0,
+                    'total': 0.0,
+                    'max': 0.0,
+                    'nodes_in': 0,
+                    'nodes_out': 0,
+                    'served': 0,
+                    'buckets': [0] * (len(self.buckets) + 1),
+                }
+            stats['count'] += 1
+            stats['total'] += event.duration
+            stats['max'] = max(stats['max'], event.duration)
+            stats['nodes_in'] += event.nodes_in
+            stats['nodes_out'] += event.nodes_out
+            stats['served'] += len(event.served)
+            stats['buckets'][bisect_left(self.buckets, event.duration)] += 1
+
+    def stats(self):
+        """
+        Return copy of aggregated stats, keyed by (method, pipe, stage).
+        Last bucket counts calls slower than the largest bucket bound.
+        """
+        with self._lock:
+            return dict((key, dict(stats, buckets=list(stats['buckets'])))
+                        for key, stats in six.iteritems(self._stats))
+
+    def clear(self):
+        with self._lock:
+            self._stats = {}
+
+
+class SpanState(get_local_object_class()):
+
+    def __init__(self):
+        super(SpanState, self).__init__()
+        self.stack = []
+
+
+class SpanListener(BaseListener):
+    """
+    Calls given callback with a Span per send, with child spans per pipe call, for tracing integrations.
+    Span timestamps are timeit.default_timer values.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self._state = SpanState()
+
+    def send_started(self, method, request):
+        self._state.stack.append((default_timer(), []))
+
+    def pipe_called(self, event):
+        if self._state.stack:
+            self._state.stack[-1][1].append(Span(
+                '%s.%s_%s' % (event.pipe, event.method, event.stage),
+                event.start,
+                event.duration,
+                {'nodes_in': event.nodes_in, 'nodes_out': event.nodes_out, 'served': event.served},
+                ()
+            ))
+
+    def send_finished(self, method, response, duration):
+        start, children = self._state.stack.pop()
+        self.callback(Span('cio.%s' % method, start, duration, {'nodes': len(response)}, tuple(children)))
+
+    def send_failed(self, method, request, duration, error):
+        start, children = self._state.stack.pop()
+        self.callback(Span('cio.%s' % method, start, duration, {'nodes': len(request), 'error': error},
+                           tuple(children)))
+
+
+class Tracer(object):
+    """
+    Dispatches pipeline send and pipe handler events to listeners,
+    configured by settings.TRACE_LISTENERS or added with add_listener.
+
+    Handlers are only wrapped when listeners are attached.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._listeners = []
+        self.listeners = []
+
+    def load(self):
+        self.listeners = list(self._listeners)
+        for listener in settings.TRACE_LISTENERS:
+            if not isinstance(listener, BaseListener):
+                try:
+                    listener_class = listener if isinstance(listener, type) else import_class(listener)
+                except ImportError as e:
+                    raise ImportError('Could not import content-io trace listener "%s" '
+                                      '(Is it on sys.path?): %s' % (listener, e))
+                listener = listener_class()
+            self.listeners.append(listener)
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+        self.handler.load()
+
+    def remove_listener(self, listener):
+        self._listeners.remove(listener)
+        self.handler.load()
+
+    def trace(self, method, pipe_name, stage, handler):
+        """
+        Wrap pipe handler to time it and dispatch its PipeEvent to listeners.
+        Coroutine handlers are left untouched.
+        """
+        iscoroutinefunction = getattr(inspect, 'iscoroutinefunction', None)
+        if handler is None or not self.listeners or (iscoroutinefunction and iscoroutinefunction(handler)):
+            return handler
+
+        listeners = [listener.pipe_called for listener in self.listeners if hasattr(listener, 'pipe_called')]
+
+        def traced_handler(nodes):
+            nodes_in = len(nodes)
+            start = default_timer()
+            result = handler(nodes)
+            duration = default_timer() - start
+
+            if stage == 'request':
+                served = tuple(result) if result else ()
+                nodes_out = len(nodes)
+            else:
+                served = ()
+                nodes_out = len(result) if result else 0
+
+            event = PipeEvent(method, pipe_name, stage, start, duration, nodes_in, nodes_out, served)
+            for pipe_called in listeners:
+                pipe_called(event)
+
+            return result
+
+        return traced_handler
+
+    def send_started(self, method, request):
+        for listener in self.listeners:
+            if hasattr(listener, 'send_started'):
+                listener.send_started(method, request)
+
+    def send_finished(self, method, response, duration):
+        for listener in self.listeners:
+            if hasattr(listener, 'send_finished'):
+                listener.send_finished(method, response, duration)
+
+    def send_failed(self, method, request, duration, error):
+        for listener in self.listeners:
+            if hasattr(listener, 'send_failed'):
+                listener.send_failed(method, request, duration, error)
@@ -12,7 +12,7 @@ class PluginLibrary(object):
 
     def __init__(self):
         self._plugins = {}
-        settings.watch(self.load)
+        settings.watch(self.load, keys=('PLUGINS',))
 
     def __iter__(self):
         return six.iterkeys(self.plugins)
@@ -24,7 +24,9 @@ class PluginLibrary(object):
         return self._plugins
 
     def load(self):
-        self._plugins = {}
+        previous, self._plugins = self._plugins, {}
+        for plugin in previous.values():
+            plugin.close()
         for plugin_path in settings.PLUGINS:
             self.register(plugin_path)
 
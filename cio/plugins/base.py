@@ -1,6 +1,8 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+import hashlib
+import json
 from cio.conf import settings
 
 
@@ -8,6 +10,9 @@ class BasePlugin(object):
 
     ext = None
 
+    # Part of rendering signature, bump when rendered output changes
+    version = None
+
     @property
     def settings(self):
         return settings.get(self.ext.upper(), {})
@@ -66,3 +71,26 @@ class BasePlugin(object):
         Prepares node for render and returns rendered content
         """
         return self.render(data)
+
+    def close(self):
+        """
+        Release resources, i.e. settings listeners, when replaced by a reloaded plugin
+        """
+        pass
+
+    def signature(self, content):
+        """
+        Return hash of plugin class and version, plugin settings and raw content, identifying a rendering of content
+        """
+        plugin_class = type(self)
+        plugin = '%s.%s:%s:%s' % (
+            plugin_class.__module__,
+            getattr(plugin_class, '__qualname__', plugin_class.__name__),
+            self.version,
+            self.ext
+        )
+        plugin_settings = json.dumps(self.settings, sort_keys=True, default=repr)
+        signature = hashlib.sha1(plugin.encode('utf-8'))
+        signature.update(plugin_settings.encode('utf-8'))
+        signature.update((content or '').encode('utf-8'))
+        return signature.hexdigest()
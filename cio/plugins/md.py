@@ -1,13 +1,69 @@
 from __future__ import unicode_literals
+
+import hashlib
 from .txt import TextPlugin
+from ..conf import settings
+from ..utils.lru import LRUCache
+from ..utils.thread import get_local_object_class
+
+
+class MarkdownState(get_local_object_class()):
+
+    def __init__(self):
+        super(MarkdownState, self).__init__()
+        self.instances = {}
 
 
 class MarkdownPlugin(TextPlugin):
+    """
+    Renders markdown with a reusable Markdown instance per thread and configured extensions,
+    and keeps a bounded cache of rendered content, sized by MD['RENDER_CACHE_MAX_SIZE'].
+    Both are rebuilt when MD settings change.
+    """
 
     ext = 'md'
 
-    def render(self, data):
+    def __init__(self):
+        super(MarkdownPlugin, self).__init__()
+        self.setup()
+        settings.watch(self.setup, keys=(self.ext.upper(),))
+
+    def setup(self):
+        self._state = MarkdownState()
+        max_size = self.settings.get('RENDER_CACHE_MAX_SIZE', 1000)
+        self._render_cache = LRUCache(maxsize=max_size) if max_size else None
+
+    def close(self):
+        settings.unwatch(self.setup)
+
+    @property
+    def version(self):
+        # Rendered output depends on markdown library version
         import markdown
+        return 'markdown-%s' % getattr(markdown, '__version__', getattr(markdown, 'version', ''))
+
+    def get_markdown(self, extensions):
+        """
+        Return this thread's Markdown instance for given extensions, reset for a new document.
+        """
+        import markdown
+        key = tuple(extensions)
+        md = self._state.instances.get(key)
+        if md is None:
+            md = self._state.instances[key] = markdown.Markdown(extensions=list(extensions))
+        return md.reset()
+
+    def render(self, data):
         if data:
             extensions = self.settings.get('EXTENSIONS', [])
-            return markdown.markdown(data, extensions=extensions)
+
+            if self._render_cache is None:
+                return self.get_markdown(extensions).convert(data)
+
+            key = (self.ext, tuple(extensions), hashlib.sha1(data.encode('utf-8')).hexdigest())
+            content = self._render_cache.get(key)
+            if content is None:
+                content = self.get_markdown(extensions).convert(data)
+                self._render_cache.set(key, content)
+
+            return content
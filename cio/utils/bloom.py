@@ -0,0 +1,60 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+import math
+import struct
+from hashlib import md5
+
+
+class BloomFilter(object):
+    """
+    Probabilistic set of strings, without false negatives, sized for given capacity and false positive rate.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = float(error_rate)
+        self.size = int(math.ceil(-self.capacity * math.log(self.error_rate) / math.log(2) ** 2))
+        self.hashes = max(int(round(self.size / float(self.capacity) * math.log(2))), 1)
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        bits = self._bits
+        for index in self._indexes(key):
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+    def _indexes(self, key):
+        # Double hashing, Kirsch-Mitzenmacher
+        h1, h2 = struct.unpack('<QQ', md5(key.encode('utf-8')).digest())
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key):
+        bits = self._bits
+        for index in self._indexes(key):
+            bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+
+    def update(self, keys):
+        for key in keys:
+            self.add(key)
+
+    @property
+    def memory(self):
+        """
+        Size of bit array in bytes
+        """
+        return len(self._bits)
+
+    @property
+    def false_positive_rate(self):
+        """
+        Estimated false positive rate given number of added keys
+        """
+        return (1 - math.exp(-self.hashes * self.count / float(self.size))) ** self.hashes
@@ -1,6 +1,7 @@
 import six
 
 from string import Formatter
+from .lru import LRUCache
 from .. import PY26
 
 
@@ -8,8 +9,64 @@ class ContentFormatter(Formatter):
     """
     ContentFormatter uses string formatting as a template engine,
     not raising key/index/value errors, and keeps braces and variable-like parts in place.
+
+    Templates are parsed once into segments, kept in a bounded LRU cache of given size keyed by content.
     """
 
+    def __init__(self, cache_size=1000):
+        super(ContentFormatter, self).__init__()
+        self._cache = LRUCache(maxsize=cache_size) if cache_size else None
+
+    def format(self, format_string, *args, **kwargs):
+        return self.vformat(format_string, args, kwargs)
+
+    def vformat(self, format_string, args, kwargs):
+        segments, simple = self.compile(format_string)
+
+        if not simple:
+            # Auto numbered fields or nested format specs, rely on full string.Formatter implementation
+            return super(ContentFormatter, self).vformat(format_string, args, kwargs)
+
+        if len(segments) == 1 and segments[0][1] is None:
+            # Fast path for content without fields
+            return segments[0][0]
+
+        result = []
+        for literal_text, field_name, format_spec, conversion in segments:
+            if literal_text:
+                result.append(literal_text)
+            if field_name is not None:
+                obj, _ = self.get_field(field_name, args, kwargs)
+                obj = self.convert_field(obj, conversion)
+                result.append(self.format_field(obj, format_spec))
+
+        return ''.join(result)
+
+    def compile(self, format_string):
+        """
+        Return parsed (literal_text, field_name, format_spec, conversion) segments of template,
+        and whether they can be rendered without the full string.Formatter implementation.
+        """
+        key = format_string if six.PY3 else (type(format_string), format_string)
+        compiled = self._cache.get(key) if self._cache is not None else None
+
+        if compiled is None:
+            try:
+                segments = tuple(self.parse(format_string))
+            except ValueError:
+                # Malformed template, let string.Formatter fail the same way as when parsing on the fly
+                compiled = ((), False)
+            else:
+                simple = all(
+                    field_name is None or (field_name and not (format_spec and u'{' in format_spec))
+                    for _, field_name, format_spec, _ in segments
+                )
+                compiled = (segments, simple)
+            if self._cache is not None:
+                self._cache.set(key, compiled)
+
+        return compiled
+
     def get_value(self, key, args, kwargs):
         try:
             return super(ContentFormatter, self).get_value(key, args, kwargs)
@@ -0,0 +1,42 @@
+# coding=utf-8
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from threading import Lock
+
+
+class LRUCache(object):
+    """
+    Bounded, thread safe mapping evicting least recently used items when full.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -1,8 +1,16 @@
 # coding=utf-8
 from __future__ import unicode_literals
 
+import threading
+from copy import copy
 from threading import local
 
+try:
+    import asyncio
+    from contextvars import ContextVar
+except ImportError:  # pragma: no cover
+    ContextVar = None
+
 
 class ThreadLocalObject(local):
     """
@@ -14,3 +22,103 @@ class ThreadLocalObject(local):
         if self.initialized:
             raise SystemError('%s initialized too many times' % self.__class__.__name__)
         self.initialized = True
+
+
+class ContextLocalObject(object):
+    """
+    Base class for instances local to each asyncio task, or thread outside of tasks, requires Python 3.7+.
+
+    Like threading.local, __init__ is called on first access within each task,
+    while attributes named in context_inherit are shallow copied from the task it was spawned from.
+    Local attributes are looked up after class attributes, hence must not be shadowed by class attributes.
+    """
+    context_inherit = ()
+
+    def __new__(cls, *args, **kwargs):
+        if ContextVar is None:
+            raise SystemError('%s requires contextvars, i.e. Python 3.7+' % cls.__name__)
+        self = super(ContextLocalObject, cls).__new__(cls)
+        object.__setattr__(self, '_context_var', ContextVar('%s.%d' % (cls.__name__, id(self))))
+        object.__setattr__(self, '_context_args', (args, kwargs))
+
+        # State of creating task or thread is initialized by the instantiation itself
+        self._context_var.set((_get_context_owner(), {}))
+
+        return self
+
+    def __init__(self):
+        state = _get_context_state(self)
+        if state.get('initialized'):
+            raise SystemError('%s initialized too many times' % self.__class__.__name__)
+        state['initialized'] = True
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on instance or class, i.e. local ones
+        try:
+            return _get_context_state(self)[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        _get_context_state(self)[name] = value
+
+    def __delattr__(self, name):
+        try:
+            del _get_context_state(self)[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def _get_context_owner():
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return task or threading.current_thread()
+
+
+def _get_context_state(obj):
+    var = obj._context_var
+    owner = _get_context_owner()
+    inherited = var.get(None)
+
+    if inherited is not None and inherited[0] is owner:
+        return inherited[1]
+
+    # First access within this task or thread
+    state = {}
+    var.set((owner, state))
+    args, kwargs = obj._context_args
+    type(obj).__init__(obj, *args, **kwargs)
+
+    if inherited is not None:
+        for name in type(obj).context_inherit:
+            if name in inherited[1]:
+                state[name] = copy(inherited[1][name])
+
+    return state
+
+
+def get_local_object_class():
+    """
+    Return base class for environment, node buffer and history, selected by settings.LOCAL_STORAGE;
+    'thread' for thread locals, or 'context' for asyncio task locals.
+    Needs to be configured before the cio api is first imported, and can not be changed after.
+    """
+    from ..conf import settings
+
+    settings.freeze('LOCAL_STORAGE')
+    return get_local_storage_class(settings.LOCAL_STORAGE)
+
+
+def get_local_storage_class(storage):
+    from ..conf.exceptions import ImproperlyConfigured
+
+    if storage == 'thread':
+        return ThreadLocalObject
+    elif storage == 'context':
+        if ContextVar is None:
+            raise ImproperlyConfigured('Context local storage requires Python 3.7+')
+        return ContextLocalObject
+    else:
+        raise ImproperlyConfigured('Unknown local storage "%s"; must be "thread" or "context"' % storage)
@@ -1,45 +1,140 @@
 # coding=utf-8
 from __future__ import unicode_literals
 from ..conf import settings
-from collections import OrderedDict
+from .lru import LRUCache
+from collections import OrderedDict, namedtuple
 import six
 from six.moves.urllib.parse import unquote_plus, quote_plus
 
+# Bounded table of interned uri parts, i.e. schemes, namespaces and extensions, shared by all uris
+INTERNED_MAX_SIZE = 1000
+_interned = {}
+
+
+def intern_part(part):
+    """
+    Return shared instance of given uri part, if interned or room left in the bounded table.
+    """
+    if part is None:
+        return part
+    interned = _interned.get(part)
+    if interned is None:
+        if len(_interned) >= INTERNED_MAX_SIZE:
+            return part
+        interned = _interned.setdefault(part, part)
+    return interned
+
+
+URI_SETTINGS = (
+    'URI_SCHEME_SEPARATOR',
+    'URI_NAMESPACE_SEPARATOR',
+    'URI_EXT_SEPARATOR',
+    'URI_VERSION_SEPARATOR',
+    'URI_QUERY_SEPARATOR',
+    'URI_QUERY_PARAMETER_SEPARATOR',
+    'URI_QUERY_VARIABLE_SEPARATOR',
+    'URI_DEFAULT_SCHEME',
+    'URI_CACHE_MAX_SIZE',
+)
+
+
+class Separators(namedtuple('Separators', 'scheme namespace ext version query parameter variable default_scheme')):
+    __slots__ = ()
+
+    @classmethod
+    def from_settings(cls):
+        snapshot = settings.snapshot
+        return cls(
+            snapshot.URI_SCHEME_SEPARATOR,
+            snapshot.URI_NAMESPACE_SEPARATOR,
+            snapshot.URI_EXT_SEPARATOR,
+            snapshot.URI_VERSION_SEPARATOR,
+            snapshot.URI_QUERY_SEPARATOR,
+            snapshot.URI_QUERY_PARAMETER_SEPARATOR,
+            snapshot.URI_QUERY_VARIABLE_SEPARATOR,
+            snapshot.URI_DEFAULT_SCHEME,
+        )
+
+
+class URIParser(object):
+    """
+    Holds uri separator settings, snapshotted once per settings change,
+    and a bounded LRU cache of parsed uris keyed by raw string, sized by settings.URI_CACHE_MAX_SIZE.
+
+    Both are bypassed while thread local settings are configured.
+    """
+
+    def __init__(self):
+        self.load()
+        settings.watch(self.load, keys=URI_SETTINGS)
+
+    def load(self):
+        self._separators = Separators.from_settings()
+        max_size = settings.URI_CACHE_MAX_SIZE
+        self.cache = LRUCache(maxsize=max_size) if max_size else None
+
+    @property
+    def separators(self):
+        if settings.overridden:
+            return Separators.from_settings()
+        return self._separators
+
+    def parse(self, uri):
+        if isinstance(uri, six.binary_type):
+            uri = uri.decode('utf-8')
+
+        cache = self.cache
+        if cache is None or settings.overridden:
+            return URI._parse(uri, self.separators)
+
+        parsed_uri = cache.get(uri)
+        if parsed_uri is None:
+            parsed_uri = URI._parse(uri, self._separators)
+            cache.set(uri, parsed_uri)
+
+        return parsed_uri
+
 
 class URI(six.text_type):
+    """
+    Parsed uri string with its parts as attributes.
+
+    Parsed uris are cached and shared, and should be treated as immutable, use clone to alter parts.
+    The query is kept frozen, shared by clones, and handed out as a new dict of lists on access.
+
+    Being a str subclass, uris can not use __slots__, instead the small set of
+    recurring scheme, namespace and extension parts are interned to be shared between instances.
+    """
 
     @staticmethod
     def __new__(cls, uri=None, scheme=None, namespace=None, path=None, ext=None, version=None, query=None):
         if isinstance(uri, URI):
             return uri
         elif uri is not None:
-            return URI._parse(uri)
+            return parser.parse(uri)
         else:
             return URI._render(scheme, namespace, path, ext, version, query)
 
     @classmethod
-    def _parse(cls, uri):
-        if isinstance(uri, six.binary_type):
-            uri = uri.decode('utf-8')
-
+    def _parse(cls, uri, separators):
         query = None
-        base, _, version = uri.partition(settings.URI_VERSION_SEPARATOR)
-        base, _, querystring = base.partition(settings.URI_QUERY_SEPARATOR)
+        base, _, version = uri.partition(separators.version)
+        base, _, querystring = base.partition(separators.query)
 
         if querystring:
             query = OrderedDict()
-            variable_pairs = querystring.split(settings.URI_QUERY_PARAMETER_SEPARATOR)
+            variable_pairs = querystring.split(separators.parameter)
             for pair in variable_pairs:
                 if not pair:
                     continue
-                key, _, value = pair.partition(settings.URI_QUERY_VARIABLE_SEPARATOR)
+                key, _, value = pair.partition(separators.variable)
                 key = unquote(key)
                 value = unquote(value)
                 query[key] = [value] if value else []
 
-        scheme, _, path = base.rpartition(settings.URI_SCHEME_SEPARATOR)
-        namespace, _, path = path.rpartition(settings.URI_NAMESPACE_SEPARATOR)
-        _path, _, ext = path.rpartition(settings.URI_EXT_SEPARATOR)
+        scheme, _, path = base.rpartition(separators.scheme)
+        namespace, _, path = path.rpartition(separators.namespace)
+        _path, _, ext = path.rpartition(separators.ext)
         if '/' in ext:
             ext = ''
         else:
@@ -49,50 +144,61 @@ class URI(six.text_type):
             path, ext = ext, ''
 
         return cls._render(
-            scheme or settings.URI_DEFAULT_SCHEME,
+            scheme or separators.default_scheme,
             namespace or None,
             path,
             ext or None,
             version or None,
-            query or None
+            query or None,
+            separators
         )
 
     @classmethod
-    def _render(cls, scheme, namespace, path, ext, version, query):
-        def parts_gen():
-            if scheme:
-                yield scheme
-                yield settings.URI_SCHEME_SEPARATOR
-            if namespace:
-                yield namespace
-                yield settings.URI_NAMESPACE_SEPARATOR
-            if path:
-                yield path
-                if ext:
-                    yield settings.URI_EXT_SEPARATOR
-                    yield ext
-                if query:
-                    yield settings.URI_QUERY_SEPARATOR
-                    for i, (key, value) in enumerate(query.items()):
-                        if i:
-                            yield settings.URI_QUERY_PARAMETER_SEPARATOR
-                        yield quote(key)
-                        yield settings.URI_QUERY_VARIABLE_SEPARATOR
-                        if value:
-                            yield quote(value[0])
-                if version:
-                    yield settings.URI_VERSION_SEPARATOR
-                    yield version
-
-        uri = six.text_type.__new__(cls, u''.join(parts_gen()))
-        uri.scheme = scheme
-        uri.namespace = namespace
+    def _render(cls, scheme, namespace, path, ext, version, query, separators=None):
+        if separators is None:
+            separators = parser.separators
+
+        # Freeze query mapping into pairs of key and tuple of values, frozen ones are shared as is
+        if query is not None and not isinstance(query, tuple):
+            query = tuple((key, tuple(value)) for key, value in query.items())
+
+        parts = []
+        if scheme:
+            parts.append(scheme)
+            parts.append(separators.scheme)
+        if namespace:
+            parts.append(namespace)
+            parts.append(separators.namespace)
+        if path:
+            parts.append(path)
+            if ext:
+                parts.append(separators.ext)
+                parts.append(ext)
+            if query:
+                parts.append(separators.query)
+                parts.append(separators.parameter.join(
+                    quote(key) + separators.variable + (quote(value[0]) if value else '')
+                    for key, value in query
+                ))
+            if version:
+                parts.append(separators.version)
+                parts.append(version)
+
+        uri = six.text_type.__new__(cls, ''.join(parts))
+        uri.scheme = intern_part(scheme)
+        uri.namespace = intern_part(namespace)
         uri.path = path
-        uri.ext = ext
+        uri.ext = intern_part(ext)
         uri.version = version
-        uri.query = dict(query) if query is not None else None
+        uri._query = query
         return uri
 
+    @property
+    def query(self):
+        query = self._query
+        if query is not None:
+            return dict((key, list(value)) for key, value in query)
+
     def is_absolute(self):
         """
         Validates that uri contains all parts except version
@@ -103,9 +209,15 @@ class URI(six.text_type):
         return not any(getattr(self, part, None) is None for part in parts)
 
     def clone(self, **parts):
-        part = lambda part: parts.get(part, getattr(self, part))
-        args = (part(p) for p in ('scheme', 'namespace', 'path', 'ext', 'version', 'query'))
-        return URI._render(*args)
+        get = parts.get
+        return URI._render(
+            get('scheme', self.scheme),
+            get('namespace', self.namespace),
+            get('path', self.path),
+            get('ext', self.ext),
+            get('version', self.version),
+            get('query', self._query)
+        )
 
     class Invalid(Exception):
         pass
@@ -125,3 +237,6 @@ def unquote(string):
     if isinstance(string, six.binary_type):
         string = string.decode('utf-8')
     return string
+
+
+parser = URIParser()
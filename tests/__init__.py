@@ -1,4 +1,5 @@
 import json
+import threading
 import six
 
 if six.PY2:
@@ -128,4 +129,73 @@ class ReplacerPlugin(BasePlugin):
 
     def render_node(self, node, data):
         node.uri = node.uri.clone(path="page/rendered.rpl")
-        return self.render(data)
\ No newline at end of file
+        return self.render(data)
+
+class FakeMemcachedServer(object):
+    """
+    Minimal in-process memcached text protocol server (get, set, add, incr, delete, flush_all) for tests.
+    """
+
+    def __init__(self):
+        from six.moves import socketserver
+
+        data = self.data = {}
+
+        class Handler(socketserver.StreamRequestHandler):
+
+            def handle(self):
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        break
+                    command = line.strip().split(b' ')
+                    if command[0] == b'get':
+                        for key in command[1:]:
+                            if key in data:
+                                flags, value = data[key]
+                                self.wfile.write(b'VALUE ' + key + b' ' + flags + b' ' +
+                                                 str(len(value)).encode('ascii') + b'\r\n' + value + b'\r\n')
+                        self.wfile.write(b'END\r\n')
+                    elif command[0] == b'set':
+                        value = self.rfile.read(int(command[4]) + 2)[:-2]
+                        data[command[1]] = (command[2], value)
+                        self.wfile.write(b'STORED\r\n')
+                    elif command[0] == b'add':
+                        value = self.rfile.read(int(command[4]) + 2)[:-2]
+                        if command[1] in data:
+                            self.wfile.write(b'NOT_STORED\r\n')
+                        else:
+                            data[command[1]] = (command[2], value)
+                            self.wfile.write(b'STORED\r\n')
+                    elif command[0] == b'incr':
+                        if command[1] in data:
+                            flags, value = data[command[1]]
+                            value = str(int(value) + int(command[2])).encode('ascii')
+                            data[command[1]] = (flags, value)
+                            self.wfile.write(value + b'\r\n')
+                        else:
+                            self.wfile.write(b'NOT_FOUND\r\n')
+                    elif command[0] == b'delete':
+                        self.wfile.write(b'DELETED\r\n' if data.pop(command[1], None) else b'NOT_FOUND\r\n')
+                    elif command[0] == b'flush_all':
+                        data.clear()
+                        self.wfile.write(b'OK\r\n')
+                    else:
+                        self.wfile.write(b'ERROR\r\n')
+
+        class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server(('127.0.0.1', 0), Handler)
+        self.address = '%s:%s' % self.server.server_address
+
+    def start(self):
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={'poll_interval': 0.01})
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
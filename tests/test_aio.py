@@ -0,0 +1,228 @@
+import os
+import six
+import subprocess
+import sys
+import threading
+import unittest
+from functools import partial
+from cio.backends import cache, storage
+from cio.conf import settings
+from cio.conf.exceptions import ImproperlyConfigured
+from cio.pipeline import pipeline
+from cio.pipeline.pipes.base import BasePipe
+from tests import BaseTest
+
+if six.PY3:
+    import asyncio
+    from cio import aio
+    from cio.aio.executor import executor
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover
+    contextvars = None
+
+
+def upper(response):
+    for node in response.values():
+        node.content = node.content.upper()
+    return response
+
+
+@unittest.skipIf(six.PY2, 'asyncio api requires Python 3.5+')
+class AsyncApiTest(BaseTest):
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    def setUp(self):
+        super(AsyncApiTest, self).setUp()
+        # Blocking storage is used from executor threads
+        self.storage = settings.STORAGE
+        settings.configure(STORAGE={'BACKEND': 'sqlite://:memory:', 'OPTIONS': {'check_same_thread': False}})
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        asyncio.set_event_loop(None)
+        self.loop.close()
+        settings.configure(STORAGE=self.storage)
+
+    def run_async(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def test_api(self):
+        node = self.run_async(aio.aset('i18n://sv-se@label/email.txt', u'e-post'))
+        self.assertEqual(node.uri, 'i18n://sv-se@label/email.txt#1')
+
+        node = self.run_async(aio.aget('label/email'))
+        self.assertEqual(node.uri, 'i18n://sv-se@label/email.txt#1')
+        self.assertEqual(node.content, u'e-post')
+
+        node = self.run_async(aio.aset('i18n://sv-se@label/email.txt', u'epost', publish=False))
+        self.assertEqual(node.uri, 'i18n://sv-se@label/email.txt#draft')
+        node = self.run_async(aio.aload('sv-se@label/email'))
+        self.assertEqual(node['content'], u'epost')
+
+        node = self.run_async(aio.apublish('i18n://sv-se@label/email.txt'))
+        self.assertEqual(node.uri, 'i18n://sv-se@label/email.txt#2')
+        self.assertEqual(self.run_async(aio.aget('label/email')).content, u'epost')
+
+        revisions = self.run_async(aio.arevisions('i18n://sv-se@label/email'))
+        self.assertEqual(len(revisions), 2)
+        self.assertListEqual(self.run_async(aio.asearch('i18n://sv-se@label/')), ['i18n://sv-se@label/email.txt'])
+
+        uris = self.run_async(aio.adelete('i18n://sv-se@label/email#1', 'i18n://sv-se@label/email#2'))
+        self.assertEqual(len(uris), 2)
+        self.assertIsNone(self.run_async(aio.aget('label/email')).content)
+
+    def test_pipeline(self):
+        threads = set()
+
+        class AsyncPipe(BasePipe):
+            # Blocking handler run in executor
+            def get_request(self, request):
+                threads.add(threading.current_thread())
+
+            # Coroutine handler awaited
+            get_response = staticmethod(partial(executor.run, upper))
+
+        settings.configure(PIPELINE=[AsyncPipe] + settings.PIPELINE)
+        try:
+            storage.set('i18n://sv-se@label/email.txt#draft', u'e-post')
+            storage.publish('i18n://sv-se@label/email.txt#draft')
+
+            nodes = self.run_async(asyncio.gather(aio.aget('label/email'), aio.aget('label/surname', u'efternamn')))
+            self.assertListEqual([node.content for node in nodes], [u'E-POST', u'EFTERNAMN'])
+            self.assertNotIn(threading.current_thread(), threads)
+        finally:
+            settings.configure(PIPELINE=settings.PIPELINE[1:])
+
+        # Executor is bounded and recreated when settings change
+        max_workers = settings.ASYNC_MAX_WORKERS
+        settings.configure(ASYNC_MAX_WORKERS=2)
+        self.assertEqual(executor.executor._max_workers, 2)
+        settings.configure(ASYNC_MAX_WORKERS=max_workers)
+
+    def test_thread_safe_storage(self):
+        with settings(STORAGE={'BACKEND': 'sqlite://:memory:'}):
+            with self.assertRaises(ImproperlyConfigured):
+                self.run_async(aio.aget('label/email'))
+            with self.assertRaises(ImproperlyConfigured):
+                self.run_async(aio.asearch())
+
+    @unittest.skipIf(contextvars is None, 'contextvars requires Python 3.7+')
+    def test_executor_context(self):
+        var = contextvars.ContextVar('var', default=None)
+        seen = []
+
+        class ContextPipe(BasePipe):
+            def get_request(self, request):
+                seen.append(var.get())
+
+        # Task of request runs within a copy of current context
+        context = contextvars.copy_context()
+        context.run(var.set, 'request')
+
+        settings.configure(PIPELINE=[ContextPipe] + settings.PIPELINE)
+        try:
+            context.run(self.run_async, aio.aget('label/email'))
+        finally:
+            settings.configure(PIPELINE=settings.PIPELINE[1:])
+        self.assertListEqual(seen, ['request'])
+
+    def test_executor_segments(self):
+        calls = []
+        run = executor.run
+
+        def counting_run(func, *args, **kwargs):
+            calls.append(func)
+            return run(func, *args, **kwargs)
+
+        class AsyncPipe(BasePipe):
+            get_response = staticmethod(partial(run, upper))
+
+        storage.set('i18n://sv-se@label/email.txt#draft', u'e-post')
+        storage.publish('i18n://sv-se@label/email.txt#draft')
+
+        executor.run = counting_run
+        try:
+            # Blocking pipes run in a single executor call
+            self.run_async(aio.aget('label/email'))
+            self.assertEqual(len(calls), 1)
+
+            # Blocking pipes before a coroutine pipe run in one call on request and one on response
+            del calls[:]
+            settings.configure(PIPELINE=settings.PIPELINE[:2] + [AsyncPipe] + settings.PIPELINE[2:])
+            try:
+                cache.clear()
+                node = self.run_async(aio.aget('label/email'))
+                self.assertEqual(node.content, u'E-POST')
+                self.assertEqual(len(calls), 3)
+            finally:
+                settings.configure(PIPELINE=[pipe for pipe in settings.PIPELINE if pipe is not AsyncPipe])
+        finally:
+            del executor.run
+
+    def test_tracing_failure(self):
+        from cio.pipeline.tracing import SpanListener
+
+        def fail(request):
+            raise ValueError('failing')
+
+        class FailingPipe(BasePipe):
+            # Coroutine handler awaited
+            get_request = staticmethod(partial(executor.run, fail))
+
+        spans = []
+        span_listener = SpanListener(spans.append)
+        pipeline.tracer.add_listener(span_listener)
+        try:
+            settings.configure(PIPELINE=settings.PIPELINE + [FailingPipe])
+            try:
+                with self.assertRaises(ValueError):
+                    self.run_async(aio.aget('label/email'))
+            finally:
+                settings.configure(PIPELINE=settings.PIPELINE[:-1])
+        finally:
+            pipeline.tracer.remove_listener(span_listener)
+
+        self.assertEqual(len(spans), 1)
+        self.assertIsInstance(spans[0].tags['error'], ValueError)
+        self.assertListEqual(span_listener._state.stack, [])
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'context local storage requires Python 3.7+')
+    def test_context_local_storage(self):
+        # Local storage is chosen at import, therefore run in a fresh interpreter
+        script = """
+import asyncio
+from cio.conf import settings
+from cio.conf.exceptions import ImproperlyConfigured
+settings.configure(
+    LOCAL_STORAGE='context',
+    ENVIRONMENT={'default': {'i18n': 'sv-se', 'l10n': 'local', 'g11n': 'global'}},
+    STORAGE={'BACKEND': 'sqlite://:memory:', 'OPTIONS': {'check_same_thread': False}}
+)
+import cio
+from cio.aio.executor import executor
+from cio.pipeline import pipeline
+
+cio.set('i18n://sv-se@title.txt', u'Titel')
+cio.set('i18n://en-us@title.txt', u'Title')
+
+async def request(i18n, delay):
+    with cio.env(i18n=i18n), settings.override(TENANT=i18n):
+        node = cio.get('title')
+        await asyncio.sleep(delay)
+        assert len(pipeline._buffer) == 1
+        # Overridden settings are task local, and seen by executor threads
+        tenant = await executor.run(lambda: settings.TENANT)
+        return cio.env.i18n[0], str(node), settings.TENANT, tenant
+
+async def main():
+    return await asyncio.gather(request('sv-se', 0.02), request('en-us', 0.01))
+
+print(sorted(asyncio.run(main())))
+"""
+        output = subprocess.check_output([sys.executable, '-c', script], cwd=self.root)
+        self.assertEqual(output.strip(),
+                         b"[('en-us', 'Title', 'en-us', 'en-us'), ('sv-se', 'Titel', 'sv-se', 'sv-se')]")
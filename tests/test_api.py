@@ -4,7 +4,10 @@ import threading
 from cio.backends import cache
 from cio.conf import settings
 from cio.conf.exceptions import ImproperlyConfigured
+from cio.environment import env
+from cio.node import Node
 from cio.pipeline import pipeline
+from cio.pipeline.pipes.base import BasePipe
 from cio.backends import storage
 from cio.backends.exceptions import NodeDoesNotExist
 from cio.utils.uri import URI
@@ -253,13 +256,273 @@ class ApiTest(BaseTest):
         self.assertEqual(six.text_type(node1), u'Title1')
         self.assertEqual(six.text_type(node2), u'Title2')  # Second node not buffered, therefore unique default content
 
+    def test_batch(self):
+        cio.set('i18n://sv-se@label/email.txt', u'epost')
+        cio.set('i18n://sv-se@label/surname.txt', u'efternamn')
+        cache.clear()
+
+        with self.assertDB(calls=2, selects=2), self.assertCache(calls=2, misses=2, sets=2):
+            with cio.batch():
+                node1 = cio.get('label/email', lazy=False)
+                with cio.batch():
+                    node2 = cio.get('label/surname', lazy=False)
+                self.assertEqual(len(pipeline._buffer), 2)  # Nested batch exit does not flush
+            self.assertEqual(len(pipeline._buffer), 0)
+            self.assertEqual(node1.content, u'epost')
+            self.assertEqual(node2.content, u'efternamn')
+
+        # Forced access flushes within batch
+        with cio.batch():
+            node1 = cio.get('label/email', lazy=False)
+            self.assertEqual(node1.content, u'epost')
+            node2 = cio.get('label/surname', lazy=False)
+            self.assertEqual(len(pipeline._buffer), 1)
+        self.assertEqual(len(pipeline.history.list('get')), 4)
+
+    def test_get_many(self):
+        cio.set('i18n://sv-se@label/email.txt', u'epost')
+
+        with self.assertDB(calls=1, selects=1), self.assertCache(calls=2, hits=1, misses=1):
+            nodes = cio.get_many(['label/email', 'i18n://sv-se@label/email', 'label/surname'], default=u'Default')
+
+        self.assertListEqual(sorted(nodes.keys()), ['i18n://sv-se@label/email', 'label/email', 'label/surname'])
+        self.assertIs(nodes['label/email'], nodes['i18n://sv-se@label/email'])
+        self.assertEqual(nodes['label/email'].content, u'epost')
+        self.assertEqual(nodes['label/surname'].content, u'Default')
+
+        # Uris resolving to the same missing node share node and default
+        nodes = cio.get_many(['label/zipcode', 'i18n://sv-se@label/zipcode'], default=u'Postnummer')
+        self.assertIs(nodes['label/zipcode'], nodes['i18n://sv-se@label/zipcode'])
+        self.assertEqual(nodes['i18n://sv-se@label/zipcode'].content, u'Postnummer')
+
+    def test_prefetch(self):
+        def view(*uris):
+            with cio.prefetch('view'):
+                return [cio.get(uri, u'default').content for uri in uris]
+
+        # Disabled by default
+        with cio.prefetch('view'):
+            self.assertFalse(pipeline.prefetcher.active)
+
+        settings.configure(PREFETCH={'DECAY': 0.5, 'MIN_SCORE': 0.3})
+        try:
+            cio.set('i18n://sv-se@label/email.txt', u'epost')
+            cio.set('i18n://sv-se@label/surname.txt', u'efternamn')
+            cache.clear()
+
+            # First request learns fetched nodes, flushing one at a time
+            with self.assertCache(calls=6):
+                self.assertListEqual(view('label/email', 'label/surname', 'label/zipcode'),
+                                     [u'epost', u'efternamn', u'default'])
+            self.assertEqual(len(pipeline.prefetcher.manifest('view')), 3)
+
+            # Next request prefetches the whole manifest with first flush
+            with self.assertCache(calls=1, hits=3):
+                self.assertListEqual(view('label/email', 'label/surname', 'label/zipcode'),
+                                     [u'epost', u'efternamn', u'default'])
+
+            # Nodes not fetched again decays and are forgotten
+            for _ in range(2):
+                view('label/email')
+            self.assertEqual(len(pipeline.prefetcher.manifest('view')), 3)
+            view('label/email')
+            self.assertListEqual(pipeline.prefetcher.manifest('view'), [('label/email', u'default', env.state)])
+        finally:
+            settings.configure(PREFETCH=None)
+
+    def test_prefetch_environment(self):
+        def view():
+            with cio.prefetch('view'):
+                title = cio.get('page/title').content
+                with cio.env(i18n='en'):
+                    return title, cio.get('page/title').content
+
+        settings.configure(PREFETCH={})
+        try:
+            cio.set('i18n://sv-se@page/title.txt', u'Hej')
+            cio.set('i18n://en@page/title.txt', u'Hello')
+
+            # Nodes are prefetched per environment they were fetched in
+            self.assertTupleEqual(view(), (u'Hej', u'Hello'))
+            self.assertEqual(len(pipeline.prefetcher.manifest('view')), 2)
+            with self.assertCache(calls=1, hits=2):
+                self.assertTupleEqual(view(), (u'Hej', u'Hello'))
+        finally:
+            settings.configure(PREFETCH=None)
+
+    def test_history(self):
+        history = settings.HISTORY
+        settings.configure(HISTORY={'MODE': 'ring', 'MAX_SIZE': 3})
+        try:
+            cio.set('i18n://sv-se@label/email.txt', u'epost')
+            cache.clear()
+            pipeline.clear()
+
+            cio.get('label/email', lazy=False)
+            cio.get('label/email', lazy=False)
+            cio.get('label/surname', lazy=False)
+            records = pipeline.history.records('get')
+            self.assertListEqual([(record.uri, record.pipe) for record in records], [
+                ('i18n://sv-se@label/email.txt#1', 'StoragePipe'),
+                ('i18n://sv-se@label/email.txt#1', 'CachePipe'),
+                ('i18n://sv-se@label/surname.txt', None),
+            ])
+            self.assertTrue(all(record.duration >= 0 for record in records))
+            self.assertFalse(any(isinstance(field, Node) for record in records for field in record))
+
+            # Deprecated list of nodes is rebuilt from records
+            with self.assertWarns(DeprecationWarning):
+                nodes = pipeline.history.list('get')
+            self.assertListEqual([node.uri for node in nodes], [record.uri for record in records])
+
+            # Ring buffer is bounded
+            cio.get('label/surname', lazy=False)
+            self.assertEqual(len(pipeline.history), 3)
+            self.assertEqual(pipeline.history.records('get')[0].pipe, 'CachePipe')
+
+            settings.configure(HISTORY={'MODE': 'sample', 'SAMPLE_RATE': 0})
+            cio.get('label/email', lazy=False)
+            self.assertEqual(len(pipeline.history), 0)
+
+            settings.configure(HISTORY={'MODE': 'off'})
+            cio.get('label/email', lazy=False)
+            self.assertEqual(len(pipeline.history), 0)
+
+            settings.HISTORY = {'MODE': 'bogus'}
+            self.assertRaises(ImproperlyConfigured, pipeline.history.load)
+        finally:
+            settings.configure(HISTORY=history)
+
+    def test_tracing(self):
+        from cio.pipeline.tracing import HistogramListener, SpanListener
+
+        cio.set('i18n://sv-se@label/email.txt', u'epost')
+        cache.clear()
+
+        # No listeners leaves handlers unwrapped
+        self.assertEqual(pipeline._handlers['get'][0][0].__self__.__class__.__name__, 'CachePipe')
+
+        histogram = HistogramListener()
+        spans = []
+        span_listener = SpanListener(spans.append)
+        pipeline.tracer.add_listener(histogram)
+        pipeline.tracer.add_listener(span_listener)
+        try:
+            cio.get('label/email', lazy=False)
+            cio.get('label/email', lazy=False)
+        finally:
+            pipeline.tracer.remove_listener(histogram)
+            pipeline.tracer.remove_listener(span_listener)
+
+        stats = histogram.stats()
+        cache_stats = stats[('get', 'CachePipe', 'request')]
+        self.assertEqual(cache_stats['count'], 2)
+        self.assertEqual(cache_stats['served'], 1)
+        self.assertEqual(sum(cache_stats['buckets']), 2)
+        storage_stats = stats[('get', 'StoragePipe', 'request')]
+        self.assertEqual(storage_stats['count'], 1)
+        self.assertEqual(storage_stats['nodes_in'], 1)
+        self.assertEqual(storage_stats['nodes_out'], 0)
+        self.assertEqual(storage_stats['served'], 1)
+
+        self.assertEqual(len(spans), 2)
+        self.assertEqual(spans[0].name, 'cio.get')
+        self.assertListEqual([span.name for span in spans[1].children], ['CachePipe.get_request'])
+        self.assertTupleEqual(spans[1].children[0].tags['served'], ('i18n://sv-se@label/email',))
+
+    def test_tracing_failure(self):
+        from cio.pipeline.tracing import SpanListener
+
+        class FailingPipe(BasePipe):
+            def get_request(self, request):
+                raise ValueError('failing')
+
+        spans = []
+        span_listener = SpanListener(spans.append)
+        pipeline.tracer.add_listener(span_listener)
+        try:
+            settings.configure(PIPELINE=settings.PIPELINE + [FailingPipe])
+            try:
+                self.assertRaises(ValueError, cio.get, 'label/email', lazy=False)
+            finally:
+                settings.configure(PIPELINE=settings.PIPELINE[:-1])
+            cio.get('label/email', lazy=False)
+        finally:
+            pipeline.tracer.remove_listener(span_listener)
+
+        # Failing send is closed, leaving no parent span for later sends
+        self.assertEqual(len(spans), 2)
+        self.assertIsInstance(spans[0].tags['error'], ValueError)
+        self.assertNotIn('error', spans[1].tags)
+        self.assertListEqual(span_listener._state.stack, [])
+
+    def test_buffer_flush_policy(self):
+        buffer = settings.BUFFER
+        settings.configure(BUFFER={'MAX_NODES': 4, 'READ_AHEAD': 1})
+        try:
+            for i in range(5):
+                cio.set('i18n://sv-se@label/%d.txt' % i, u'%d' % i)
+            cache.clear()
+
+            # Buffer is flushed when bound of nodes is reached
+            with self.assertCache(calls=2, misses=3, sets=3):
+                nodes = [cio.get('label/%d' % i) for i in (0, 0, 1, 2)]
+                self.assertEqual(len(pipeline._buffer), 0)
+                self.assertListEqual([node.content for node in nodes], [u'0', u'0', u'1', u'2'])
+
+            # Access only flushes node and oldest read ahead
+            nodes = [cio.get('label/%d' % i) for i in (2, 3, 4)]
+            self.assertEqual(len(pipeline._buffer), 3)
+            with self.assertCache(calls=2, hits=1, misses=1):
+                self.assertEqual(nodes[2].content, u'4')
+                self.assertEqual(len(pipeline._buffer), 1)
+            self.assertListEqual([node.content for node in nodes], [u'2', u'3', u'4'])
+            self.assertEqual(len(pipeline._buffer), 0)
+        finally:
+            settings.configure(BUFFER=buffer)
+
+    def test_compact_node(self):
+        from cio.node import Node
+
+        with settings(NODE_COMPACT=True):
+            node = Node('page/title', u'default')
+            self.assertFalse(hasattr(node, '__dict__'))
+            node.uri = node.uri.clone(namespace='sv-se')
+            node.uri = node.uri.clone(ext='txt')
+            node.uri = node.uri.clone(version='1')
+            node.content = u'Title'
+            node.content = u'TITLE'
+            self.assertListEqual(node._uri, ['page/title', 'i18n://sv-se@page/title', 'i18n://sv-se@page/title.txt#1'])
+            self.assertEqual(node.namespace_uri, 'i18n://sv-se@page/title')
+            self.assertEqual(node.initial_uri, 'page/title')
+            self.assertListEqual(node._content, [u'default', u'TITLE'])
+            self.assertEqual(node.initial, u'default')
+
+            # Scheme, namespace and extension parts are shared
+            self.assertIs(URI('i18n://sv-se@a.txt').namespace, URI('i18n://sv-se@b.txt').namespace)
+
+        # Buffered node proxies without the slots of a node
+        from cio.pipeline.buffer import BufferedNode
+        buffered_node = cio.get('page/title', u'default')
+        self.assertFalse(hasattr(buffered_node, '__dict__'))
+        self.assertFalse(hasattr(BufferedNode, '_uri'))
+        self.assertIsInstance(buffered_node, Node)
+        self.assertEqual(buffered_node.env, env.state)
+        self.assertEqual(six.text_type(buffered_node), u'default')
+        self.assertEqual(buffered_node.render(), u'default')
+        self.assertDictEqual(buffered_node.for_json(), {
+            'uri': 'i18n://sv-se@page/title.txt', 'content': u'default', 'meta': {}
+        })
+        self.assertIsInstance(cio.get('page/body', lazy=False), Node)
+
     def test_fallback(self):
         with cio.env(i18n=('sv-se', 'en-us', 'en-uk')):
             cio.set('i18n://bogus@label/email.txt', u'epost')
             cio.set('i18n://en-uk@label/surname.txt', u'surname')
 
+            # Primary namespace per node and all fallback levels at once
             with self.assertCache(misses=2, sets=2):
-                with self.assertDB(calls=6, selects=6):
+                with self.assertDB(calls=3, selects=3):
                     node1 = cio.get('i18n://label/email')
                     node2 = cio.get('i18n://label/surname', u'efternamn')
                     self.assertEqual(node1.uri.namespace, 'sv-se')  # No fallback, stuck on first namespace, sv-se
@@ -272,7 +535,7 @@ class ApiTest(BaseTest):
             cache.clear()
 
             with self.assertCache(misses=2, sets=2):
-                with self.assertDB(calls=6):
+                with self.assertDB(calls=4):
                     cio.get('i18n://label/email', lazy=False)
                     cio.get('i18n://label/surname', u'lastname', lazy=False)
 
@@ -335,7 +598,7 @@ class ApiTest(BaseTest):
                     node3 = cio.get('i18n://monkey@label/zipcode', default=u'postnummer')
 
             # with self.assertDB(calls=2), self.assertCache(calls=5, hits=1, misses=2, sets=2):
-            with self.assertDB(calls=4, selects=4):
+            with self.assertDB(calls=3, selects=3):
                 with self.assertCache(calls=2, hits=1, misses=2, sets=2):
                     self.assertEqual(six.text_type(node1), u'epost')
                     self.assertEqual(node2.content, u'surname')
@@ -365,6 +628,35 @@ class ApiTest(BaseTest):
         with self.assertRaises(ImportError):
             pipeline.add_pipe('foo.Bar')
 
+    def test_method_pipeline(self):
+        pipeline_config = settings.PIPELINE
+        try:
+            # Read-only pipeline
+            settings.configure(PIPELINE={'get': [
+                'cio.pipeline.pipes.cache.CachePipe',
+                'cio.pipeline.pipes.storage.StoragePipe'
+            ]})
+            self.assertEqual(len(pipeline.pipes), 2)
+            self.assertEqual(len(pipeline.method_pipes['set']), 0)
+            storage.set('i18n://sv-se@label/email.txt#draft', u'e-post')
+            storage.publish('i18n://sv-se@label/email.txt#draft')
+
+            with self.assertDB(calls=0), self.assertCache(calls=0):
+                node = cio.set('i18n://sv-se@label/email.txt', u'epost')
+                self.assertEqual(node.uri, 'i18n://sv-se@label/email.txt#draft')
+
+            with self.assertDB(calls=1, selects=1):
+                self.assertEqual(cio.get('label/email', lazy=False).content, u'e-post')
+
+            settings.configure(PIPELINE={'foo': []})
+            with self.assertRaises(ImproperlyConfigured):
+                pipeline.load()
+        finally:
+            settings.configure(PIPELINE=pipeline_config)
+
+        self.assertEqual(len(pipeline.pipes), len(pipeline_config))
+        self.assertEqual(len(pipeline.method_pipes['set']), len(pipeline_config))
+
     def test_unknown_plugin(self):
         with self.assertRaises(ImproperlyConfigured):
             cio.set('i18n://sv-se@foo/bar.baz#draft', 'raise')
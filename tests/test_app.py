@@ -37,6 +37,69 @@ class AppTest(BaseTest):
         self.assertEqual(settings.STORAGE['PIPE']['FOO'], 'bar')
         self.assertNotIn('HAM', settings.STORAGE['PIPE'])
 
+    def test_settings_snapshot(self):
+        snapshot = settings.snapshot
+        self.assertIs(settings.snapshot, snapshot)
+        self.assertEqual(snapshot.URI_DEFAULT_EXT, settings.URI_DEFAULT_EXT)
+        self.assertEqual(snapshot['URI_DEFAULT_EXT'], settings.URI_DEFAULT_EXT)
+        with self.assertRaises(AttributeError):
+            snapshot.URI_DEFAULT_EXT = 'md'
+
+        # Rebuilt when settings change
+        with settings(URI_DEFAULT_EXT='md'):
+            self.assertEqual(settings.snapshot.URI_DEFAULT_EXT, 'md')
+            settings.URI_DEFAULT_EXT = 'html'
+            self.assertEqual(settings.snapshot.URI_DEFAULT_EXT, 'html')
+        self.assertEqual(settings.snapshot.URI_DEFAULT_EXT, 'txt')
+
+        def assert_local_thread_snapshot():
+            settings.configure(local=True, URI_DEFAULT_EXT='md')
+            local_snapshot = settings.snapshot
+            self.assertEqual(local_snapshot.URI_DEFAULT_EXT, 'md')
+            self.assertIs(settings.snapshot, local_snapshot)
+            snapshots.append(local_snapshot)
+
+        snapshots = []
+        thread = threading.Thread(target=assert_local_thread_snapshot)
+        thread.start()
+        thread.join()
+
+        self.assertEqual(snapshots[0].URI_DEFAULT_EXT, 'md')
+        self.assertEqual(settings.snapshot.URI_DEFAULT_EXT, 'txt')
+
+    def test_settings_watch(self):
+        from cio.backends import storage
+
+        calls = []
+        any_listener = lambda: calls.append('any')
+        ext_listener = lambda: calls.append('ext')
+        settings.watch(any_listener)
+        settings.watch(ext_listener, keys=('URI_DEFAULT_EXT',))
+
+        backend = storage.backend
+        settings.configure(URI_DEFAULT_EXT=settings.URI_DEFAULT_EXT)
+        self.assertListEqual(calls, ['any'])
+        with settings(URI_DEFAULT_EXT='md'):
+            self.assertListEqual(sorted(calls), ['any', 'any', 'ext'])
+        self.assertEqual(calls.count('ext'), 2)  # Restored
+        self.assertIs(storage.backend, backend)
+
+        # Override scope is thread local and notifies no one
+        del calls[:]
+        with settings.override(URI_DEFAULT_EXT='md', STORAGE={'PIPE': {'HAM': 'spam'}}):
+            self.assertEqual(settings.snapshot.URI_DEFAULT_EXT, 'md')
+            self.assertEqual(settings.STORAGE['PIPE']['HAM'], 'spam')
+            with settings.override(URI_DEFAULT_EXT='html'):
+                self.assertEqual(settings.URI_DEFAULT_EXT, 'html')
+            self.assertEqual(settings.URI_DEFAULT_EXT, 'md')
+        self.assertEqual(settings.snapshot.URI_DEFAULT_EXT, 'txt')
+        self.assertNotIn('HAM', settings.STORAGE.get('PIPE', {}))
+        self.assertListEqual(calls, [])
+        self.assertIs(storage.backend, backend)
+
+        del settings._listeners[any_listener]
+        del settings._listeners[ext_listener]
+
     def test_environment(self):
         """
         'default': {
@@ -95,6 +158,7 @@ class AppTest(BaseTest):
                 buffered_node.flush()
                 self.assertEqual(len(pipeline._buffer), 0)
                 self.assertEqual(len(pipeline.history), 2)
-                self.assertListEqual(pipeline.history.list('get'), [node, buffered_node._node])
+                self.assertListEqual([record.uri for record in pipeline.history.records('get')],
+                                     [node.uri, buffered_node._node.uri])
 
         self.assertNotIn('bogus', settings.ENVIRONMENT.keys())
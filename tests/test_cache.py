@@ -1,7 +1,10 @@
 import cio
 import six
-from cio.backends import cache, storage
+from cio.backends import cache, get_backend, storage
 from cio.backends.exceptions import NodeDoesNotExist
+from cio.backends.serializers import BinarySerializer
+from cio.conf import settings
+from cio.conf.exceptions import ImproperlyConfigured
 from cio.utils.uri import URI
 from tests import BaseTest
 
@@ -80,3 +83,161 @@ class CacheTest(BaseTest):
                 'i18n://sv-se@foo': {'uri': 'i18n://sv-se@foo.txt#1', 'content': u'Foo'},
                 'i18n://sv-se@bar': {'uri': 'i18n://sv-se@bar.txt#2', 'content': u'Bar'}
             })
+
+    def test_cache_generations(self):
+        backend = get_backend('locmem://?GENERATIONS=true')
+        self.assertTrue(backend.generations)
+        self.assertFalse(get_backend('locmem://?GENERATIONS=false').generations)
+
+        uris = [URI('i18n://sv-se@foo.txt'), URI('i18n://sv-se@bar.txt'), URI('i18n://en@foo.txt')]
+        backend.set_many(dict((uri, u'content') for uri in uris))
+        self.assertEqual(len(backend.get_many(uris)), 3)
+
+        # Bump namespace generation
+        backend.bump_generation('i18n', 'sv-se')
+        self.assertListEqual(list(backend.get_many(uris).keys()), [uris[2]])
+        backend.set(uris[0], u'new content')
+        self.assertEqual(backend.get(uris[0])['content'], u'new content')
+
+        # Bump scheme generation
+        backend.bump_generation('i18n')
+        self.assertDictEqual(backend.get_many(uris), {})
+        self.assertIsNone(backend.get(uris[0]))
+
+        backend.set(uris[1], u'Bar')
+        backend.delete(uris[1])
+        self.assertIsNone(backend.get(uris[1]))
+
+        # Evicted generation is reseeded, not reset, hiding entries cached before eviction
+        backend.set(uris[2], u'Foo')
+        generation_key = backend._build_generation_key('i18n', 'en')
+        backend._delete(generation_key)
+        self.assertIsNone(backend.get(uris[2]))
+        self.assertGreater(int(backend._get(generation_key)), 1)
+
+        # Concurrently seeded generation is bumped
+        self.assertFalse(backend._add(generation_key, u'1'))
+        generation = backend._get(generation_key)
+        backend.bump_generation('i18n', 'en')
+        self.assertEqual(int(backend._get(generation_key)), int(generation) + 1)
+
+    def test_cache_generations_disabled(self):
+        cache.set(self.uri, u'epost')
+        with self.assertCache(calls=1, hits=1):
+            cache.get(self.uri)
+
+        # Without generations enabled, bumping falls back to clearing the cache
+        cache.bump_generation('i18n', 'en')
+        self.assertIsNone(cache.get(self.uri))
+
+    def test_cache_key(self):
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        sha1_key = '999bdd4445010c92b0e1bdb459130fe12729e88b'  # sha1('i18n://sv-se@label/email')
+
+        backend = get_backend('locmem://')
+        self.assertEqual(backend._build_cache_key(uri), sha1_key)
+        self.assertIn(uri, backend._key_memo)
+        self.assertEqual(backend._build_cache_key(uri), backend._build_cache_key(URI('i18n://sv-se@label/email')))
+
+        backend = get_backend('locmem://?KEY_MEMO_SIZE=0')
+        self.assertIsNone(backend._key_memo)
+        self.assertEqual(backend._build_cache_key(uri), get_backend('locmem://')._build_cache_key(uri))
+
+        if six.PY3:
+            backend = get_backend('locmem://?KEY_HASH=blake2b')
+            self.assertEqual(len(backend._build_cache_key(uri)), 32)
+
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend('locmem://?KEY_HASH=foo')
+
+    def test_cache_serializers(self):
+        serializer = BinarySerializer(COMPRESS_THRESHOLD=100)
+        uri = u'i18n://sv-se@label/email.txt#1'
+
+        for content in (u'e-post', u'', None, u'räksmörgås ' * 100):
+            value = serializer.dumps(uri, content)
+            self.assertIsInstance(value, six.binary_type)
+            self.assertTupleEqual(serializer.loads(value), (uri, content))
+
+        # Compressed above threshold
+        content = u'<p>Content-IO</p>' * 100
+        self.assertLess(len(serializer.dumps(uri, content)), len(content))
+        self.assertGreater(len(BinarySerializer().dumps(uri, content)), len(content))
+
+        # Unknown format version or garbage is treated as miss
+        value = serializer.dumps(uri, u'e-post')
+        self.assertTupleEqual(serializer.loads(b'\x02' + value[1:]), (None, None))
+        self.assertTupleEqual(serializer.loads(b'\x01'), (None, None))
+
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend({'BACKEND': 'locmem://', 'SERIALIZER': 'cio.backends.serializers.Bogus'})
+
+    def test_cache_binary_serializer(self):
+        backend = get_backend({
+            'BACKEND': 'locmem://',
+            'SERIALIZER': 'cio.backends.serializers.BinarySerializer',
+            'SERIALIZER_OPTIONS': {'COMPRESS_THRESHOLD': 10}
+        })
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        backend.set(uri, u'e-post' * 10)
+        self.assertIsInstance(backend._cache[backend._build_cache_key(uri)], six.binary_type)
+        self.assertDictEqual(backend.get(uri), {'uri': uri, 'content': u'e-post' * 10})
+
+        backend.set_many({uri: None})
+        self.assertDictEqual(backend.get_many([uri]), {uri: {'uri': uri, 'content': None}})
+
+    def test_cache_timeout(self):
+        uri = URI('i18n://sv-se@label/email.txt#draft')
+        cache.set(uri, u'e-post', timeout=60, versioned=True)
+        self.assertDictEqual(cache.get(uri, versioned=True), {'uri': uri, 'content': u'e-post'})
+        self.assertIsNone(cache.get(uri))
+
+        cache.set_many({uri: u'e-post'}, timeout=0, versioned=True)
+        self.assertIsNone(cache.get(uri, versioned=True))
+
+        with self.assertRaises(URI.Invalid):
+            cache.get('i18n://sv-se@label/email', versioned=True)
+
+    def test_cached_versions(self):
+        cache_config = dict(settings.CACHE)
+        try:
+            settings.configure(CACHE=dict(cache_config, PIPE={'CACHE_VERSIONS': True, 'DRAFT_TIMEOUT': 60}))
+
+            cio.set('i18n://sv-se@label/email.txt', u'e-post')
+            cio.set('i18n://sv-se@label/email.txt', u'epost', publish=False)
+
+            # Published revision cached on publish
+            with self.assertDB(calls=0):
+                with self.assertCache(calls=1, hits=1):
+                    node = cio.get('label/email#1', lazy=False)
+                    self.assertEqual(node.content, u'e-post')
+                    self.assertEqual(node.uri, 'i18n://sv-se@label/email.txt#1')
+
+            # Draft cached on first get
+            with self.assertDB(selects=1):
+                with self.assertCache(calls=2, misses=1, sets=1):
+                    self.assertEqual(cio.get('label/email#draft', lazy=False).content, u'epost')
+            with self.assertDB(calls=0):
+                with self.assertCache(calls=1, hits=1):
+                    node = cio.get('label/email#draft', lazy=False)
+                    self.assertEqual(node.content, u'epost')
+                    self.assertEqual(node.uri, 'i18n://sv-se@label/email.txt#draft')
+
+            # Set invalidates draft
+            cio.set('i18n://sv-se@label/email.txt', u'E-post', publish=False)
+            self.assertIsNone(cache.get('i18n://sv-se@label/email#draft', versioned=True))
+            self.assertEqual(cio.get('label/email#draft', lazy=False).content, u'E-post')
+
+            # Publish caches new revision and invalidates draft
+            cio.publish('i18n://sv-se@label/email')
+            self.assertIsNone(cache.get('i18n://sv-se@label/email#draft', versioned=True))
+            cached_node = cache.get('i18n://sv-se@label/email#2', versioned=True)
+            self.assertEqual(cached_node['content'], u'E-post')
+            self.assertEqual(cio.get('label/email#1', lazy=False).content, u'e-post')
+
+            # Delete invalidates revision
+            cio.delete('i18n://sv-se@label/email#1')
+            self.assertIsNone(cache.get('i18n://sv-se@label/email#1', versioned=True))
+            self.assertIsNone(cio.get('label/email#1', lazy=False).content)
+        finally:
+            settings.configure(CACHE=cache_config)
@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+from cio.backends import get_backend
+from cio.backends.disk import DiskCacheBackend
+from cio.conf.exceptions import ImproperlyConfigured
+from cio.utils.uri import URI
+from tests import BaseTest
+
+
+class DiskCacheTest(BaseTest):
+
+    def setUp(self):
+        super(DiskCacheTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.backend = get_backend('disk://%s/cache?MAX_SIZE=2000' % self.directory)
+
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.directory)
+
+    def test_backend(self):
+        self.assertIsInstance(self.backend, DiskCacheBackend)
+        self.assertEqual(self.backend.max_size, 2000)
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend('disk://')
+
+        journal_mode = self.backend._connection.execute('PRAGMA journal_mode').fetchone()[0]
+        self.assertEqual(journal_mode, 'wal')
+
+    def test_get_set_delete(self):
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        self.assertIsNone(self.backend.get(uri))
+
+        self.backend.set(uri, u'e-p\xf6st')
+        self.assertDictEqual(self.backend.get(uri), {'uri': uri, 'content': u'e-p\xf6st'})
+        size = self.backend.total_size
+        self.backend.set(uri, u'e-post')
+        self.assertEqual(self.backend.total_size, size - 1)
+
+        self.backend.delete(uri)
+        self.assertIsNone(self.backend.get(uri))
+        self.assertEqual(self.backend.total_size, 0)
+
+        # Expired values are misses
+        self.backend.set(uri, u'e-post', timeout=60)
+        self.assertIsNotNone(self.backend.get(uri))
+        self.backend.set(uri, u'e-post', timeout=-1)
+        self.assertIsNone(self.backend.get(uri))
+
+    def test_persistence(self):
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(10)]
+        self.backend.set_many(dict((uri, u'Title') for uri in uris))
+        self.backend.close()
+
+        # Warm restart
+        self.backend = get_backend('disk://%s/cache' % self.directory)
+        self.assertEqual(len(self.backend.get_many(uris)), 10)
+
+        self.backend.delete_many(uris[:5])
+        self.assertEqual(len(self.backend.get_many(uris)), 5)
+
+        self.backend.clear()
+        self.assertDictEqual(self.backend.get_many(uris), {})
+        self.assertEqual(self.backend.total_size, 0)
+
+    def test_generations(self):
+        backend = get_backend('disk://%s/generations?GENERATIONS=1' % self.directory)
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        backend.set(uri, u'e-post')
+        backend.bump_generation('i18n', 'sv-se')
+        self.assertIsNone(backend.get(uri))
+        backend.set(uri, u'epost')
+        self.assertEqual(backend.get(uri)['content'], u'epost')
+        backend.close()
+
+    def test_eviction(self):
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(30)]
+        for uri in uris:
+            self.backend.set(uri, u'x' * 100)
+
+        self.assertLessEqual(self.backend.total_size, 2000)
+        nodes = self.backend.get_many(uris)
+        self.assertLess(len(nodes), 30)
+        self.assertIn(uris[-1], nodes)
+        self.assertNotIn(uris[0], nodes)
+
+    def test_eviction_keeps_generations(self):
+        backend = get_backend('disk://%s/generations?GENERATIONS=1&MAX_SIZE=2000' % self.directory)
+        try:
+            uri = URI('i18n://sv-se@page/title.txt#1')
+            backend.set(uri, u'Title')
+            generations = backend._get_generations((uri,))
+
+            # Generations, written first, outlive culling of newer entries
+            for i in range(30):
+                backend.set(URI('i18n://sv-se@page/title%d.txt#1' % i), u'x' * 100)
+            self.assertLessEqual(backend.total_size, 2000)
+            self.assertDictEqual(backend._get_generations((uri,)), generations)
+        finally:
+            backend.close()
@@ -0,0 +1,81 @@
+import six
+from cio.backends import get_backend
+from cio.backends.memcached import MemcachedCacheBackend
+from cio.utils.uri import URI
+from tests import BaseTest, FakeMemcachedServer
+
+
+class MemcachedTest(BaseTest):
+
+    def setUp(self):
+        super(MemcachedTest, self).setUp()
+        self.server = FakeMemcachedServer().start()
+        self.backend = get_backend('memcached://%s?TIMEOUT=2&POOL_SIZE=2' % self.server.address)
+
+    def tearDown(self):
+        self.backend.pool.clear()
+        self.server.stop()
+
+    def test_backend(self):
+        self.assertIsInstance(self.backend, MemcachedCacheBackend)
+        self.assertEqual(self.backend.timeout, 2)
+        self.assertEqual(self.backend.pool.maxsize, 2)
+        self.assertEqual(get_backend('memcached://localhost').address, ('localhost', 11211))
+
+    def test_get_set_delete(self):
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        self.assertIsNone(self.backend.get(uri))
+
+        self.backend.set(uri, u'e-pöst')
+        self.assertDictEqual(self.backend.get(uri), {'uri': uri, 'content': u'e-pöst'})
+        self.assertIsInstance(list(self.server.data.values())[0][1], six.binary_type)
+
+        self.backend.delete(uri)
+        self.assertIsNone(self.backend.get(uri))
+        self.backend.delete(uri)
+
+    def test_many(self):
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(250)]
+        self.backend.set_many(dict((uri, u'Title %s' % uri.path) for uri in uris))
+        self.assertEqual(len(self.server.data), 250)
+
+        nodes = self.backend.get_many(uris + [URI('i18n://sv-se@page/missing.txt')])
+        self.assertEqual(len(nodes), 250)
+        self.assertEqual(nodes[uris[42]]['content'], u'Title page/title42')
+        self.assertEqual(len(self.backend.pool), 1)
+
+        self.backend.delete_many(uris[:100])
+        self.assertEqual(len(self.backend.get_many(uris)), 150)
+
+        self.backend.clear()
+        self.assertDictEqual(self.backend.get_many(uris), {})
+
+    def test_generations(self):
+        backend = get_backend('memcached://%s?GENERATIONS=1' % self.server.address)
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        backend.set(uri, u'e-post')
+        backend.bump_generation('i18n', 'sv-se')
+        self.assertIsNone(backend.get(uri))
+        backend.set(uri, u'epost')
+        self.assertEqual(backend.get(uri)['content'], u'epost')
+
+        generation_key = backend._build_generation_key('i18n', 'sv-se')
+        generation = backend._get(generation_key)
+        self.assertEqual(backend._incr(generation_key), six.text_type(int(generation) + 1))
+        self.assertIsNone(backend._incr('missing'))
+        self.assertFalse(backend._add(generation_key, u'1'))
+        self.assertTrue(backend._add('missing', u'1'))
+        backend.pool.clear()
+
+    def test_server_down(self):
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        self.backend.set(uri, u'e-post')
+        self.backend.pool.clear()
+        self.server.stop()
+
+        # Unreachable server fails open, as cache misses
+        self.assertIsNone(self.backend.get(uri))
+        self.backend.set(uri, u'e-post')
+        self.backend.delete(uri)
+        self.assertEqual(len(self.backend.pool), 0)
+        self.server = FakeMemcachedServer().start()
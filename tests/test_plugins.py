@@ -2,7 +2,7 @@ import cio
 from cio.conf import settings
 from cio.plugins import plugins
 from cio.plugins import md as md_module
-from cio.backends import storage
+from cio.backends import cache, storage
 from cio.plugins.exceptions import UnknownPlugin
 from cio.plugins.txt import TextPlugin
 from tests import BaseTest
@@ -82,3 +82,95 @@ class PluginTest(BaseTest):
 
     def test_markdown_handles_empty_data(self):
         markdown = plugins.get('md')
+
+    def test_prerender(self):
+        settings.configure(STORAGE={'BACKEND': 'sqlite://:memory:', 'PIPE': {'PRERENDER': True}})
+        markdown = plugins.get('md')
+
+        cio.set('sv-se@page/title.md', '# Title')
+        cio.publish('sv-se@page/title.md#draft')
+
+        stored_node = storage.get('sv-se@page/title.md', rendered=True)
+        rendered = stored_node['meta']['rendered']
+        self.assertEqual(rendered['content'], '<h1>Title</h1>')
+        self.assertEqual(rendered['signature'], markdown.signature('# Title'))
+        self.assertNotIn('rendered', storage.get('sv-se@page/title.md')['meta'])
+        stored_nodes = storage.get_many(['sv-se@page/title.md'])
+        self.assertNotIn('rendered', list(stored_nodes.values())[0]['meta'])
+        self.assertNotIn('rendered', cio.load('sv-se@page/title.md')['meta'])
+
+        # Plugins rendering content as is are not pre-rendered
+        cio.set('sv-se@page/body.txt', 'Body')
+        cio.publish('sv-se@page/body.txt#draft')
+        self.assertNotIn('rendered', storage.get('sv-se@page/body.txt', rendered=True)['meta'])
+
+        calls = []
+        render_node = markdown.render_node
+        markdown.render_node = lambda node, data: calls.append(node.uri) or render_node(node, data)
+        try:
+            cache.clear()
+            self.assertEqual(cio.get('page/title.md').content, '<h1>Title</h1>')
+            self.assertListEqual(calls, [])
+
+            # Changed plugin settings invalidates pre-rendered content
+            with settings(MD={'EXTENSIONS': ['markdown.extensions.toc']}):
+                cache.clear()
+                self.assertEqual(cio.get('page/title.md').content, '<h1 id="title">Title</h1>')
+            self.assertEqual(len(calls), 1)
+        finally:
+            del markdown.render_node
+
+    def test_signature(self):
+        import markdown as markdown_library
+        markdown = plugins.get('md')
+        signature = markdown.signature('# Title')
+        self.assertEqual(markdown.signature('# Title'), signature)
+        self.assertIn(markdown_library.__version__, markdown.version)
+
+        # Plugin class and version are part of signature
+        class MarkdownSubPlugin(md_module.MarkdownPlugin):
+            pass
+
+        class BumpedMarkdownPlugin(md_module.MarkdownPlugin):
+            version = 'bumped'
+
+        for plugin_class in (MarkdownSubPlugin, BumpedMarkdownPlugin):
+            plugin = plugin_class()
+            self.assertNotEqual(plugin.signature('# Title'), signature)
+            plugin.close()
+
+    def test_markdown_render_cache(self):
+        markdown = plugins.get('md')
+        md = markdown.get_markdown([])
+        self.assertIs(markdown.get_markdown([]), md)
+
+        calls = []
+        convert = md.convert
+        md.convert = lambda data: calls.append(data) or convert(data)
+        try:
+            self.assertEqual(markdown.render('# Cached'), '<h1>Cached</h1>')
+            self.assertEqual(markdown.render('# Cached'), '<h1>Cached</h1>')
+            self.assertListEqual(calls, ['# Cached'])
+
+            # Extensions are part of cache key
+            with settings(MD={'EXTENSIONS': ['markdown.extensions.toc']}):
+                self.assertEqual(markdown.render('# Cached'), '<h1 id="cached">Cached</h1>')
+        finally:
+            del md.convert
+
+    def test_markdown_settings(self):
+        markdown = plugins.get('md')
+        md = markdown.get_markdown([])
+        markdown.render('# Cached')
+
+        # Changed settings rebuilds render cache and markdown instances
+        with settings(MD={'RENDER_CACHE_MAX_SIZE': 0}):
+            self.assertIsNone(markdown._render_cache)
+            self.assertIsNot(markdown.get_markdown([]), md)
+        self.assertEqual(len(markdown._render_cache), 0)
+
+        # Replaced plugins stop listening to settings
+        plugins.load()
+        self.assertIsNot(plugins.get('md'), markdown)
+        self.assertNotIn(markdown.setup, settings._listeners)
+        self.assertIn(plugins.get('md').setup, settings._listeners)
@@ -0,0 +1,173 @@
+from cio.backends import cache, get_backend
+from cio.backends.sharded import ShardedCacheBackend
+from cio.backends.sharded.ring import HashRing
+from cio.conf import settings
+from cio.conf.exceptions import ImproperlyConfigured
+from cio.utils.uri import URI
+from tests import BaseTest, FakeMemcachedServer
+
+
+class ShardedTest(BaseTest):
+
+    def test_ring(self):
+        ring = HashRing({'a': 1, 'b': 1, 'c': 2})
+        self.assertEqual(len(ring), 3)
+        self.assertIsNone(HashRing().get('foo'))
+
+        keys = ['key-%d' % i for i in range(10000)]
+        owners = dict((key, ring.get(key)) for key in keys)
+
+        # Weighted distribution
+        counts = dict((node, list(owners.values()).count(node)) for node in ring.nodes)
+        self.assertGreater(counts['c'], counts['a'])
+        self.assertGreater(counts['c'], counts['b'])
+
+        # Removing a node only remaps its own keys
+        ring.remove('b')
+        self.assertNotIn('b', ring)
+        for key in keys:
+            if owners[key] != 'b':
+                self.assertEqual(ring.get(key), owners[key])
+            else:
+                self.assertIn(ring.get(key), ('a', 'c'))
+
+        # Re-adding restores mapping
+        ring.add('b')
+        ring.add('b')
+        self.assertDictEqual(dict((key, ring.get(key)) for key in keys), owners)
+
+    def test_backend(self):
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend('sharded://')
+
+        backend = get_backend({
+            'BACKEND': 'sharded://',
+            'SERVERS': ['locmem://?NAME=a', {'BACKEND': 'locmem://', 'NAME': 'b', 'WEIGHT': 2}, 'locmem://c']
+        })
+        self.assertIsInstance(backend, ShardedCacheBackend)
+        self.assertSetEqual(set(backend.shards.keys()), set(['locmem://?NAME=a', 'b', 'locmem://c']))
+
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(100)]
+        backend.set_many(dict((uri, u'Title %d' % i) for i, uri in enumerate(uris)))
+        for shard in backend.shards.values():
+            self.assertGreater(len(shard._cache), 0)
+            self.assertEqual(shard.calls, 1)
+        self.assertEqual(sum(len(shard._cache) for shard in backend.shards.values()), 100)
+
+        nodes = backend.get_many(uris)
+        self.assertEqual(len(nodes), 100)
+        self.assertEqual(nodes[uris[7]]['content'], u'Title 7')
+
+        backend.set(uris[0], u'First')
+        self.assertEqual(backend.get(uris[0])['content'], u'First')
+        backend.delete(uris[0])
+        self.assertIsNone(backend.get(uris[0]))
+
+        backend.delete_many(uris[:50])
+        self.assertEqual(len(backend.get_many(uris)), 50)
+
+        # Dropping a shard only misses its own keys
+        shard = backend.remove_server('b')
+        self.assertEqual(len(backend.get_many(uris)), 50 - len([uri for uri in uris[50:] if shard._get(backend._build_cache_key(uri))]))
+
+        backend.clear()
+        self.assertDictEqual(backend.get_many(uris), {})
+
+        # Closing joins thread pool
+        pool = backend.pool
+        backend.close()
+        self.assertIsNone(backend._pool)
+        self.assertRaises(ValueError, pool.map, len, [])
+
+    def test_close_on_setup(self):
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(10)]
+        with settings(CACHE={'BACKEND': 'sharded://', 'SERVERS': ['locmem://a', 'locmem://b']}):
+            backend = cache.backend
+            backend.get_many(uris)
+            self.assertIsNotNone(backend._pool)
+        self.assertIsNot(cache.backend, backend)
+        self.assertIsNone(backend._pool)
+
+    def test_failover(self):
+        server = FakeMemcachedServer().start()
+        name = 'memcached://%s' % server.address
+        backend = get_backend({
+            'BACKEND': 'sharded://',
+            'SERVERS': ['locmem://a', name],
+            'CONCURRENT': False,
+            'MAX_FAILURES': 2
+        })
+        self.assertFalse(backend.shards[name].fail_open)
+
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(20)]
+        backend.set_many(dict((uri, u'Title') for uri in uris))
+        self.assertEqual(len(backend.get_many(uris)), 20)
+        backend.shards[name].pool.clear()
+        server.stop()
+
+        # Failing shard misses, and is ejected after consecutive errors
+        self.assertLess(len(backend.get_many(uris)), 20)
+        self.assertIn(name, backend.ring)
+        backend.get_many(uris)
+        self.assertNotIn(name, backend.ring)
+
+        # Remaining servers take over its keys
+        backend.set_many(dict((uri, u'Title') for uri in uris))
+        self.assertEqual(len(backend.get_many(uris)), 20)
+
+        # Ejected server is retried after timeout, and ejected again on first error
+        weight, retry_at = backend._ejected[name]
+        self.assertGreater(retry_at, 0)
+        backend._ejected[name] = (weight, 0)
+        backend.get_many(uris)
+        self.assertIn(name, backend._ejected)
+        self.assertNotIn(name, backend.ring)
+        backend.close()
+
+    def test_revive_flushes(self):
+        class FailingShard(object):
+            def __getattr__(self, name):
+                raise IOError('Shard down')
+
+        backend = get_backend({
+            'BACKEND': 'sharded://',
+            'SERVERS': ['locmem://a', 'locmem://b'],
+            'CONCURRENT': False,
+            'MAX_FAILURES': 1
+        })
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(20)]
+        backend.set_many(dict((uri, u'Title') for uri in uris))
+        shard = backend.shards['locmem://b']
+        self.assertTrue(shard._cache)
+
+        # Eject server, keeping its entries, and delete nodes meanwhile
+        backend.shards['locmem://b'] = FailingShard()
+        backend.get_many(uris)
+        self.assertIn('locmem://b', backend._ejected)
+        backend.delete_many(uris)
+
+        # Revived server is flushed instead of serving deleted nodes
+        backend.shards['locmem://b'] = shard
+        weight, _ = backend._ejected['locmem://b']
+        backend._ejected['locmem://b'] = (weight, 0)
+        self.assertDictEqual(backend.get_many(uris), {})
+        self.assertIn('locmem://b', backend.ring)
+        backend.close()
+
+    def test_memcached_shards(self):
+        servers = [FakeMemcachedServer().start() for _ in range(2)]
+        try:
+            backend = get_backend({
+                'BACKEND': 'sharded://',
+                'SERVERS': ['memcached://%s' % server.address for server in servers],
+                'CONCURRENT': False
+            })
+            uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(20)]
+            backend.set_many(dict((uri, u'Title') for uri in uris))
+            self.assertTrue(all(server.data for server in servers))
+            self.assertEqual(len(backend.get_many(uris)), 20)
+        finally:
+            for shard in backend.shards.values():
+                shard.pool.clear()
+            for server in servers:
+                server.stop()
@@ -0,0 +1,147 @@
+import fcntl
+import multiprocessing
+import os
+import shutil
+import tempfile
+from cio.backends import get_backend
+from cio.backends.shm import SharedMemoryCacheBackend
+from cio.conf.exceptions import ImproperlyConfigured
+from cio.utils.uri import URI
+from tests import BaseTest
+
+
+def set_in_child(path, uri, content):
+    backend = get_backend('shm://%s?SLOTS=64&SIZE=4096' % path)
+    backend.set(URI(uri), content)
+
+
+def try_write_lock(backend, queue):
+    # Forked child, inheriting backend of parent
+    lock, fd = backend._get_lock()
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except (IOError, OSError):
+        queue.put(False)
+    else:
+        queue.put(True)
+
+
+class SharedMemoryTest(BaseTest):
+
+    def setUp(self):
+        super(SharedMemoryTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache')
+        self.backend = get_backend('shm://%s?SLOTS=64&SIZE=4096' % self.path)
+
+    def tearDown(self):
+        self.backend.close()
+        shutil.rmtree(self.directory)
+
+    def test_backend(self):
+        self.assertIsInstance(self.backend, SharedMemoryCacheBackend)
+        self.assertEqual(self.backend.slots, 64)
+        self.assertEqual(get_backend('shm://%s?SLOTS=100&SIZE=4096' % self.path).slots, 128)
+        with self.assertRaises(ImproperlyConfigured):
+            get_backend('shm://')
+
+    def test_get_set_delete(self):
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        self.assertIsNone(self.backend.get(uri))
+
+        self.backend.set(uri, u'e-p\xf6st')
+        self.assertDictEqual(self.backend.get(uri), {'uri': uri, 'content': u'e-p\xf6st'})
+        self.backend.set(uri, u'epost')
+        self.assertEqual(self.backend.get(uri)['content'], u'epost')
+        self.assertEqual(self.backend.stats()['count'], 1)
+
+        self.backend.delete(uri)
+        self.assertIsNone(self.backend.get(uri))
+        self.backend.delete(uri)
+
+        # Deleted slot is reused
+        self.backend.set(uri, u'e-post')
+        self.assertEqual(self.backend.get(uri)['content'], u'e-post')
+
+        # Expired values are misses
+        self.backend.set(uri, u'e-post', timeout=60)
+        self.assertIsNotNone(self.backend.get(uri))
+        self.backend.set(uri, u'e-post', timeout=-1)
+        self.assertIsNone(self.backend.get(uri))
+
+    def test_many(self):
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(40)]
+        self.backend.set_many(dict((uri, u'Title %d' % i) for i, uri in enumerate(uris)))
+        nodes = self.backend.get_many(uris)
+        self.assertEqual(len(nodes), 40)
+        self.assertEqual(nodes[uris[3]]['content'], u'Title 3')
+
+        self.backend.delete_many(uris[:10])
+        self.assertEqual(len(self.backend.get_many(uris)), 30)
+
+        self.backend.clear()
+        self.assertDictEqual(self.backend.get_many(uris), {})
+        self.assertEqual(self.backend.stats()['used'], 0)
+
+    def test_generations(self):
+        backend = get_backend('shm://%s?SLOTS=64&SIZE=4096&GENERATIONS=1' % self.path)
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        backend.set(uri, u'e-post')
+        backend.bump_generation('i18n', 'sv-se')
+        self.assertIsNone(backend.get(uri))
+        backend.set(uri, u'epost')
+        self.assertEqual(backend.get(uri)['content'], u'epost')
+        self.assertIsNone(backend._incr('missing'))
+        backend.close()
+
+    def test_full(self):
+        # Table and arena overflow flushes cache
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(100)]
+        for uri in uris:
+            self.backend.set(uri, u'Title')
+        stats = self.backend.stats()
+        self.assertGreater(stats['epoch'], 0)
+        self.assertLessEqual(stats['count'], 48)
+        self.assertEqual(self.backend.get(uris[-1])['content'], u'Title')
+
+        # Too large for arena is skipped
+        self.backend.set(uris[0], u'x' * 5000)
+        self.assertIsNone(self.backend.get(uris[0]))
+
+        # Too large overwrite removes previous value
+        self.backend.set(uris[-1], u'x' * 5000)
+        self.assertIsNone(self.backend.get(uris[-1]))
+
+    def test_count(self):
+        uris = [URI('i18n://sv-se@page/title%d.txt#1' % i) for i in range(10)]
+        self.backend.set_many(dict((uri, u'Title') for uri in uris))
+        self.backend.delete_many(uris[:4])
+        self.assertEqual(self.backend.stats()['count'], 6)
+        self.assertEqual(self.backend.stats()['deleted'], 4)
+
+        # Reused tombstones are counted as used again
+        self.backend.set_many(dict((uri, u'Title') for uri in uris))
+        stats = self.backend.stats()
+        self.assertEqual(stats['count'], 10)
+        self.assertLess(stats['deleted'], 4)
+
+    def test_shared(self):
+        uri = URI('i18n://sv-se@label/email.txt#1')
+        attached = get_backend('shm://%s?SLOTS=64&SIZE=4096' % self.path)
+        self.backend.set(uri, u'e-post')
+        self.assertEqual(attached.get(uri)['content'], u'e-post')
+        attached.close()
+
+        process = multiprocessing.Process(target=set_in_child, args=(self.path, uri, u'epost'))
+        process.start()
+        process.join()
+        self.assertEqual(self.backend.get(uri)['content'], u'epost')
+
+    def test_fork_lock(self):
+        # Forked worker must not share write lock with parent
+        queue = multiprocessing.Queue()
+        with self.backend._write_lock():
+            process = multiprocessing.Process(target=try_write_lock, args=(self.backend, queue))
+            process.start()
+            process.join()
+        self.assertFalse(queue.get(timeout=5))
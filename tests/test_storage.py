@@ -2,7 +2,9 @@ from cio.backends import get_backend, storage
 from cio.backends.base import CacheBackend, StorageBackend, DatabaseBackend
 from cio.backends.exceptions import InvalidBackend, PersistenceError, NodeDoesNotExist
 from cio.backends.sqlite import SqliteBackend
+from cio.conf import settings
 from cio.conf.exceptions import ImproperlyConfigured
+from cio.utils.bloom import BloomFilter
 from cio.utils.uri import URI
 from tests import BaseTest
 
@@ -191,3 +193,96 @@ class StorageTest(BaseTest):
             'i18n://en@foo/bar/baz.md',
             'i18n://en@ham/spam.txt',
         ])
+
+    def test_get_fallbacks(self):
+        storage.set('i18n://en@label/email.txt#draft', u'email')
+        storage.set('i18n://sv-se@label/email.txt#draft', u'epost')
+        storage.set('i18n://en@label/surname.txt#draft', u'surname')
+        storage.publish('i18n://en@label/email#draft')
+        storage.publish('i18n://sv-se@label/email#draft')
+        storage.publish('i18n://en@label/surname#draft')
+
+        fallback_uris = {
+            URI('i18n://sv-fi@label/email'): [URI('i18n://sv-se@label/email'), URI('i18n://en@label/email')],
+            URI('i18n://da@label/email'): [URI('i18n://en@label/email')],
+            URI('i18n://sv-fi@label/surname'): [URI('i18n://sv-se@label/surname'), URI('i18n://en@label/surname')],
+            URI('i18n://sv-fi@label/zipcode'): [URI('i18n://sv-se@label/zipcode')],
+        }
+
+        with self.assertDB(calls=1, selects=1):
+            nodes = storage.get_fallbacks(fallback_uris)
+
+        self.assertDictEqual(dict((uri, node['uri']) for uri, node in nodes.items()), {
+            'i18n://sv-fi@label/email': 'i18n://sv-se@label/email.txt#1',
+            'i18n://da@label/email': 'i18n://en@label/email.txt#1',
+            'i18n://sv-fi@label/surname': 'i18n://en@label/surname.txt#1',
+        })
+
+        # Level by level implementation gives same result
+        self.assertDictEqual(StorageBackend.get_fallbacks(storage.backend, fallback_uris), nodes)
+
+        # Fallback uris differing only by query share storage key
+        fallback_uris = {
+            URI('i18n://sv-fi@label/email?name=A'): [URI('i18n://en@label/email?name=A')],
+            URI('i18n://sv-fi@label/email?name=B'): [URI('i18n://en@label/email?name=B')],
+        }
+        nodes = storage.get_fallbacks(fallback_uris)
+        self.assertDictEqual(dict((uri, node['uri']) for uri, node in nodes.items()), {
+            'i18n://sv-fi@label/email?name=A': 'i18n://en@label/email.txt?name=A#1',
+            'i18n://sv-fi@label/email?name=B': 'i18n://en@label/email.txt?name=B#1',
+        })
+        self.assertDictEqual(StorageBackend.get_fallbacks(storage.backend, fallback_uris), nodes)
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        self.assertEqual(bloom.hashes, 7)
+        self.assertEqual(bloom.memory, 1199)
+        self.assertEqual(bloom.false_positive_rate, 0)
+
+        keys = ['i18n://sv-se@page/title%d' % i for i in range(1000)]
+        bloom.update(keys)
+        self.assertEqual(len(bloom), 1000)
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertAlmostEqual(bloom.false_positive_rate, 0.01, places=2)
+
+        false_positives = len([i for i in range(10000) if 'i18n://en@page/title%d' % i in bloom])
+        self.assertLess(false_positives, 300)
+
+    def test_bloom_storage(self):
+        self.assertIsNone(storage.get_bloom())
+        storage.set('i18n://sv-se@a.txt#draft', u'A')
+        storage.publish('i18n://sv-se@a#draft')
+
+        storage_config = dict(settings.STORAGE)
+        try:
+            settings.configure(STORAGE=dict(storage_config, BLOOM={'CAPACITY': 100}))
+            self.assertEqual(len(storage.get_bloom()), 0)
+            storage.backend._create(URI('i18n://sv-se@b.txt#1'), u'B')
+            storage.set('i18n://sv-se@c.txt#draft', u'C')
+            storage.publish('i18n://sv-se@c#draft')
+
+            bloom = storage.get_bloom()
+            self.assertEqual(len(bloom), 1)
+            self.assertIn('i18n://sv-se@c', bloom)
+
+            # Nodes missing in bloom filter are skipped
+            with self.assertDB(calls=1):
+                nodes = storage.get_many(('i18n://sv-se@b', 'i18n://sv-se@c', 'i18n://sv-se@d'))
+            self.assertKeys(nodes, 'i18n://sv-se@c')
+            with self.assertDB(calls=0):
+                self.assertDictEqual(storage.get_many(('i18n://sv-se@d',)), {})
+                with self.assertRaises(NodeDoesNotExist):
+                    storage.get('i18n://sv-se@d')
+
+            # Rebuilt from storage
+            storage.build_bloom()
+            self.assertEqual(storage.get('i18n://sv-se@c')['content'], u'C')
+            self.assertEqual(len(storage.get_bloom()), 2)
+
+            settings.configure(STORAGE=dict(storage_config, BLOOM={'CAPACITY': 100, 'REFRESH': 0}))
+            storage.backend._create(URI('i18n://sv-se@e.txt#draft'), u'E')
+            self.assertEqual(storage.get('i18n://sv-se@e#draft')['content'], u'E')
+        finally:
+            settings.configure(STORAGE=storage_config)
+
+        self.assertIsNone(storage.get_bloom())
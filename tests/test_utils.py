@@ -1,10 +1,16 @@
 # coding=utf-8
 import six
+import threading
+import unittest
 from cio import lazy_shortcut
 from cio.conf import settings
 from cio.utils.formatters import ContentFormatter
 from cio.utils.uri import URI, quote
 from cio.utils.imports import import_class
+from cio.conf.exceptions import ImproperlyConfigured
+from cio.utils.lru import LRUCache
+from cio.utils.thread import ContextVar, ContextLocalObject, ThreadLocalObject, get_local_object_class, \
+    get_local_storage_class
 from tests import BaseTest
 
 class UtilsTest(BaseTest):
@@ -88,7 +94,7 @@ class UtilsTest(BaseTest):
         self.assertEqual(exact_copy, uri)
         self.assertDictEqual(exact_copy.query, uri.query)
         self.assertEqual(exact_copy.query['second'], ['1'])
-        self.assertNotEqual(id(exact_copy.query), id(uri.query))
+        self.assertIsNot(exact_copy.query, uri.query)
 
         # Verify replacement works
         uri = URI('i18n://sv@page/title.txt?var=someval&second=2').clone(query=None)
@@ -148,6 +154,41 @@ class UtilsTest(BaseTest):
             'key': []
         })
 
+    def test_uri_parse_cache(self):
+        # Parsed uris are cached and shared
+        uri = URI('i18n://sv@page/title.txt#1')
+        self.assertIs(URI(u'i18n://sv@page/title.txt#1'), uri)
+        self.assertIs(URI(b'i18n://sv@page/title.txt#1'), uri)
+
+        # Clone reuses parts, but not query dicts
+        clone = uri.clone(query={'a': ['1']})
+        self.assertEqual(clone, 'i18n://sv@page/title.txt?a=1#1')
+        self.assertIsNot(clone.clone(version=None).query, clone.query)
+
+        # Mutated query dicts leave shared uris untouched
+        clone.query['a'].append('2')
+        self.assertListEqual(clone.query['a'], ['1'])
+        self.assertEqual(clone.clone(), 'i18n://sv@page/title.txt?a=1#1')
+
+        # Thread local separators bypasses cache and separator snapshot
+        def assert_local_thread_uri():
+            settings.configure(local=True, URI_VERSION_SEPARATOR='~')
+            local_uri = URI('i18n://sv@page/title.txt~1')
+            self.assertEqual(local_uri.version, '1')
+            self.assertEqual(local_uri.clone(version='2'), 'i18n://sv@page/title.txt~2')
+            self.assertIsNot(URI('i18n://sv@page/title.txt#1'), uri)
+
+        thread = threading.Thread(target=assert_local_thread_uri)
+        thread.start()
+        thread.join()
+
+        self.assertIsNone(URI('i18n://sv@page/title.txt~1').version)
+
+        # Cache is cleared, or disabled, on settings change
+        with settings(URI_CACHE_MAX_SIZE=0):
+            self.assertIsNot(URI('i18n://sv@page/title.txt#1'), uri)
+            self.assertIsNot(URI('i18n://sv@page/title.txt#1'), URI('i18n://sv@page/title.txt#1'))
+
     def test_formatter(self):
         tests = [
             (u"These are no variables: {} {0} {x} {x:f} {x!s} {x!r:.2f} { y } {{ y }}", {}, None),
@@ -162,6 +203,15 @@ class UtilsTest(BaseTest):
 
         for template, context, value in tests:
             self.assertEqual(formatter.format(template, **context), value or template)
+            # Rendered again from compiled template
+            self.assertEqual(formatter.format(template, **context), value or template)
+
+        # Compiled templates are cached, nested format specs falls back to full formatter
+        segments, simple = formatter.compile(u"Hello {name}")
+        self.assertIs(formatter.compile(u"Hello {name}")[0], segments)
+        self.assertTrue(simple)
+        self.assertFalse(formatter.compile(u"{n:{width}}")[1])
+        self.assertEqual(formatter.format(u"{n:{width}} {m:{width}}", n=1, width=3), u"  1 {m}")
 
     def test_import_class(self):
         CF = import_class('cio.utils.formatters', 'ContentFormatter')
@@ -173,3 +223,69 @@ class UtilsTest(BaseTest):
     def test_lazy_shortcut(self):
         uri_module = lazy_shortcut('cio.utils', 'uri')
         self.assertEqual(uri_module.URI, URI)
+
+    def test_lru_cache(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        self.assertEqual(lru.get('a'), 1)
+        lru.set('c', 3)
+        self.assertEqual(len(lru), 2)
+        self.assertIn('a', lru)
+        self.assertNotIn('b', lru)
+        self.assertIsNone(lru.get('b'))
+        lru.clear()
+        self.assertEqual(len(lru), 0)
+
+    @unittest.skipIf(ContextVar is None, 'contextvars requires Python 3.7+')
+    def test_context_local_object(self):
+        from contextvars import copy_context
+
+        class Local(ContextLocalObject):
+            context_inherit = ('stack',)
+
+            def __init__(self):
+                super(Local, self).__init__()
+                self.stack = ['default']
+                self.buffer = []
+
+        local = Local()
+        local.stack.append('main')
+        local.buffer.append('main')
+        result = []
+
+        def in_thread():
+            result.append((list(local.stack), list(local.buffer)))
+            local.stack.append('thread')
+            local.buffer.append('thread')
+
+        # Spawned within context, inherits stack but not buffer
+        thread = threading.Thread(target=copy_context().run, args=(in_thread,))
+        thread.start()
+        thread.join()
+
+        # Spawned without context
+        thread = threading.Thread(target=in_thread)
+        thread.start()
+        thread.join()
+
+        self.assertListEqual(result, [(['default', 'main'], []), (['default'], [])])
+        self.assertListEqual(local.stack, ['default', 'main'])
+        self.assertListEqual(local.buffer, ['main'])
+
+        with self.assertRaises(SystemError):
+            local.__init__()
+
+    def test_local_object_class(self):
+        self.assertIs(get_local_object_class(), ThreadLocalObject)
+        self.assertIs(get_local_storage_class('thread'), ThreadLocalObject)
+        if ContextVar is not None:
+            self.assertIs(get_local_storage_class('context'), ContextLocalObject)
+        with self.assertRaises(ImproperlyConfigured):
+            get_local_storage_class('process')
+
+        # Local storage is chosen at import and can not be changed after
+        with self.assertRaises(ImproperlyConfigured):
+            settings.configure(LOCAL_STORAGE='context')
+        self.assertEqual(settings.LOCAL_STORAGE, 'thread')
+        settings.configure(LOCAL_STORAGE='thread')